@@ -0,0 +1,129 @@
+"""조사 보관함 전체 분석
+
+보관함(survey_store)의 체크리스트와 작업조건 행을 열 단위 데이터프레임으로 한 번에 읽고,
+1호~11호 코드와 작업부하×작업빈도 총점을 벡터 연산 group-by로 집계한다.
+읽은 데이터와 집계 결과는 보관함의 데이터 버전(조사 수, 마지막 저장시각)을 키로 캐시한다.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import survey_store
+from checklist import 호_컬럼, 해당_코드
+from scoring import 라벨_코드, 부하_dtype, 빈도_dtype
+
+분석_기준 = ["업종", "사업장명", "공정", "작업명"]
+
+_캐시 = OrderedDict()
+_캐시_크기 = 32
+_캐시_lock = threading.Lock()
+
+
+def _데이터_버전(conn):
+    return conn.execute("SELECT COUNT(*), MAX(저장시각) FROM 조사").fetchone()
+
+
+def _캐시됨(이름, build, path=None):
+    """(이름, 데이터 버전)을 키로 build(conn) 결과를 캐시한다."""
+    conn = survey_store.연결(path)
+    try:
+        key = (path or survey_store.DB_경로, 이름, _데이터_버전(conn))
+        with _캐시_lock:
+            if key in _캐시:
+                _캐시.move_to_end(key)
+                return _캐시[key]
+        result = build(conn)
+    finally:
+        conn.close()
+    with _캐시_lock:
+        _캐시[key] = result
+        while len(_캐시) > _캐시_크기:
+            _캐시.popitem(last=False)
+    return result
+
+
+def _조사_정보(conn):
+    """조사_id별 사업장명/업종과 (조사_id, 작업명) → 작업공정 표"""
+    조사 = pd.read_sql_query("SELECT 조사_id, 사업장명, 업종, 값 FROM 조사", conn)
+    공정 = []
+    for 조사_id, 값 in zip(조사["조사_id"], 조사["값"]):
+        for key, value in json.loads(값).items():
+            if key.startswith("1단계_작업공정_") and value:
+                공정.append((조사_id, key[len("1단계_작업공정_"):], value))
+    조사 = 조사.drop(columns="값")
+    조사[["사업장명", "업종"]] = 조사[["사업장명", "업종"]].fillna("")
+    return 조사, pd.DataFrame(공정, columns=["조사_id", "작업명", "공정"])
+
+
+def _기준_열_추가(df, 조사, 공정):
+    df = df.merge(조사, on="조사_id", how="left").merge(공정, on=["조사_id", "작업명"], how="left")
+    # 작업공정을 입력하지 않은 작업은 화면 기본값과 같이 작업명을 공정으로 본다
+    df["공정"] = df["공정"].fillna(df["작업명"])
+    for col in 분석_기준:
+        df[col] = df[col].fillna("").astype("category")
+    return df
+
+
+def 체크리스트_데이터(path=None):
+    """보관함 전체 체크리스트 (1호~11호는 int8 코드)"""
+    def build(conn):
+        호_열 = ", ".join(f'"{col}"' for col in 호_컬럼)
+        df = pd.read_sql_query(f"SELECT 조사_id, 작업명, 단위작업명, {호_열} FROM 체크리스트", conn)
+        df[호_컬럼] = df[호_컬럼].fillna(2).astype(np.int8)
+        return _기준_열_추가(df, *_조사_정보(conn))
+    return _캐시됨("체크리스트", build, path)
+
+
+def 작업조건_데이터(path=None):
+    """보관함 전체 작업조건 (총점은 작업부하×작업빈도로 다시 계산)"""
+    def build(conn):
+        df = pd.read_sql_query(
+            'SELECT 조사_id, 작업명, 단위작업명, "작업부하(A)", "작업빈도(B)" FROM 작업조건', conn
+        )
+        부하 = 라벨_코드(df["작업부하(A)"].fillna(""), 부하_dtype).astype(np.int16)
+        빈도 = 라벨_코드(df["작업빈도(B)"].fillna(""), 빈도_dtype).astype(np.int16)
+        df = df.drop(columns=["작업부하(A)", "작업빈도(B)"]).assign(작업부하=부하, 작업빈도=빈도, 총점=부하 * 빈도)
+        return _기준_열_추가(df, *_조사_정보(conn))
+    return _캐시됨("작업조건", build, path)
+
+
+def _필터(df, 업종=None, 공정_포함=None):
+    mask = np.ones(len(df), dtype=bool)
+    if 업종:
+        mask &= (df["업종"] == 업종).to_numpy()
+    if 공정_포함:
+        mask &= df["공정"].astype(str).str.contains(공정_포함, regex=False).to_numpy()
+    return df[mask] if not mask.all() else df
+
+
+def 호_비율(기준="업종", 코드=해당_코드, 업종=None, 공정_포함=None, path=None):
+    """기준별 단위작업 중 1호~11호가 코드(기본 O(해당))인 비율(%)과 단위작업 수"""
+    def build(conn):
+        df = _필터(체크리스트_데이터(path), 업종, 공정_포함)
+        해당 = pd.DataFrame(df[호_컬럼].to_numpy() == 코드, columns=호_컬럼, index=df.index)
+        grouped = 해당.groupby(df[기준], observed=True)
+        result = grouped.mean().mul(100).round(1)
+        result.insert(0, "단위작업수", grouped.size())
+        return result.sort_values("단위작업수", ascending=False)
+    return _캐시됨(("호_비율", 기준, 코드, 업종, 공정_포함), build, path)
+
+
+def 총점_상위(n=20, 기준=("사업장명", "작업명"), 업종=None, 공정_포함=None, path=None):
+    """기준별 최고/평균 총점 상위 n개"""
+    def build(conn):
+        df = _필터(작업조건_데이터(path), 업종, 공정_포함)
+        grouped = df.groupby(list(기준), observed=True)["총점"]
+        result = pd.DataFrame({
+            "최고총점": grouped.max(),
+            "평균총점": grouped.mean().round(1),
+            "단위작업수": grouped.size(),
+        })
+        return result.sort_values(["최고총점", "평균총점"], ascending=False).head(n).reset_index()
+    return _캐시됨(("총점_상위", n, tuple(기준), 업종, 공정_포함), build, path)
+
+
+def 업종_목록(path=None):
+    return sorted(업종 for 업종 in 체크리스트_데이터(path)["업종"].cat.categories if 업종)
@@ -1,22 +1,23 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
 from datetime import datetime
 
-# PDF 관련 imports (선택사항)
-try:
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.lib.enums import TA_CENTER
-    import os
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
+from analytics import 분석_기준, 업종_목록, 호_비율, 총점_상위
+from autosave import 저장_간격, 새_조사_id, 체크포인트, 자동저장_복원, 자동저장_목록, 자동저장_오류
+from checklist import 호_컬럼, 호_옵션, 해당_코드, 잠재_코드, 빈_체크리스트, 체크리스트_압축, 체크리스트_편집용, 작업명_인덱스
+from checklist_import import 미리보기_행수, 체크리스트_가져오기, 여러_체크리스트_가져오기
+from ergo_assessment import 평가도구, 빈_입력, 원인분석_반영
+from excel_templates import 증상조사_컬럼, 템플릿, 샘플_체크리스트, 템플릿_파일
+from report_excel import 엑셀_엔진, 엑셀_보고서_생성
+from report_jobs import 세션_스냅샷, 작업_제출, 작업_조회
+from report_pdf import PDF_AVAILABLE, PDF_보고서_생성
+from scoring import 부하옵션, 빈도옵션, 총점_적용
+from session_schema import 키_타입
+from snapshot import 스냅샷_저장, 스냅샷_불러오기
+from survey_store import 조사_저장, 조사_목록, 조사_불러오기
+from symptom_survey import 원자료_열, 증상조사_집계
+from photo_store import 업로드_저장, 썸네일_경로
+from owas import OWAS_분석
 
 st.set_page_config(layout="wide", page_title="근골격계 유해요인조사")
 
@@ -24,80 +25,233 @@ st.set_page_config(layout="wide", page_title="근골격계 유해요인조사")
 if "checklist_df" not in st.session_state:
     st.session_state["checklist_df"] = pd.DataFrame()
 
+# 선택한 화면만 실행하므로, 화면에 없는 위젯의 값이 지워지지 않도록 입력값을 다시 기록
+for key in list(st.session_state.keys()):
+    if 키_타입(key) is not None and not isinstance(키_타입(key), tuple):
+        st.session_state[key] = st.session_state[key]
+
+
+def _기준_일치(df, 기본_df, 기준_열):
+    if not isinstance(df, pd.DataFrame) or list(df.columns) != list(기본_df.columns):
+        return False
+    return 기준_열 is None or df[기준_열].tolist()[:len(기본_df)] == 기본_df[기준_열].tolist()
+
+def 편집_데이터(저장_키, 기본_df, 기준_열=None):
+    """데이터 편집기에 넘길 표: 저장된 표가 있으면 저장된 표, 없으면 기본 표
+
+    기준_열을 주면 저장된 표의 앞부분 기준_열 값이 기본 표와 같을 때만 저장된 표를 쓴다.
+    (체크리스트 등 원본 데이터가 바뀌었으면 기본 표로 다시 시작)
+
+    num_rows="dynamic" 편집기는 data가 바뀌면 위젯이 새로 만들어져 진행 중인 편집이 사라지므로,
+    한 번 넘긴 표(시드)를 계속 넘기고 편집 내용은 편집기가 돌려준 표로 읽는다.
+    저장된 표가 편집_저장() 밖에서 바뀌었을 때(불러오기, 집계 등)만 시드를 새로 정한다.
+    """
+    saved = st.session_state.get(저장_키)
+    시드, 결과 = st.session_state.get(f"_편집_시드_{저장_키}", (None, None))
+    if 시드 is not None and saved is 결과 and _기준_일치(시드, 기본_df, 기준_열):
+        return 시드
+    시드 = saved if _기준_일치(saved, 기본_df, 기준_열) else 기본_df
+    st.session_state[f"_편집_시드_{저장_키}"] = (시드, None)
+    return 시드
+
+def 편집_저장(저장_키, edited):
+    """편집기가 돌려준 표를 저장한다. (다음 실행에서 편집_데이터가 같은 시드를 쓰도록 기록)"""
+    st.session_state[저장_키] = edited
+    시드, _ = st.session_state.get(f"_편집_시드_{저장_키}", (None, None))
+    st.session_state[f"_편집_시드_{저장_키}"] = (시드, edited)
+
+def 다음_이름(접두사, 목록):
+    """목록에 없는 다음 번호의 이름 (중간 항목을 지운 뒤에도 키가 겹치지 않게)"""
+    번호 = [int(이름[len(접두사) + 1:]) for 이름 in 목록 if 이름[len(접두사) + 1:].isdigit()]
+    return f"{접두사}_{max(번호, default=0) + 1}"
+
+def 목록_추가(목록_키, 접두사):
+    목록 = st.session_state[목록_키]
+    목록.append(다음_이름(접두사, 목록))
+
+def 목록_삭제(목록_키, 이름):
+    if 이름 in st.session_state[목록_키]:
+        st.session_state[목록_키].remove(이름)
+
+def 자동저장():
+    """자동저장을 켰으면 체크포인트 (fragment rerun은 스크립트 끝까지 가지 않으므로 fragment에서도 호출)"""
+    if st.session_state.get("_자동저장_사용") and "_자동저장_id" in st.session_state:
+        체크포인트(st.session_state["_자동저장_id"], st.session_state)
+
+# 업로드한 사진은 사진 저장소에 한 번만 저장하고 세션에는 사진 ID만 둔다.
+# 화면을 옮기면 업로더는 비지만 사진 ID는 남으므로, 업로더가 바뀔 때만 ID를 고친다.
+def 사진_업로드_변경(업로드_키, id_키):
+    uploaded = st.session_state.get(업로드_키)
+    if uploaded is None:
+        st.session_state[id_키] = ""
+        return
+    try:
+        st.session_state[id_키] = 업로드_저장(uploaded)
+    except ValueError as e:
+        st.toast(f"❌ {e}")
+
+def 사진_목록_변경(업로드_키, id_키):
+    업로드 = []
+    for uploaded in st.session_state.get(업로드_키) or []:
+        try:
+            업로드.append(업로드_저장(uploaded))
+        except ValueError as e:
+            st.toast(f"❌ {e}")
+    # 업로더에서 뺀 사진은 목록에서도 빼고, 새로 올린 사진은 뒤에 붙임
+    빠진 = set(st.session_state.get(f"_{업로드_키}_id", [])) - set(업로드)
+    목록 = [pid for pid in st.session_state.get(id_키, []) if pid not in 빠진]
+    목록 += [pid for pid in dict.fromkeys(업로드) if pid not in 목록]
+    st.session_state[id_키] = 목록
+    st.session_state[f"_{업로드_키}_id"] = 업로드
+
+def 사진_표시(사진_id, caption):
+    path = 썸네일_경로(사진_id)
+    if path is None:
+        st.caption(f"{caption}: 저장소에서 사진을 찾을 수 없습니다.")
+    else:
+        st.image(path, caption=caption, use_column_width=True)
+
 # 사이드바에 임시저장 기능 추가
 with st.sidebar:
     st.title("📁 데이터 관리")
     
-    # 임시저장 (JSON 파일로 저장)
+    # 임시저장 (스냅샷 zip 파일로 저장)
     if st.button("💾 임시저장", use_container_width=True):
         try:
-            # 모든 세션 상태를 딕셔너리로 수집
-            save_data = {}
-            for key, value in st.session_state.items():
-                if isinstance(value, pd.DataFrame):
-                    save_data[key] = value.to_dict('records')
-                elif isinstance(value, (str, int, float, bool, list, dict)):
-                    save_data[key] = value
-                elif hasattr(value, 'isoformat'):  # datetime 객체
-                    save_data[key] = value.isoformat()
-            
-            # JSON으로 변환
-            import json
-            json_str = json.dumps(save_data, ensure_ascii=False, indent=2)
+            # 입력 데이터를 스냅샷으로 저장 (세션 스키마에 있는 키만)
+            snapshot_bytes = 스냅샷_저장(st.session_state)
             
             # 다운로드 버튼
             st.download_button(
                 label="📥 저장파일 다운로드",
-                data=json_str,
-                file_name=f"근골격계조사_임시저장_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json"
+                data=snapshot_bytes,
+                file_name=f"근골격계조사_임시저장_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                mime="application/zip"
             )
             st.success("✅ 임시저장 파일이 생성되었습니다!")
         except Exception as e:
             st.error(f"저장 중 오류 발생: {str(e)}")
     
-    # 임시저장 파일 불러오기
+    # 임시저장 파일 불러오기 (이전 JSON 저장파일도 지원)
     st.markdown("---")
-    uploaded_file = st.file_uploader("📂 저장파일 불러오기", type=['json'])
+    uploaded_file = st.file_uploader("📂 저장파일 불러오기", type=['zip', 'json'])
     
     if uploaded_file is not None:
         if st.button("📤 데이터 불러오기", use_container_width=True):
             try:
-                import json
-                
-                # JSON 파일 읽기
-                save_data = json.load(uploaded_file)
-                
-                # 세션 상태로 복원
-                for key, value in save_data.items():
-                    if isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
-                        # DataFrame으로 변환
-                        st.session_state[key] = pd.DataFrame(value)
-                    else:
-                        st.session_state[key] = value
+                # 세션 상태로 복원 (스키마에 없는 키는 건너뜀)
+                restored, _ = 스냅샷_불러오기(uploaded_file)
+                for key, value in restored.items():
+                    st.session_state[key] = value
+                # 다른 조사로 바뀌었으므로 보관함 조사/자동저장 기록과의 연결을 끊음
+                # (보관함에 저장하면 새 조사로, 자동저장은 새 조사 ID로 저장)
+                st.session_state.pop("_DB_조사_id", None)
+                st.session_state.pop("_자동저장_id", None)
                 
                 st.success("✅ 데이터를 성공적으로 불러왔습니다!")
                 st.rerun()
             except Exception as e:
                 st.error(f"불러오기 중 오류 발생: {str(e)}")
     
+    # 서버 자동저장 (선택)
+    st.markdown("---")
+    if st.checkbox("🔄 서버에 자동저장", key="_자동저장_사용"):
+        if "_자동저장_id" not in st.session_state:
+            st.session_state["_자동저장_id"] = 새_조사_id()
+        조사_id = st.session_state["_자동저장_id"]
+        st.caption(f"조사 ID: {조사_id} · {저장_간격}초마다 바뀐 항목만 저장합니다.")
+        오류 = 자동저장_오류(조사_id)
+        if 오류:
+            st.warning(f"⚠️ 마지막 자동저장에 실패했습니다: {오류}")
+        # 자동저장 디렉터리는 모든 사용자가 같이 쓰므로 이 세션에서 쓴 조사 ID만 목록에 보여 줌
+        if 조사_id not in st.session_state.setdefault("_자동저장_기록", []):
+            st.session_state["_자동저장_기록"].append(조사_id)
+    
+    with st.expander("♻️ 자동저장 복원"):
+        자동저장_기록 = 자동저장_목록(st.session_state.get("_자동저장_기록", []))
+        복원할_id = None
+        if 자동저장_기록:
+            복원할_id = st.selectbox(
+                "이 세션의 자동저장 기록",
+                [기록["id"] for 기록 in 자동저장_기록],
+                format_func=lambda 조사_id: next(
+                    f"{기록['사업장명'] or '(사업장명 없음)'} · {datetime.fromtimestamp(기록['갱신시각']).strftime('%m/%d %H:%M')}"
+                    for 기록 in 자동저장_기록 if 기록["id"] == 조사_id
+                )
+            )
+        입력_id = st.text_input("조사 ID로 복원", placeholder="이전 세션의 조사 ID", help="자동저장을 켰을 때 표시된 조사 ID를 입력하세요.")
+        복원할_id = 입력_id.strip() or 복원할_id
+        if st.button("♻️ 자동저장 복원", use_container_width=True, disabled=not 복원할_id):
+            try:
+                restored, _ = 자동저장_복원(복원할_id)
+                for key, value in restored.items():
+                    st.session_state[key] = value
+                # 복원한 조사에 이어서 자동저장하고, 보관함에는 새 조사로 저장
+                st.session_state["_자동저장_id"] = 복원할_id
+                st.session_state.pop("_DB_조사_id", None)
+                if 복원할_id not in st.session_state.setdefault("_자동저장_기록", []):
+                    st.session_state["_자동저장_기록"].append(복원할_id)
+                st.rerun()
+            except Exception as e:
+                st.error(f"자동저장 복원 중 오류 발생: {str(e)}")
+    
+    # 조사 보관함 (SQLite)
+    st.markdown("---")
+    with st.expander("🗄️ 조사 보관함"):
+        현재_조사_id = st.session_state.get("_DB_조사_id")
+        if 현재_조사_id is not None:
+            st.caption(f"보관함 조사 #{현재_조사_id}을(를) 편집 중입니다.")
+        
+        if st.button("💾 보관함에 저장", use_container_width=True):
+            try:
+                st.session_state["_DB_조사_id"] = 조사_저장(st.session_state, 현재_조사_id)
+                st.success(f"✅ 조사 #{st.session_state['_DB_조사_id']}로 저장했습니다.")
+            except Exception as e:
+                st.error(f"보관함 저장 중 오류 발생: {str(e)}")
+        
+        저장된_조사 = 조사_목록()
+        if not 저장된_조사.empty:
+            조사_이름 = {
+                row.조사_id: f"#{row.조사_id} {row.사업장명 or '(사업장명 없음)'} · {row.저장시각.strftime('%Y-%m-%d %H:%M')}"
+                for row in 저장된_조사.itertuples()
+            }
+            열_조사_id = st.selectbox("저장된 조사", list(조사_이름), format_func=조사_이름.get)
+            if st.button("📂 조사 열기", use_container_width=True):
+                try:
+                    restored = 조사_불러오기(열_조사_id)
+                    # 이전 조사의 입력값은 지우고 선택한 조사만 세션에 올림
+                    for key in list(st.session_state.keys()):
+                        if 키_타입(key) is not None and key not in restored:
+                            del st.session_state[key]
+                    for key, value in restored.items():
+                        st.session_state[key] = value
+                    st.session_state["_DB_조사_id"] = 열_조사_id
+                    # 열린 조사의 자동저장은 새 조사 ID로 시작
+                    st.session_state.pop("_자동저장_id", None)
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"조사 열기 중 오류 발생: {str(e)}")
+    
     # 자동저장 안내
     st.markdown("---")
     st.info("💡 작업 중 주기적으로 임시저장하시면 데이터 손실을 방지할 수 있습니다.")
 
 # 탭 정의
-tabs = st.tabs([
+# 화면 선택 - 선택한 화면만 실행하고, 다른 화면의 데이터는 세션 상태에서 가져옴
+화면_목록 = [
     "사업장개요",
     "근골격계 부담작업 체크리스트",
     "유해요인조사표",
     "작업조건조사",
     "정밀조사",
     "증상조사 분석",
-    "작업환경개선계획서"
-])
+    "작업환경개선계획서",
+    "보관함 분석"
+]
+선택_화면 = st.radio("화면 선택", 화면_목록, horizontal=True, key="_화면", label_visibility="collapsed")
 
 # 1. 사업장개요 탭
-with tabs[0]:
+if 선택_화면 == 화면_목록[0]:
     st.title("사업장 개요")
     사업장명 = st.text_input("사업장명", key="사업장명")
     소재지 = st.text_input("소재지", key="소재지")
@@ -111,7 +265,7 @@ with tabs[0]:
         성명 = st.text_input("성명", key="성명")
 
 # 2. 근골격계 부담작업 체크리스트 탭
-with tabs[1]:
+if 선택_화면 == 화면_목록[1]:
     st.subheader("근골격계 부담작업 체크리스트")
     
     # 엑셀 파일 업로드 기능 추가
@@ -123,107 +277,163 @@ with tabs[1]:
         - 3~13번째 열: 1호~11호 (O(해당), △(잠재위험), X(미해당) 중 입력)
         """)
         
-        uploaded_excel = st.file_uploader("엑셀 파일 선택", type=['xlsx', 'xls'])
+        업로드_방식 = st.radio(
+            "업로드 방식",
+            ["단일 파일", "여러 파일 (부서별 병합)"],
+            horizontal=True,
+            key="체크리스트_업로드_방식"
+        )
         
-        if uploaded_excel is not None:
-            try:
-                # 엑셀 파일 읽기
-                df_excel = pd.read_excel(uploaded_excel)
-                
-                # 컬럼명 확인 및 조정
-                expected_columns = ["작업명", "단위작업명"] + [f"{i}호" for i in range(1, 12)]
-                
-                # 컬럼 개수가 맞는지 확인
-                if len(df_excel.columns) >= 13:
-                    # 컬럼명 재설정
-                    df_excel.columns = expected_columns[:len(df_excel.columns)]
-                    
-                    # 값 검증 (O(해당), △(잠재위험), X(미해당)만 허용)
-                    valid_values = ["O(해당)", "△(잠재위험)", "X(미해당)"]
+        uploaded_excel = None
+        if 업로드_방식 == "단일 파일":
+            uploaded_excel = st.file_uploader("엑셀 파일 선택", type=['xlsx', 'xls'])
+        else:
+            uploaded_excels = st.file_uploader(
+                "엑셀 파일 선택 (여러 개)",
+                type=['xlsx', 'xls'],
+                accept_multiple_files=True
+            )
+            
+            if uploaded_excels:
+                try:
+                    # 파일 구성이 같으면 다시 읽지 않음
+                    업로드_키 = tuple(
+                        f"{f.name}_{f.size}_{getattr(f, 'file_id', '')}" for f in uploaded_excels
+                    )
+                    병합_결과 = st.session_state.get("_체크리스트_병합")
                     
-                    # 3번째 열부터 13번째 열까지 검증
-                    for col in expected_columns[2:]:
-                        if col in df_excel.columns:
-                            # 유효하지 않은 값은 X(미해당)으로 변경
-                            df_excel[col] = df_excel[col].apply(
-                                lambda x: x if x in valid_values else "X(미해당)"
+                    if 병합_결과 is None or 병합_결과[0] != 업로드_키:
+                        with st.spinner(f"{len(uploaded_excels)}개 파일을 동시에 읽는 중..."):
+                            병합_df, 파일별_결과 = 여러_체크리스트_가져오기(
+                                [(f.name, f.getvalue()) for f in uploaded_excels]
                             )
+                        병합_결과 = (업로드_키, 병합_df, 파일별_결과)
+                        st.session_state["_체크리스트_병합"] = 병합_결과
                     
-                    if st.button("✅ 데이터 적용하기"):
-                        st.session_state["checklist_df"] = df_excel
-                        st.success("✅ 엑셀 데이터를 성공적으로 불러왔습니다!")
-                        st.rerun()
+                    _, 병합_df, 파일별_결과 = 병합_결과
                     
-                    # 미리보기
-                    st.markdown("#### 📋 데이터 미리보기")
-                    st.dataframe(df_excel)
+                    # 파일별 결과
+                    st.markdown("#### 📑 파일별 결과")
+                    st.dataframe(
+                        pd.DataFrame([
+                            {
+                                "파일명": 결과["파일명"],
+                                "행수": 결과["행수"],
+                                "오류 행": 결과["오류_행수"],
+                                "변경된 값": 결과["오류_칸수"],
+                                "소요시간(초)": round(결과["소요시간"], 2),
+                                "상태": f"❌ {결과['오류']}" if 결과["오류"] else "✅"
+                            }
+                            for 결과 in 파일별_결과
+                        ]),
+                        hide_index=True,
+                        use_container_width=True
+                    )
                     
-                else:
-                    st.error("⚠️ 엑셀 파일의 컬럼이 13개 이상이어야 합니다. (작업명, 단위작업명, 1호~11호)")
+                    if 병합_df is not None:
+                        if st.button("✅ 병합 데이터 적용하기"):
+                            st.session_state["checklist_df"] = 병합_df
+                            st.success("✅ 병합한 엑셀 데이터를 성공적으로 불러왔습니다!")
+                            st.rerun()
+                        
+                        # 미리보기
+                        st.markdown("#### 📋 데이터 미리보기")
+                        st.dataframe(체크리스트_편집용(병합_df.head(미리보기_행수)))
+                        st.caption(f"{len(uploaded_excels)}개 파일, 전체 {len(병합_df):,}행 (출처파일 컬럼으로 구분)")
+                    else:
+                        st.error("⚠️ 읽을 수 있는 파일이 없습니다.")
+                        
+                except Exception as e:
+                    st.error(f"❌ 파일 읽기 오류: {str(e)}")
+        
+        if uploaded_excel is not None:
+            try:
+                # 같은 파일은 rerun마다 다시 읽지 않음
+                업로드_키 = f"{uploaded_excel.name}_{uploaded_excel.size}_{getattr(uploaded_excel, 'file_id', '')}"
+                가져오기_결과 = st.session_state.get("_체크리스트_업로드")
+                
+                if 가져오기_결과 is None or 가져오기_결과[0] != 업로드_키:
+                    # 엑셀 파일을 청크 단위로 읽으면서 검증
+                    진행바 = st.progress(0.0, text="엑셀 파일 읽는 중...")
+                    미리보기_영역 = st.empty()
+                    
+                    def 진행_표시(처리, 전체, 미리보기):
+                        if 전체:
+                            진행바.progress(min(처리 / 전체, 1.0), text=f"{처리:,} / {전체:,}행 검증 중...")
+                        else:
+                            진행바.progress(0.0, text=f"{처리:,}행 검증 중...")
+                        미리보기_영역.dataframe(체크리스트_편집용(미리보기))
+                    
+                    결과 = 체크리스트_가져오기(uploaded_excel, uploaded_excel.name, on_progress=진행_표시)
+                    진행바.empty()
+                    미리보기_영역.empty()
+                    가져오기_결과 = (업로드_키, 결과)
+                    st.session_state["_체크리스트_업로드"] = 가져오기_결과
+                
+                결과 = 가져오기_결과[1]
+                st.success(f"✅ 총 {결과['행수']:,}행을 읽었습니다.")
+                
+                # 값 검증 결과 (O(해당), △(잠재위험), X(미해당) 외의 값은 X(미해당)으로 변경됨)
+                if 결과["오류_행수"]:
+                    오류_행_예시 = ", ".join(str(행) for 행 in 결과["오류_행_예시"])
+                    st.warning(
+                        f"⚠️ {결과['오류_행수']:,}개 행에서 허용되지 않은 값 {결과['오류_칸수']:,}개를 "
+                        f"X(미해당)으로 변경했습니다. (행: {오류_행_예시}"
+                        f"{' 외' if 결과['오류_행수'] > len(결과['오류_행_예시']) else ''})"
+                    )
+                
+                if st.button("✅ 데이터 적용하기"):
+                    st.session_state["checklist_df"] = 결과["df"]
+                    st.success("✅ 엑셀 데이터를 성공적으로 불러왔습니다!")
+                    st.rerun()
+                
+                # 미리보기
+                st.markdown("#### 📋 데이터 미리보기")
+                st.dataframe(체크리스트_편집용(결과["미리보기"]))
+                if 결과["행수"] > len(결과["미리보기"]):
+                    st.caption(f"전체 {결과['행수']:,}행 중 앞 {len(결과['미리보기'])}행만 표시합니다.")
                     
             except Exception as e:
                 st.error(f"❌ 파일 읽기 오류: {str(e)}")
     
     # 샘플 엑셀 파일 다운로드
     with st.expander("📥 샘플 엑셀 파일 다운로드"):
-        # 샘플 데이터 생성
-        sample_data = pd.DataFrame({
-            "작업명": ["조립작업", "조립작업", "포장작업", "포장작업", "운반작업"],
-            "단위작업명": ["부품조립", "나사체결", "제품포장", "박스적재", "대차운반"],
-            "1호": ["O(해당)", "X(미해당)", "X(미해당)", "O(해당)", "X(미해당)"],
-            "2호": ["X(미해당)", "O(해당)", "X(미해당)", "X(미해당)", "O(해당)"],
-            "3호": ["△(잠재위험)", "X(미해당)", "O(해당)", "X(미해당)", "X(미해당)"],
-            "4호": ["X(미해당)", "X(미해당)", "X(미해당)", "△(잠재위험)", "X(미해당)"],
-            "5호": ["X(미해당)", "△(잠재위험)", "X(미해당)", "X(미해당)", "O(해당)"],
-            "6호": ["X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)"],
-            "7호": ["X(미해당)", "X(미해당)", "△(잠재위험)", "X(미해당)", "X(미해당)"],
-            "8호": ["X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)"],
-            "9호": ["X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)"],
-            "10호": ["X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)"],
-            "11호": ["O(해당)", "X(미해당)", "X(미해당)", "O(해당)", "△(잠재위험)"]
-        })
-        
-        # 엑셀 파일로 변환
-        sample_output = BytesIO()
-        with pd.ExcelWriter(sample_output, engine='openpyxl') as writer:
-            sample_data.to_excel(writer, sheet_name='체크리스트', index=False)
-        
-        sample_output.seek(0)
-        
+        # 샘플/양식 파일은 프로세스당 한 번만 만들어 둔 것을 사용
         st.download_button(
             label="📥 샘플 엑셀 다운로드",
-            data=sample_output,
-            file_name="체크리스트_샘플.xlsx",
+            data=템플릿_파일("체크리스트_샘플"),
+            file_name=템플릿["체크리스트_샘플"][1],
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
         
+        st.markdown("##### 빈 입력 양식:")
+        양식_이름 = [이름 for 이름 in 템플릿 if 이름 != "체크리스트_샘플"]
+        for col, 이름 in zip(st.columns(len(양식_이름)), 양식_이름):
+            표시_이름, 파일명, _ = 템플릿[이름]
+            with col:
+                st.download_button(
+                    label=f"📄 {표시_이름}",
+                    data=템플릿_파일(이름),
+                    file_name=파일명,
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key=f"양식_다운로드_{이름}"
+                )
+        
         st.markdown("##### 샘플 데이터 구조:")
-        st.dataframe(sample_data)
+        st.dataframe(샘플_체크리스트())
     
     st.markdown("---")
     
     # 기존 데이터 편집기
-    columns = [
-        "작업명", "단위작업명"
-    ] + [f"{i}호" for i in range(1, 12)]
-    
     # 세션 상태에 저장된 데이터가 있으면 사용, 없으면 빈 데이터
     if not st.session_state["checklist_df"].empty:
-        data = st.session_state["checklist_df"]
+        data = 체크리스트_편집용(st.session_state["checklist_df"])
     else:
-        data = pd.DataFrame(
-            columns=columns,
-            data=[["", ""] + ["X(미해당)"]*11 for _ in range(5)]
-        )
+        data = 빈_체크리스트()
 
-    ho_options = [
-        "O(해당)",
-        "△(잠재위험)",
-        "X(미해당)"
-    ]
     column_config = {
         f"{i}호": st.column_config.SelectboxColumn(
-            f"{i}호", options=ho_options, required=True
+            f"{i}호", options=호_옵션, required=True
         ) for i in range(1, 12)
     }
     column_config["작업명"] = st.column_config.TextColumn("작업명")
@@ -236,84 +446,93 @@ with tabs[1]:
         hide_index=True,
         column_config=column_config
     )
-    st.session_state["checklist_df"] = edited_df
+    st.session_state["checklist_df"] = 체크리스트_압축(edited_df)
 
 # 3. 유해요인조사표 탭
-with tabs[2]:
+if 선택_화면 == 화면_목록[2]:
     st.title("유해요인조사표")
     
     # 세션 상태 초기화
     if "유해요인조사_목록" not in st.session_state:
         st.session_state["유해요인조사_목록"] = []
-    
-    # 유해요인조사 추가 버튼
-    col1, col2 = st.columns([6, 1])
-    with col2:
-        if st.button("➕ 조사표 추가", use_container_width=True):
-            st.session_state["유해요인조사_목록"].append(f"유해요인조사_{len(st.session_state['유해요인조사_목록'])+1}")
-            st.rerun()
-    
-    if not st.session_state["유해요인조사_목록"]:
-        st.info("📋 '조사표 추가' 버튼을 클릭하여 유해요인조사표를 작성하세요.")
-    else:
-        # 각 유해요인조사표 표시
-        for idx, 조사표명 in enumerate(st.session_state["유해요인조사_목록"]):
-            with st.expander(f"📌 {조사표명}", expanded=True):
-                # 삭제 버튼
-                col1, col2 = st.columns([10, 1])
-                with col2:
-                    if st.button("❌", key=f"삭제_{조사표명}"):
-                        st.session_state["유해요인조사_목록"].remove(조사표명)
-                        st.rerun()
-                
-                st.markdown("#### 가. 조사개요")
-                col1, col2 = st.columns(2)
-                with col1:
-                    조사일시 = st.text_input("조사일시", key=f"조사일시_{조사표명}")
-                    부서명 = st.text_input("부서명", key=f"부서명_{조사표명}")
-                with col2:
-                    조사자 = st.text_input("조사자", key=f"조사자_{조사표명}")
-                    작업공정명 = st.text_input("작업공정명", key=f"작업공정명_{조사표명}")
-                작업명 = st.text_input("작업명", key=f"작업명_{조사표명}")
 
-                st.markdown("#### 나. 작업장 상황조사")
+    def 상황조사행(항목명, 조사표명):
+        cols = st.columns([2, 5, 3])
+        with cols[0]:
+            st.markdown(f"<div style='text-align:center; font-weight:bold; padding-top:0.7em;'>{항목명}</div>", unsafe_allow_html=True)
+        with cols[1]:
+            상태 = st.radio(
+                label="",
+                options=["변화없음", "감소", "증가", "기타"],
+                key=f"{항목명}_상태_{조사표명}",
+                horizontal=True,
+                label_visibility="collapsed"
+            )
+        with cols[2]:
+            if 상태 == "감소":
+                st.text_input("감소 - 언제부터", key=f"{항목명}_감소_시작_{조사표명}", placeholder="언제부터", label_visibility="collapsed")
+            elif 상태 == "증가":
+                st.text_input("증가 - 언제부터", key=f"{항목명}_증가_시작_{조사표명}", placeholder="언제부터", label_visibility="collapsed")
+            elif 상태 == "기타":
+                st.text_input("기타 - 내용", key=f"{항목명}_기타_내용_{조사표명}", placeholder="내용", label_visibility="collapsed")
+            else:
+                st.markdown("&nbsp;", unsafe_allow_html=True)
+
+    # 조사표 하나만 다시 그리는 fragment - 입력은 이 조사표 안에서만 rerun
+    @st.fragment
+    def 유해요인조사_카드(조사표명):
+        if 조사표명 not in st.session_state["유해요인조사_목록"]:
+            자동저장()
+            return
+        with st.expander(f"📌 {조사표명}", expanded=True):
+            # 삭제 버튼
+            col1, col2 = st.columns([10, 1])
+            with col2:
+                # 콜백에서 목록에서 빼면 이어지는 fragment rerun에서 이 조사표는 그려지지 않음
+                st.button("❌", key=f"삭제_{조사표명}", on_click=목록_삭제, args=("유해요인조사_목록", 조사표명))
+            
+            st.markdown("#### 가. 조사개요")
+            col1, col2 = st.columns(2)
+            with col1:
+                조사일시 = st.text_input("조사일시", key=f"조사일시_{조사표명}")
+                부서명 = st.text_input("부서명", key=f"부서명_{조사표명}")
+            with col2:
+                조사자 = st.text_input("조사자", key=f"조사자_{조사표명}")
+                작업공정명 = st.text_input("작업공정명", key=f"작업공정명_{조사표명}")
+            작업명 = st.text_input("작업명", key=f"작업명_{조사표명}")
 
-                def 상황조사행(항목명, 조사표명):
-                    cols = st.columns([2, 5, 3])
-                    with cols[0]:
-                        st.markdown(f"<div style='text-align:center; font-weight:bold; padding-top:0.7em;'>{항목명}</div>", unsafe_allow_html=True)
-                    with cols[1]:
-                        상태 = st.radio(
-                            label="",
-                            options=["변화없음", "감소", "증가", "기타"],
-                            key=f"{항목명}_상태_{조사표명}",
-                            horizontal=True,
-                            label_visibility="collapsed"
-                        )
-                    with cols[2]:
-                        if 상태 == "감소":
-                            st.text_input("감소 - 언제부터", key=f"{항목명}_감소_시작_{조사표명}", placeholder="언제부터", label_visibility="collapsed")
-                        elif 상태 == "증가":
-                            st.text_input("증가 - 언제부터", key=f"{항목명}_증가_시작_{조사표명}", placeholder="언제부터", label_visibility="collapsed")
-                        elif 상태 == "기타":
-                            st.text_input("기타 - 내용", key=f"{항목명}_기타_내용_{조사표명}", placeholder="내용", label_visibility="collapsed")
-                        else:
-                            st.markdown("&nbsp;", unsafe_allow_html=True)
+            st.markdown("#### 나. 작업장 상황조사")
 
-                for 항목 in ["작업설비", "작업량", "작업속도", "업무변화"]:
-                    상황조사행(항목, 조사표명)
-                    st.markdown("<hr style='margin:0.5em 0;'>", unsafe_allow_html=True)
-                
-                st.markdown("---")
+            for 항목 in ["작업설비", "작업량", "작업속도", "업무변화"]:
+                상황조사행(항목, 조사표명)
+                st.markdown("<hr style='margin:0.5em 0;'>", unsafe_allow_html=True)
+            
+            st.markdown("---")
+        자동저장()
+
+    # 추가 버튼과 조사표 목록 - 추가해도 전체 앱이 아니라 목록만 다시 그림
+    @st.fragment
+    def 유해요인조사_목록_표시():
+        col1, col2 = st.columns([6, 1])
+        with col2:
+            st.button("➕ 조사표 추가", use_container_width=True, on_click=목록_추가, args=("유해요인조사_목록", "유해요인조사"))
+        
+        if not st.session_state["유해요인조사_목록"]:
+            st.info("📋 '조사표 추가' 버튼을 클릭하여 유해요인조사표를 작성하세요.")
+        else:
+            for 조사표명 in list(st.session_state["유해요인조사_목록"]):
+                유해요인조사_카드(조사표명)
+        자동저장()
+
+    유해요인조사_목록_표시()
 
 # 4. 작업조건조사 탭
-with tabs[3]:
+if 선택_화면 == 화면_목록[3]:
     st.title("작업조건조사")
     
     # 체크리스트에서 작업명 목록 가져오기
-    작업명_목록 = []
-    if not st.session_state["checklist_df"].empty:
-        작업명_목록 = st.session_state["checklist_df"]["작업명"].dropna().unique().tolist()
+    작업명_인덱스_정보 = 작업명_인덱스(st.session_state["checklist_df"])
+    작업명_목록 = 작업명_인덱스_정보["작업명_목록"]
     
     if not 작업명_목록:
         st.warning("⚠️ 먼저 '근골격계 부담작업 체크리스트' 탭에서 작업명을 입력해주세요.")
@@ -333,7 +552,8 @@ with tabs[3]:
             st.subheader(f"1단계: 유해요인 기본조사 - [{selected_작업명}]")
             col1, col2 = st.columns(2)
             with col1:
-                작업공정 = st.text_input("작업공정", value=selected_작업명, key=f"1단계_작업공정_{selected_작업명}")
+                st.session_state.setdefault(f"1단계_작업공정_{selected_작업명}", selected_작업명)
+                작업공정 = st.text_input("작업공정", key=f"1단계_작업공정_{selected_작업명}")
             with col2:
                 작업내용 = st.text_input("작업내용", key=f"1단계_작업내용_{selected_작업명}")
             
@@ -343,28 +563,16 @@ with tabs[3]:
             st.subheader(f"2단계: 작업별 작업부하 및 작업빈도 - [{selected_작업명}]")
             
             # 선택된 작업명에 해당하는 체크리스트 데이터 가져오기
-            checklist_data = []
-            if not st.session_state["checklist_df"].empty:
-                작업_체크리스트 = st.session_state["checklist_df"][
-                    st.session_state["checklist_df"]["작업명"] == selected_작업명
-                ]
-                
-                for idx, row in 작업_체크리스트.iterrows():
-                    if row["단위작업명"]:
-                        부담작업호 = []
-                        for i in range(1, 12):
-                            if row[f"{i}호"] == "O(해당)":
-                                부담작업호.append(f"{i}호")
-                            elif row[f"{i}호"] == "△(잠재위험)":
-                                부담작업호.append(f"{i}호(잠재)")
-                        
-                        checklist_data.append({
-                            "단위작업명": row["단위작업명"],
-                            "부담작업(호)": ", ".join(부담작업호) if 부담작업호 else "미해당",
-                            "작업부하(A)": "",
-                            "작업빈도(B)": "",
-                            "총점": 0
-                        })
+            checklist_data = [
+                {
+                    "단위작업명": 단위작업["단위작업명"],
+                    "부담작업(호)": 단위작업["부담작업(호)"],
+                    "작업부하(A)": "",
+                    "작업빈도(B)": "",
+                    "총점": 0
+                }
+                for 단위작업 in 작업명_인덱스_정보["단위작업"].get(selected_작업명, [])
+            ]
             
             # 데이터프레임 생성
             if checklist_data:
@@ -378,23 +586,6 @@ with tabs[3]:
                     "총점": [0 for _ in range(3)],
                 })
 
-            부하옵션 = [
-                "",
-                "매우쉬움(1)", 
-                "쉬움(2)", 
-                "약간 힘듦(3)", 
-                "힘듦(4)", 
-                "매우 힘듦(5)"
-            ]
-            빈도옵션 = [
-                "",
-                "3개월마다(1)", 
-                "가끔(2)", 
-                "자주(3)", 
-                "계속(4)", 
-                "초과근무(5)"
-            ]
-
             column_config = {
                 "작업부하(A)": st.column_config.SelectboxColumn("작업부하(A)", options=부하옵션, required=False),
                 "작업빈도(B)": st.column_config.SelectboxColumn("작업빈도(B)", options=빈도옵션, required=False),
@@ -403,19 +594,8 @@ with tabs[3]:
                 "총점": st.column_config.TextColumn("총점(자동계산)", disabled=True),
             }
 
-            # 작업부하와 작업빈도에서 숫자 추출하는 함수
-            def extract_number(value):
-                if value and "(" in value and ")" in value:
-                    return int(value.split("(")[1].split(")")[0])
-                return 0
-
-            # 총점 계산 함수
-            def calculate_total_score(row):
-                부하값 = extract_number(row["작업부하(A)"])
-                빈도값 = extract_number(row["작업빈도(B)"])
-                return 부하값 * 빈도값
-
-            # 데이터 편집
+            # 데이터 편집 (체크리스트의 단위작업이 그대로면 이전에 입력한 값을 이어서 편집)
+            data = 편집_데이터(f"작업조건_data_{selected_작업명}", data, "단위작업명")
             edited_df = st.data_editor(
                 data,
                 num_rows="dynamic",
@@ -426,13 +606,11 @@ with tabs[3]:
             )
             
             # 편집된 데이터를 세션 상태에 저장
-            st.session_state[f"작업조건_data_{selected_작업명}"] = edited_df
+            편집_저장(f"작업조건_data_{selected_작업명}", edited_df)
             
             # 총점 자동 계산 후 다시 표시
             if not edited_df.empty:
-                display_df = edited_df.copy()
-                for idx in range(len(display_df)):
-                    display_df.at[idx, "총점"] = calculate_total_score(display_df.iloc[idx])
+                display_df = 총점_적용(edited_df)
                 
                 st.markdown("##### 계산 결과")
                 st.dataframe(
@@ -457,7 +635,8 @@ with tabs[3]:
             # 작업명과 근로자수 입력
             col1, col2 = st.columns(2)
             with col1:
-                평가_작업명 = st.text_input("작업명", value=selected_작업명, key=f"3단계_작업명_{selected_작업명}")
+                st.session_state.setdefault(f"3단계_작업명_{selected_작업명}", selected_작업명)
+                평가_작업명 = st.text_input("작업명", key=f"3단계_작업명_{selected_작업명}")
             with col2:
                 평가_근로자수 = st.text_input("근로자수", key=f"3단계_근로자수_{selected_작업명}")
             
@@ -465,7 +644,8 @@ with tabs[3]:
             st.markdown("#### 작업 사진 및 설명")
             
             # 사진 개수 선택
-            num_photos = st.number_input("사진 개수", min_value=1, max_value=10, value=3, key=f"사진개수_{selected_작업명}")
+            st.session_state.setdefault(f"사진개수_{selected_작업명}", 3)
+            num_photos = st.number_input("사진 개수", min_value=1, max_value=10, key=f"사진개수_{selected_작업명}")
             
             # 각 사진별로 업로드와 설명 입력
             for i in range(num_photos):
@@ -473,13 +653,20 @@ with tabs[3]:
                 col1, col2 = st.columns([1, 2])
                 
                 with col1:
+                    업로드_키 = f"사진_{i+1}_업로드_{selected_작업명}"
+                    id_키 = f"사진_{i+1}_id_{selected_작업명}"
                     uploaded_file = st.file_uploader(
                         f"사진 {i+1} 업로드",
                         type=['png', 'jpg', 'jpeg'],
-                        key=f"사진_{i+1}_업로드_{selected_작업명}"
+                        key=업로드_키,
+                        on_change=사진_업로드_변경,
+                        args=(업로드_키, id_키)
                     )
-                    if uploaded_file:
-                        st.image(uploaded_file, caption=f"사진 {i+1}", use_column_width=True)
+                    if st.session_state.get(id_키):
+                        사진_표시(st.session_state[id_키], f"사진 {i+1}")
+                        if uploaded_file is None and st.button("사진 빼기", key=f"사진_{i+1}_빼기_{selected_작업명}"):
+                            st.session_state[id_키] = ""
+                            st.rerun()
                 
                 with col2:
                     photo_description = st.text_area(
@@ -536,7 +723,8 @@ with tabs[3]:
                 "비고": st.column_config.TextColumn("비고", width=150)
             }
             
-            # 데이터 편집기
+            # 데이터 편집기 (부담작업 구성이 그대로면 이전에 입력한 값을 이어서 편집)
+            원인분석_df = 편집_데이터(f"원인분석_data_{selected_작업명}", 원인분석_df, "부담작업")
             원인분석_edited_df = st.data_editor(
                 원인분석_df,
                 use_container_width=True,
@@ -547,103 +735,257 @@ with tabs[3]:
             )
             
             # 원인분석 데이터도 세션 상태에 저장
-            st.session_state[f"원인분석_data_{selected_작업명}"] = 원인분석_edited_df
+            편집_저장(f"원인분석_data_{selected_작업명}", 원인분석_edited_df)
 
 # 5. 정밀조사 탭
-with tabs[4]:
+if 선택_화면 == 화면_목록[4]:
     st.title("정밀조사")
     
     # 세션 상태 초기화
     if "정밀조사_목록" not in st.session_state:
         st.session_state["정밀조사_목록"] = []
-    
-    # 정밀조사 추가 버튼
-    col1, col2 = st.columns([6, 1])
-    with col2:
-        if st.button("➕ 정밀조사 추가", use_container_width=True):
-            st.session_state["정밀조사_목록"].append(f"정밀조사_{len(st.session_state['정밀조사_목록'])+1}")
-            st.rerun()
-    
-    if not st.session_state["정밀조사_목록"]:
-        st.info("📋 정밀조사가 필요한 경우 '정밀조사 추가' 버튼을 클릭하세요.")
-    else:
-        # 각 정밀조사 표시
-        for idx, 조사명 in enumerate(st.session_state["정밀조사_목록"]):
-            with st.expander(f"📌 {조사명}", expanded=True):
-                # 삭제 버튼
-                col1, col2 = st.columns([10, 1])
-                with col2:
-                    if st.button("❌", key=f"삭제_{조사명}"):
-                        st.session_state["정밀조사_목록"].remove(조사명)
-                        st.rerun()
-                
-                # 정밀조사표
-                st.subheader("정밀조사표")
+
+    # 정밀조사 하나만 다시 그리는 fragment
+    @st.fragment
+    def 정밀조사_카드(조사명):
+        if 조사명 not in st.session_state["정밀조사_목록"]:
+            자동저장()
+            return
+        with st.expander(f"📌 {조사명}", expanded=True):
+            # 삭제 버튼
+            col1, col2 = st.columns([10, 1])
+            with col2:
+                st.button("❌", key=f"삭제_{조사명}", on_click=목록_삭제, args=("정밀조사_목록", 조사명))
+            
+            # 정밀조사표
+            st.subheader("정밀조사표")
+            col1, col2 = st.columns(2)
+            with col1:
+                정밀_작업공정명 = st.text_input("작업공정명", key=f"정밀_작업공정명_{조사명}")
+            with col2:
+                정밀_작업명 = st.text_input("작업명", key=f"정밀_작업명_{조사명}")
+            
+            # 사진 업로드 영역
+            st.markdown("#### 사진")
+            업로드_키 = f"정밀_사진_{조사명}"
+            id_키 = f"정밀_사진_id_{조사명}"
+            if 업로드_키 not in st.session_state:
+                # 업로더가 새로 만들어졌으면 이전 업로드 기록은 버림 (사진 ID 목록은 유지)
+                st.session_state[f"_{업로드_키}_id"] = []
+            st.file_uploader(
+                "작업 사진 업로드",
+                type=['png', 'jpg', 'jpeg'],
+                accept_multiple_files=True,
+                key=업로드_키,
+                on_change=사진_목록_변경,
+                args=(업로드_키, id_키)
+            )
+            사진_목록 = st.session_state.get(id_키, [])
+            if 사진_목록:
+                cols = st.columns(3)
+                for idx, 사진_id in enumerate(사진_목록):
+                    with cols[idx % 3]:
+                        사진_표시(사진_id, f"사진 {idx+1}")
+                        st.button("사진 빼기", key=f"정밀_사진_빼기_{조사명}_{사진_id}",
+                                  on_click=목록_삭제, args=(id_키, 사진_id))
+            
+            st.markdown("---")
+
+            # OWAS 작업자세 관측 기록 (관측 하나가 한 행) 분석
+            st.markdown("#### OWAS 작업자세 분석")
+            st.caption(
+                "허리/팔/다리/하중 코드 열 또는 4자리 OWAS 코드 열(예: 2131)이 있어야 합니다. "
+                "관측 시간은 지속시간(초) 열, 없으면 시각 열의 관측 간격으로 계산합니다."
+            )
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                관측_기록 = st.file_uploader("관측 기록 파일", type=["csv", "xlsx", "xls"], key=f"정밀_OWAS_파일_{조사명}")
+            with col2:
+                표본_간격 = st.number_input(
+                    "관측 간격(초)", min_value=0.0, value=0.0, step=1.0, key=f"정밀_OWAS_간격_{조사명}",
+                    help="시각/지속시간 열이 없을 때 관측 하나의 시간 (0이면 관측수 비율만 계산)"
+                )
+            if 관측_기록 is not None and st.button("📊 OWAS 분석", key=f"정밀_OWAS_분석_{조사명}"):
+                진행_표시 = st.empty()
+                try:
+                    결과 = OWAS_분석(
+                        관측_기록, 관측_기록.name, 표본_간격 or None,
+                        on_progress=lambda 처리: 진행_표시.caption(f"{처리:,}개 관측 분석 중...")
+                    )
+                    진행_표시.empty()
+                    st.session_state[f"정밀_OWAS_data_{조사명}"] = 결과["요약"]
+                    st.session_state[f"_정밀_OWAS_부위_{조사명}"] = 결과["부위별"]
+                    # 요약은 아래 원인분석 표에도 한 행으로 넣음
+                    저장_키 = f"정밀_원인분석_data_{조사명}"
+                    st.session_state[저장_키] = 원인분석_반영(st.session_state.get(저장_키), 결과["원인분석"])
+                    st.session_state.pop(f"정밀_원인분석_{조사명}", None)
+                    제외 = f", 코드 오류 {결과['제외']:,}개 제외" if 결과["제외"] else ""
+                    st.success(f"✅ 관측 {결과['관측수']:,}개를 분석했습니다{제외}.")
+                except Exception as e:
+                    진행_표시.empty()
+                    st.error(f"❌ 관측 기록 읽기 오류: {str(e)}")
+
+            owas_df = st.session_state.get(f"정밀_OWAS_data_{조사명}")
+            if isinstance(owas_df, pd.DataFrame) and not owas_df.empty:
                 col1, col2 = st.columns(2)
                 with col1:
-                    정밀_작업공정명 = st.text_input("작업공정명", key=f"정밀_작업공정명_{조사명}")
-                with col2:
-                    정밀_작업명 = st.text_input("작업명", key=f"정밀_작업명_{조사명}")
-                
-                # 사진 업로드 영역
-                st.markdown("#### 사진")
-                정밀_사진 = st.file_uploader(
-                    "작업 사진 업로드",
-                    type=['png', 'jpg', 'jpeg'],
-                    accept_multiple_files=True,
-                    key=f"정밀_사진_{조사명}"
-                )
-                if 정밀_사진:
-                    cols = st.columns(3)
-                    for idx, photo in enumerate(정밀_사진):
-                        with cols[idx % 3]:
-                            st.image(photo, caption=f"사진 {idx+1}", use_column_width=True)
-                
-                st.markdown("---")
-                
-                # 작업별로 관련된 유해요인에 대한 원인분석
-                st.markdown("#### ■ 작업별로 관련된 유해요인에 대한 원인분석")
-                
-                정밀_원인분석_data = []
-                for i in range(7):
-                    정밀_원인분석_data.append({
-                        "작업분석 및 평가도구": "",
-                        "분석결과": "",
-                        "만점": ""
-                    })
-                
-                정밀_원인분석_df = pd.DataFrame(정밀_원인분석_data)
-                
-                정밀_원인분석_config = {
-                    "작업분석 및 평가도구": st.column_config.TextColumn("작업분석 및 평가도구", width=350),
-                    "분석결과": st.column_config.TextColumn("분석결과", width=250),
-                    "만점": st.column_config.TextColumn("만점", width=150)
-                }
-                
-                정밀_원인분석_edited = st.data_editor(
-                    정밀_원인분석_df,
-                    use_container_width=True,
-                    hide_index=True,
-                    column_config=정밀_원인분석_config,
-                    num_rows="dynamic",
-                    key=f"정밀_원인분석_{조사명}"
-                )
-                
-                # 데이터 세션 상태에 저장
-                st.session_state[f"정밀_원인분석_data_{조사명}"] = 정밀_원인분석_edited
+                    st.dataframe(owas_df, use_container_width=True, hide_index=True)
+                부위별 = st.session_state.get(f"_정밀_OWAS_부위_{조사명}")
+                if 부위별 is not None:
+                    with col2:
+                        st.dataframe(부위별, use_container_width=True, hide_index=True, height=280)
+
+            st.markdown("---")
+            
+            # 작업별로 관련된 유해요인에 대한 원인분석
+            st.markdown("#### ■ 작업별로 관련된 유해요인에 대한 원인분석")
+            
+            정밀_원인분석_data = []
+            for i in range(7):
+                정밀_원인분석_data.append({
+                    "작업분석 및 평가도구": "",
+                    "분석결과": "",
+                    "만점": ""
+                })
+            
+            정밀_원인분석_df = pd.DataFrame(정밀_원인분석_data)
+            
+            정밀_원인분석_config = {
+                "작업분석 및 평가도구": st.column_config.TextColumn("작업분석 및 평가도구", width=350),
+                "분석결과": st.column_config.TextColumn("분석결과", width=250),
+                "만점": st.column_config.TextColumn("만점", width=150)
+            }
+            
+            정밀_원인분석_df = 편집_데이터(f"정밀_원인분석_data_{조사명}", 정밀_원인분석_df)
+            정밀_원인분석_edited = st.data_editor(
+                정밀_원인분석_df,
+                use_container_width=True,
+                hide_index=True,
+                column_config=정밀_원인분석_config,
+                num_rows="dynamic",
+                key=f"정밀_원인분석_{조사명}"
+            )
+            
+            # 데이터 세션 상태에 저장
+            편집_저장(f"정밀_원인분석_data_{조사명}", 정밀_원인분석_edited)
+        자동저장()
+
+    # 추가 버튼과 정밀조사 목록
+    @st.fragment
+    def 정밀조사_목록_표시():
+        col1, col2 = st.columns([6, 1])
+        with col2:
+            st.button("➕ 정밀조사 추가", use_container_width=True, on_click=목록_추가, args=("정밀조사_목록", "정밀조사"))
+        
+        if not st.session_state["정밀조사_목록"]:
+            st.info("📋 정밀조사가 필요한 경우 '정밀조사 추가' 버튼을 클릭하세요.")
+        else:
+            for 조사명 in list(st.session_state["정밀조사_목록"]):
+                정밀조사_카드(조사명)
+        자동저장()
+
+    정밀조사_목록_표시()
+
+    # 평가도구 일괄 계산: 여러 정밀조사의 작업을 한 표에 입력하고 한 번에 점수를 구해 원인분석 표에 넣음
+    with st.expander("🧮 RULA/REBA/NIOSH 일괄 계산"):
+        조사_목록 = st.session_state["정밀조사_목록"]
+        if not 조사_목록:
+            st.info("정밀조사를 먼저 추가하세요.")
+        else:
+            도구 = st.radio("평가도구", list(평가도구), horizontal=True, key="평가도구_선택")
+            입력, 평가 = 평가도구[도구]
+            st.caption(
+                "한 행이 작업 하나입니다. 각도는 도(°) 단위로, 굴곡은 +, 신전은 -로 입력하세요. "
+                "같은 조사에 같은 평가도구·평가 작업 이름이 있으면 그 행을 새 결과로 바꿉니다. "
+                "평가 작업 이름이 비어 있으면 행 번호로 구분합니다."
+            )
+
+            평가_config = {"조사명": st.column_config.SelectboxColumn("조사명", options=조사_목록, required=True)}
+            for 열, 기본 in 입력:
+                if isinstance(기본, list):
+                    평가_config[열] = st.column_config.SelectboxColumn(열, options=기본, default=기본[0])
+                elif isinstance(기본, bool):
+                    평가_config[열] = st.column_config.CheckboxColumn(열, default=기본)
+                elif isinstance(기본, float):
+                    평가_config[열] = st.column_config.NumberColumn(열, default=기본)
+                else:
+                    평가_config[열] = st.column_config.TextColumn(열)
+
+            평가_입력_df = 빈_입력(입력)
+            평가_입력_df.insert(0, "조사명", 조사_목록[0])
+            평가_입력_df = 편집_데이터(f"평가입력_{도구}", 평가_입력_df)
+            평가_입력_edited = st.data_editor(
+                평가_입력_df,
+                use_container_width=True,
+                hide_index=True,
+                column_config=평가_config,
+                num_rows="dynamic",
+                key=f"평가입력_{도구}_editor"
+            )
+            편집_저장(f"평가입력_{도구}", 평가_입력_edited)
+
+            if st.button("점수 계산 후 원인분석 표에 넣기", key="평가_계산"):
+                대상 = 평가_입력_edited[평가_입력_edited["조사명"].isin(조사_목록)]
+                결과 = 평가(대상)
+                for 조사명, 조사_결과 in 결과.groupby(대상["조사명"], sort=False):
+                    저장_키 = f"정밀_원인분석_data_{조사명}"
+                    st.session_state[저장_키] = 원인분석_반영(st.session_state.get(저장_키), 조사_결과)
+                    st.session_state.pop(f"정밀_원인분석_{조사명}", None)
+                st.session_state["_평가결과"] = (도구, pd.concat([대상[["조사명"]], 결과], axis=1))
+                # 위에 이미 그린 조사 카드에도 결과가 보이도록 다시 실행
+                st.rerun()
+
+            평가_결과 = st.session_state.get("_평가결과")
+            if 평가_결과 is not None and 평가_결과[0] == 도구:
+                st.success(f"✅ {len(평가_결과[1])}개 작업의 {도구} 결과를 원인분석 표에 넣었습니다.")
+                st.dataframe(평가_결과[1], use_container_width=True, hide_index=True)
 
 # 6. 증상조사 분석 탭
-with tabs[5]:
+if 선택_화면 == 화면_목록[5]:
     st.title("근골격계 자기증상 분석")
     
+    # 설문 원자료(근로자 한 명이 한 행)로 1~4번 표를 한 번에 채우기
+    with st.expander("📂 설문 원자료로 표 채우기"):
+        st.caption(
+            "CSV/엑셀 첫 행은 머리글이어야 합니다. 인식하는 열: " + ", ".join(원자료_열)
+            + ", 부위별 통증 기간/빈도/정도 (예: 목_기간, 어깨_빈도, 허리_정도)"
+        )
+        원자료 = st.file_uploader("설문 원자료 파일", type=["csv", "xlsx", "xls"], key="증상조사_원자료")
+        if 원자료 is not None and st.button("📊 집계해서 표 채우기", key="증상조사_집계"):
+            진행_표시 = st.empty()
+            try:
+                결과 = 증상조사_집계(
+                    원자료, 원자료.name,
+                    on_progress=lambda 처리: 진행_표시.caption(f"{처리:,}명 집계 중...")
+                )
+                진행_표시.empty()
+                for 표, 저장_키, 편집기_키 in [
+                    ("기초현황", "기초현황_data_저장", "기초현황_data"),
+                    ("작업기간", "작업기간_data_저장", "작업기간_data"),
+                    ("육체적부담", "육체적부담_data_저장", "육체적부담_data"),
+                ]:
+                    st.session_state[저장_키] = 결과[표]
+                    # 이전 편집 내용이 새 표에 덮어써지지 않도록 편집기 상태를 비움
+                    st.session_state.pop(편집기_키, None)
+                if 결과["통증호소자"] is not None:
+                    # 정상/관리대상자/통증호소자 분류 결과는 작업명 목록과 같이 바꿈
+                    st.session_state["통증호소자_작업명_목록"] = 결과["작업명_목록"] + ["전체"]
+                    st.session_state["통증호소자_data_저장"] = 결과["통증호소자"]
+                    st.session_state.pop("통증호소자_data_editor", None)
+                st.success(f"✅ 응답자 {결과['응답자수']:,}명, 작업 {len(결과['작업명_목록'])}개를 집계했습니다.")
+            except Exception as e:
+                진행_표시.empty()
+                st.error(f"❌ 원자료 읽기 오류: {str(e)}")
+    
     # 1. 기초현황
     st.subheader("1. 기초현황")
-    기초현황_columns = ["작업명", "응답자(명)", "나이", "근속년수", "남자(명)", "여자(명)", "합계"]
+    기초현황_columns = 증상조사_컬럼["기초현황"]
     기초현황_data = pd.DataFrame(
         columns=기초현황_columns,
         data=[["", "", "평균(세)", "평균(년)", "", "", ""] for _ in range(5)]
     )
     
+    기초현황_data = 편집_데이터("기초현황_data_저장", 기초현황_data)
     기초현황_edited = st.data_editor(
         기초현황_data,
         hide_index=True,
@@ -656,12 +998,13 @@ with tabs[5]:
     st.subheader("2. 작업기간")
     st.markdown("##### 현재 작업기간 / 이전 작업기간")
     
-    작업기간_columns = ["작업명", "<1년", "<3년", "<5년", "≥5년", "무응답", "합계", "이전<1년", "이전<3년", "이전<5년", "이전≥5년", "이전무응답", "이전합계"]
+    작업기간_columns = 증상조사_컬럼["작업기간"]
     작업기간_data = pd.DataFrame(
         columns=작업기간_columns,
         data=[[""] * 13 for _ in range(5)]
     )
     
+    작업기간_data = 편집_데이터("작업기간_data_저장", 작업기간_data)
     작업기간_edited = st.data_editor(
         작업기간_data,
         hide_index=True,
@@ -672,12 +1015,13 @@ with tabs[5]:
     
     # 3. 육체적 부담정도
     st.subheader("3. 육체적 부담정도")
-    육체적부담_columns = ["작업명", "전혀 힘들지 않음", "견딜만 함", "약간 힘듦", "힘듦", "매우 힘듦", "합계"]
+    육체적부담_columns = 증상조사_컬럼["육체적부담"]
     육체적부담_data = pd.DataFrame(
         columns=육체적부담_columns,
         data=[["", "", "", "", "", "", ""] for _ in range(5)]
     )
     
+    육체적부담_data = 편집_데이터("육체적부담_data_저장", 육체적부담_data)
     육체적부담_edited = st.data_editor(
         육체적부담_data,
         hide_index=True,
@@ -687,9 +1031,9 @@ with tabs[5]:
     )
     
     # 세션 상태에 저장
-    st.session_state["기초현황_data_저장"] = 기초현황_edited
-    st.session_state["작업기간_data_저장"] = 작업기간_edited
-    st.session_state["육체적부담_data_저장"] = 육체적부담_edited
+    편집_저장("기초현황_data_저장", 기초현황_edited)
+    편집_저장("작업기간_data_저장", 작업기간_edited)
+    편집_저장("육체적부담_data_저장", 육체적부담_edited)
     
     # 4. 근골격계 통증 호소자 분포
     st.subheader("4. 근골격계 통증 호소자 분포")
@@ -711,7 +1055,7 @@ with tabs[5]:
     # 통증 호소자 표 생성
     if st.session_state["통증호소자_작업명_목록"]:
         # 컬럼 정의
-        통증호소자_columns = ["작업명", "구분", "목", "어깨", "팔/팔꿈치", "손/손목/손가락", "허리", "다리/발", "전체"]
+        통증호소자_columns = 증상조사_컬럼["통증호소자"]
         
         # 데이터 생성
         통증호소자_data = []
@@ -737,6 +1081,8 @@ with tabs[5]:
             "전체": st.column_config.TextColumn("전체", width=80)
         }
         
+        # 작업명 목록이 그대로면 이전에 입력한 값을 이어서 편집
+        통증호소자_df = 편집_데이터("통증호소자_data_저장", 통증호소자_df, "작업명")
         통증호소자_edited = st.data_editor(
             통증호소자_df,
             hide_index=True,
@@ -747,7 +1093,7 @@ with tabs[5]:
         )
         
         # 세션 상태에 저장
-        st.session_state["통증호소자_data_저장"] = 통증호소자_edited
+        편집_저장("통증호소자_data_저장", 통증호소자_edited)
         
         # 작업명 삭제 기능
         if st.session_state["통증호소자_작업명_목록"]:
@@ -760,12 +1106,12 @@ with tabs[5]:
         st.info("작업명을 입력하고 '작업 추가' 버튼을 클릭하세요.")
         
         # 빈 데이터프레임 표시
-        통증호소자_columns = ["작업명", "구분", "목", "어깨", "팔/팔꿈치", "손/손목/손가락", "허리", "다리/발", "전체"]
+        통증호소자_columns = 증상조사_컬럼["통증호소자"]
         빈_df = pd.DataFrame(columns=통증호소자_columns)
         st.dataframe(빈_df, use_container_width=True)
 
 # 7. 작업환경개선계획서 탭
-with tabs[6]:
+if 선택_화면 == 화면_목록[6]:
     st.title("작업환경개선계획서")
     
     # 컬럼 정의
@@ -801,6 +1147,7 @@ with tabs[6]:
     }
     
     # 데이터 편집기
+    개선계획_data = 편집_데이터("개선계획_data_저장", 개선계획_data)
     개선계획_edited = st.data_editor(
         개선계획_data,
         hide_index=True,
@@ -811,7 +1158,7 @@ with tabs[6]:
     )
     
     # 세션 상태에 저장
-    st.session_state["개선계획_data_저장"] = 개선계획_edited
+    편집_저장("개선계획_data_저장", 개선계획_edited)
     
     # 도움말
     with st.expander("ℹ️ 작성 도움말"):
@@ -831,497 +1178,126 @@ with tabs[6]:
     st.markdown("---")
     st.subheader("📥 전체 보고서 다운로드")
     
+    # 보고서는 백그라운드에서 생성하고 작업 id로 진행 상황을 조회
+    if "_보고서_작업" not in st.session_state:
+        st.session_state["_보고서_작업"] = []
+    
     col1, col2 = st.columns(2)
     
     with col1:
+        # 엑셀 생성 엔진 (기본: 바뀌지 않은 시트는 캐시된 결과를 재사용)
+        엑셀_엔진_선택 = st.selectbox(
+            "엑셀 생성 방식",
+            list(엑셀_엔진),
+            format_func=lambda engine: 엑셀_엔진[engine][0],
+            key="엑셀_엔진_선택"
+        )
+        
         # 엑셀 다운로드 버튼
         if st.button("📊 엑셀 파일로 다운로드", use_container_width=True):
-            try:
-                output = BytesIO()
-                
-                # 작업명 목록 다시 가져오기
-                작업명_목록_다운로드 = []
-                if "checklist_df" in st.session_state and not st.session_state["checklist_df"].empty:
-                    작업명_목록_다운로드 = st.session_state["checklist_df"]["작업명"].dropna().unique().tolist()
-                
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    # 사업장 개요 정보
-                    overview_data = {
-                        "항목": ["사업장명", "소재지", "업종", "예비조사일", "본조사일", "수행기관", "성명"],
-                        "내용": [
-                            st.session_state.get("사업장명", ""),
-                            st.session_state.get("소재지", ""),
-                            st.session_state.get("업종", ""),
-                            str(st.session_state.get("예비조사", "")),
-                            str(st.session_state.get("본조사", "")),
-                            st.session_state.get("수행기관", ""),
-                            st.session_state.get("성명", "")
-                        ]
-                    }
-                    overview_df = pd.DataFrame(overview_data)
-                    overview_df.to_excel(writer, sheet_name='사업장개요', index=False)
-                    
-                    # 체크리스트
-                    if "checklist_df" in st.session_state and not st.session_state["checklist_df"].empty:
-                        st.session_state["checklist_df"].to_excel(writer, sheet_name='체크리스트', index=False)
-                    
-                    # 유해요인조사표 데이터 저장
-                    if "유해요인조사_목록" in st.session_state and st.session_state["유해요인조사_목록"]:
-                        for 조사표명 in st.session_state["유해요인조사_목록"]:
-                            조사표_data = []
-                            
-                            # 조사개요
-                            조사표_data.append(["조사개요"])
-                            조사표_data.append(["조사일시", st.session_state.get(f"조사일시_{조사표명}", "")])
-                            조사표_data.append(["부서명", st.session_state.get(f"부서명_{조사표명}", "")])
-                            조사표_data.append(["조사자", st.session_state.get(f"조사자_{조사표명}", "")])
-                            조사표_data.append(["작업공정명", st.session_state.get(f"작업공정명_{조사표명}", "")])
-                            조사표_data.append(["작업명", st.session_state.get(f"작업명_{조사표명}", "")])
-                            조사표_data.append([])  # 빈 행
-                            
-                            # 작업장 상황조사
-                            조사표_data.append(["작업장 상황조사"])
-                            조사표_data.append(["항목", "상태", "세부사항"])
-                            
-                            for 항목 in ["작업설비", "작업량", "작업속도", "업무변화"]:
-                                상태 = st.session_state.get(f"{항목}_상태_{조사표명}", "변화없음")
-                                세부사항 = ""
-                                if 상태 == "감소":
-                                    세부사항 = st.session_state.get(f"{항목}_감소_시작_{조사표명}", "")
-                                elif 상태 == "증가":
-                                    세부사항 = st.session_state.get(f"{항목}_증가_시작_{조사표명}", "")
-                                elif 상태 == "기타":
-                                    세부사항 = st.session_state.get(f"{항목}_기타_내용_{조사표명}", "")
-                                
-                                조사표_data.append([항목, 상태, 세부사항])
-                            
-                            if 조사표_data:
-                                조사표_df = pd.DataFrame(조사표_data)
-                                sheet_name = 조사표명.replace('/', '_').replace('\\', '_')[:31]
-                                조사표_df.to_excel(writer, sheet_name=sheet_name, index=False, header=False)
-                    
-                    # 각 작업별 데이터 저장
-                    for 작업명 in 작업명_목록_다운로드:
-                        # 작업조건조사 데이터 저장
-                        data_key = f"작업조건_data_{작업명}"
-                        if data_key in st.session_state:
-                            작업_df = st.session_state[data_key]
-                            if isinstance(작업_df, pd.DataFrame) and not 작업_df.empty:
-                                export_df = 작업_df.copy()
-                                
-                                # 총점 계산
-                                for idx in range(len(export_df)):
-                                    export_df.at[idx, "총점"] = calculate_total_score(export_df.iloc[idx])
-                                
-                                # 시트 이름 정리 (특수문자 제거)
-                                sheet_name = f'작업조건_{작업명}'.replace('/', '_').replace('\\', '_')[:31]
-                                export_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                        # 3단계 유해요인평가 데이터 저장
-                        평가_작업명 = st.session_state.get(f"3단계_작업명_{작업명}", 작업명)
-                        평가_근로자수 = st.session_state.get(f"3단계_근로자수_{작업명}", "")
-                        
-                        평가_data = {
-                            "작업명": [평가_작업명],
-                            "근로자수": [평가_근로자수]
-                        }
-                        
-                        # 사진 설명 추가
-                        사진개수 = st.session_state.get(f"사진개수_{작업명}", 3)
-                        for i in range(사진개수):
-                            설명 = st.session_state.get(f"사진_{i+1}_설명_{작업명}", "")
-                            평가_data[f"사진{i+1}_설명"] = [설명]
-                        
-                        if 평가_작업명 or 평가_근로자수:
-                            평가_df = pd.DataFrame(평가_data)
-                            sheet_name = f'유해요인평가_{작업명}'.replace('/', '_').replace('\\', '_')[:31]
-                            평가_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                        # 원인분석 데이터 저장
-                        원인분석_key = f"원인분석_data_{작업명}"
-                        if 원인분석_key in st.session_state:
-                            원인분석_df = st.session_state[원인분석_key]
-                            if isinstance(원인분석_df, pd.DataFrame) and not 원인분석_df.empty:
-                                sheet_name = f'원인분석_{작업명}'.replace('/', '_').replace('\\', '_')[:31]
-                                원인분석_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # 정밀조사 데이터 저장 (있는 경우만)
-                    if "정밀조사_목록" in st.session_state and st.session_state["정밀조사_목록"]:
-                        for 조사명 in st.session_state["정밀조사_목록"]:
-                            정밀_data_rows = []
-                            
-                            # 기본 정보
-                            정밀_data_rows.append(["작업공정명", st.session_state.get(f"정밀_작업공정명_{조사명}", "")])
-                            정밀_data_rows.append(["작업명", st.session_state.get(f"정밀_작업명_{조사명}", "")])
-                            정밀_data_rows.append([])  # 빈 행
-                            정밀_data_rows.append(["작업별로 관련된 유해요인에 대한 원인분석"])
-                            정밀_data_rows.append(["작업분석 및 평가도구", "분석결과", "만점"])
-                            
-                            # 원인분석 데이터
-                            원인분석_key = f"정밀_원인분석_data_{조사명}"
-                            if 원인분석_key in st.session_state:
-                                원인분석_df = st.session_state[원인분석_key]
-                                for _, row in 원인분석_df.iterrows():
-                                    if row.get("작업분석 및 평가도구", "") or row.get("분석결과", "") or row.get("만점", ""):
-                                        정밀_data_rows.append([
-                                            row.get("작업분석 및 평가도구", ""),
-                                            row.get("분석결과", ""),
-                                            row.get("만점", "")
-                                        ])
-                            
-                            if len(정밀_data_rows) > 5:  # 헤더 이후에 데이터가 있는 경우만
-                                정밀_sheet_df = pd.DataFrame(정밀_data_rows)
-                                sheet_name = 조사명.replace('/', '_').replace('\\', '_')[:31]
-                                정밀_sheet_df.to_excel(writer, sheet_name=sheet_name, index=False, header=False)
-                    
-                    # 증상조사 분석 데이터 저장
-                    if "기초현황_data_저장" in st.session_state:
-                        기초현황_df = st.session_state["기초현황_data_저장"]
-                        if not 기초현황_df.empty:
-                            기초현황_df.to_excel(writer, sheet_name="증상조사_기초현황", index=False)
-
-                    if "작업기간_data_저장" in st.session_state:
-                        작업기간_df = st.session_state["작업기간_data_저장"]
-                        if not 작업기간_df.empty:
-                            작업기간_df.to_excel(writer, sheet_name="증상조사_작업기간", index=False)
-
-                    if "육체적부담_data_저장" in st.session_state:
-                        육체적부담_df = st.session_state["육체적부담_data_저장"]
-                        if not 육체적부담_df.empty:
-                            육체적부담_df.to_excel(writer, sheet_name="증상조사_육체적부담", index=False)
-
-                    if "통증호소자_data_저장" in st.session_state:
-                        통증호소자_df = st.session_state["통증호소자_data_저장"]
-                        if isinstance(통증호소자_df, pd.DataFrame) and not 통증호소자_df.empty:
-                            통증호소자_df.to_excel(writer, sheet_name="증상조사_통증호소자", index=False)
-                    
-                    # 작업환경개선계획서 데이터 저장
-                    if "개선계획_data_저장" in st.session_state:
-                        개선계획_df = st.session_state["개선계획_data_저장"]
-                        if not 개선계획_df.empty:
-                            # 빈 행 제거 (모든 컬럼이 빈 행 제외)
-                            개선계획_df_clean = 개선계획_df[개선계획_df.astype(str).ne('').any(axis=1)]
-                            if not 개선계획_df_clean.empty:
-                                개선계획_df_clean.to_excel(writer, sheet_name="작업환경개선계획서", index=False)
-                    
-                output.seek(0)
-                st.download_button(
-                    label="📥 엑셀 다운로드",
-                    data=output,
-                    file_name=f"근골격계_유해요인조사_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-                
-            except Exception as e:
-                st.error(f"엑셀 파일 생성 중 오류가 발생했습니다: {str(e)}")
-                st.info("데이터를 입력한 후 다시 시도해주세요.")
+            # 요청 시점의 입력 내용으로 생성 (생성 중에 입력을 바꿔도 영향 없음)
+            job_id = 작업_제출("엑셀", 엑셀_보고서_생성, 세션_스냅샷(st.session_state), engine=엑셀_엔진_선택)
+            st.session_state["_보고서_작업"].append(job_id)
     
     with col2:
         # PDF 보고서 생성 버튼
         if PDF_AVAILABLE:
+            # PDF 선택 시 엑셀 엔진 선택 상자와 높이를 맞춤
+            st.markdown("<div style='height: 1.75em;'></div>", unsafe_allow_html=True)
             if st.button("📄 PDF 보고서 생성", use_container_width=True):
-                try:
-                    # 한글 폰트 설정 - 나눔고딕 우선
-                    font_paths = [
-                        "C:/Windows/Fonts/NanumGothic.ttf",
-                        "C:/Windows/Fonts/NanumBarunGothic.ttf",
-                        "C:/Windows/Fonts/malgun.ttf",
-                        "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",  # Linux
-                        "/System/Library/Fonts/Supplemental/NanumGothic.ttf"  # Mac
-                    ]
-                    
-                    font_registered = False
-                    for font_path in font_paths:
-                        if os.path.exists(font_path):
-                            if "NanumGothic" in font_path:
-                                pdfmetrics.registerFont(TTFont('NanumGothic', font_path))
-                                font_name = 'NanumGothic'
-                            elif "NanumBarunGothic" in font_path:
-                                pdfmetrics.registerFont(TTFont('NanumBarunGothic', font_path))
-                                font_name = 'NanumBarunGothic'
-                            else:
-                                pdfmetrics.registerFont(TTFont('Malgun', font_path))
-                                font_name = 'Malgun'
-                            font_registered = True
-                            break
-                    
-                    if not font_registered:
-                        font_name = 'Helvetica'
-                    
-                    # PDF 생성
-                    pdf_buffer = BytesIO()
-                    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-                    story = []
-                    
-                    # 스타일 설정 - 글꼴 크기 증가
-                    styles = getSampleStyleSheet()
-                    title_style = ParagraphStyle(
-                        'CustomTitle',
-                        parent=styles['Heading1'],
-                        fontSize=28,  # 24에서 28로 증가
-                        textColor=colors.HexColor('#1f4788'),
-                        alignment=TA_CENTER,
-                        fontName=font_name,
-                        spaceAfter=30
-                    )
-                    
-                    heading_style = ParagraphStyle(
-                        'CustomHeading',
-                        parent=styles['Heading2'],
-                        fontSize=18,  # 16에서 18로 증가
-                        textColor=colors.HexColor('#2e5090'),
-                        fontName=font_name,
-                        spaceAfter=12
-                    )
-                    
-                    subheading_style = ParagraphStyle(
-                        'CustomSubHeading',
-                        parent=styles['Heading3'],
-                        fontSize=14,  # 새로 추가
-                        textColor=colors.HexColor('#3a5fa0'),
-                        fontName=font_name,
-                        spaceAfter=10
-                    )
-                    
-                    normal_style = ParagraphStyle(
-                        'CustomNormal',
-                        parent=styles['Normal'],
-                        fontSize=12,  # 10에서 12로 증가
-                        fontName=font_name,
-                        leading=14
-                    )
-                    
-                    # 제목 페이지
-                    story.append(Spacer(1, 1.5*inch))
-                    story.append(Paragraph("근골격계 유해요인조사 보고서", title_style))
-                    story.append(Spacer(1, 0.5*inch))
-                    
-                    # 사업장 정보
-                    if st.session_state.get("사업장명"):
-                        사업장정보 = f"""
-                        <para align="center" fontSize="14">
-                        <b>사업장명:</b> {st.session_state.get("사업장명", "")}<br/>
-                        <b>조사일:</b> {datetime.now().strftime('%Y년 %m월 %d일')}
-                        </para>
-                        """
-                        story.append(Paragraph(사업장정보, normal_style))
-                    
-                    story.append(PageBreak())
-                    
-                    # 1. 사업장 개요
-                    story.append(Paragraph("1. 사업장 개요", heading_style))
-                    
-                    사업장_data = [
-                        ["항목", "내용"],
-                        ["사업장명", st.session_state.get("사업장명", "")],
-                        ["소재지", st.session_state.get("소재지", "")],
-                        ["업종", st.session_state.get("업종", "")],
-                        ["예비조사일", str(st.session_state.get("예비조사", ""))],
-                        ["본조사일", str(st.session_state.get("본조사", ""))],
-                        ["수행기관", st.session_state.get("수행기관", "")],
-                        ["담당자", st.session_state.get("성명", "")]
-                    ]
-                    
-                    t = Table(사업장_data, colWidths=[2*inch, 4*inch])
-                    t.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, -1), font_name),
-                        ('FONTSIZE', (0, 0), (-1, -1), 12),  # 10에서 12로 증가
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                        ('BACKGROUND', (0, 1), (0, -1), colors.beige),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                    ]))
-                    story.append(t)
-                    story.append(Spacer(1, 0.5*inch))
-                    
-                    # 2. 근골격계 부담작업 체크리스트
-                    if "checklist_df" in st.session_state and not st.session_state["checklist_df"].empty:
-                        story.append(PageBreak())
-                        story.append(Paragraph("2. 근골격계 부담작업 체크리스트", heading_style))
-                        
-                        # 체크리스트 데이터를 테이블로 변환
-                        체크리스트_data = [list(st.session_state["checklist_df"].columns)]
-                        for _, row in st.session_state["checklist_df"].iterrows():
-                            체크리스트_data.append(list(row))
-                        
-                        # 테이블 생성
-                        체크리스트_table = Table(체크리스트_data, repeatRows=1)
-                        체크리스트_table.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ('FONTNAME', (0, 0), (-1, -1), font_name),
-                            ('FONTSIZE', (0, 0), (-1, -1), 10),
-                            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                        ]))
-                        story.append(체크리스트_table)
-                    
-                    # 3. 유해요인조사표
-                    if "유해요인조사_목록" in st.session_state and st.session_state["유해요인조사_목록"]:
-                        for 조사표명 in st.session_state["유해요인조사_목록"]:
-                            story.append(PageBreak())
-                            story.append(Paragraph(f"3. {조사표명}", heading_style))
-                            
-                            # 조사개요
-                            story.append(Paragraph("가. 조사개요", subheading_style))
-                            조사개요_data = [
-                                ["조사일시", st.session_state.get(f"조사일시_{조사표명}", "")],
-                                ["부서명", st.session_state.get(f"부서명_{조사표명}", "")],
-                                ["조사자", st.session_state.get(f"조사자_{조사표명}", "")],
-                                ["작업공정명", st.session_state.get(f"작업공정명_{조사표명}", "")],
-                                ["작업명", st.session_state.get(f"작업명_{조사표명}", "")]
-                            ]
-                            
-                            조사개요_table = Table(조사개요_data, colWidths=[2*inch, 4*inch])
-                            조사개요_table.setStyle(TableStyle([
-                                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                                ('FONTNAME', (0, 0), (-1, -1), font_name),
-                                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                                ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-                            ]))
-                            story.append(조사개요_table)
-                            story.append(Spacer(1, 0.3*inch))
-                            
-                            # 작업장 상황조사
-                            story.append(Paragraph("나. 작업장 상황조사", subheading_style))
-                            상황조사_data = [["항목", "상태", "세부사항"]]
-                            
-                            for 항목 in ["작업설비", "작업량", "작업속도", "업무변화"]:
-                                상태 = st.session_state.get(f"{항목}_상태_{조사표명}", "변화없음")
-                                세부사항 = ""
-                                if 상태 == "감소":
-                                    세부사항 = st.session_state.get(f"{항목}_감소_시작_{조사표명}", "")
-                                elif 상태 == "증가":
-                                    세부사항 = st.session_state.get(f"{항목}_증가_시작_{조사표명}", "")
-                                elif 상태 == "기타":
-                                    세부사항 = st.session_state.get(f"{항목}_기타_내용_{조사표명}", "")
-                                
-                                상황조사_data.append([항목, 상태, 세부사항])
-                            
-                            상황조사_table = Table(상황조사_data, colWidths=[1.5*inch, 2*inch, 2.5*inch])
-                            상황조사_table.setStyle(TableStyle([
-                                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                                ('FONTNAME', (0, 0), (-1, -1), font_name),
-                                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ]))
-                            story.append(상황조사_table)
-                    
-                    # 4. 작업조건조사
-                    작업명_목록_pdf = []
-                    if "checklist_df" in st.session_state and not st.session_state["checklist_df"].empty:
-                        작업명_목록_pdf = st.session_state["checklist_df"]["작업명"].dropna().unique().tolist()
-                    
-                    for 작업명 in 작업명_목록_pdf:
-                        data_key = f"작업조건_data_{작업명}"
-                        if data_key in st.session_state:
-                            작업_df = st.session_state[data_key]
-                            if isinstance(작업_df, pd.DataFrame) and not 작업_df.empty:
-                                story.append(PageBreak())
-                                story.append(Paragraph(f"4. 작업조건조사 - {작업명}", heading_style))
-                                
-                                # 작업조건 데이터 테이블
-                                작업조건_data = [list(작업_df.columns)]
-                                for _, row in 작업_df.iterrows():
-                                    작업조건_data.append(list(row))
-                                
-                                작업조건_table = Table(작업조건_data, repeatRows=1)
-                                작업조건_table.setStyle(TableStyle([
-                                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                    ('FONTNAME', (0, 0), (-1, -1), font_name),
-                                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                                    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                                ]))
-                                story.append(작업조건_table)
-                    
-                    # 5. 증상조사 분석
-                    증상조사_섹션_추가 = False
-                    
-                    if "기초현황_data_저장" in st.session_state and not st.session_state["기초현황_data_저장"].empty:
-                        if not 증상조사_섹션_추가:
-                            story.append(PageBreak())
-                            story.append(Paragraph("5. 근골격계 자기증상 분석", heading_style))
-                            증상조사_섹션_추가 = True
-                        
-                        story.append(Paragraph("5.1 기초현황", subheading_style))
-                        기초현황_df = st.session_state["기초현황_data_저장"]
-                        기초현황_data = [list(기초현황_df.columns)]
-                        for _, row in 기초현황_df.iterrows():
-                            기초현황_data.append(list(row))
-                        
-                        기초현황_table = Table(기초현황_data, repeatRows=1)
-                        기초현황_table.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ('FONTNAME', (0, 0), (-1, -1), font_name),
-                            ('FONTSIZE', (0, 0), (-1, -1), 10),
-                            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                        ]))
-                        story.append(기초현황_table)
-                        story.append(Spacer(1, 0.3*inch))
-                    
-                    # 6. 작업환경개선계획서
-                    if "개선계획_data_저장" in st.session_state:
-                        개선계획_df = st.session_state["개선계획_data_저장"]
-                        if not 개선계획_df.empty:
-                            개선계획_df_clean = 개선계획_df[개선계획_df.astype(str).ne('').any(axis=1)]
-                            if not 개선계획_df_clean.empty:
-                                story.append(PageBreak())
-                                story.append(Paragraph("6. 작업환경개선계획서", heading_style))
-                                
-                                # 개선계획 데이터 테이블
-                                개선계획_data = [list(개선계획_df_clean.columns)]
-                                for _, row in 개선계획_df_clean.iterrows():
-                                    개선계획_data.append(list(row))
-                                
-                                # 컬럼 너비 조정
-                                col_widths = [0.8*inch, 0.8*inch, 1*inch, 1.2*inch, 1*inch, 1.2*inch, 0.8*inch, 0.8*inch, 0.8*inch]
-                                
-                                개선계획_table = Table(개선계획_data, colWidths=col_widths, repeatRows=1)
-                                개선계획_table.setStyle(TableStyle([
-                                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                    ('FONTNAME', (0, 0), (-1, -1), font_name),
-                                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                                    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                                ]))
-                                story.append(개선계획_table)
-                    
-                    # PDF 생성
-                    doc.build(story)
-                    pdf_buffer.seek(0)
-                    
-                    # 다운로드 버튼
-                    st.download_button(
-                        label="📥 PDF 다운로드",
-                        data=pdf_buffer,
-                        file_name=f"근골격계유해요인조사보고서_{datetime.now().strftime('%Y%m%d')}.pdf",
-                        mime="application/pdf"
-                    )
-                    
-                    st.success("PDF 보고서가 생성되었습니다!")
-                    
-                except Exception as e:
-                    error_message = "PDF 생성 중 오류가 발생했습니다: " + str(e)
-                    st.error(error_message)
-                    install_message = "reportlab 라이브러리를 설치해주세요: pip install reportlab"
-                    st.info(install_message)
+                job_id = 작업_제출("PDF", PDF_보고서_생성, 세션_스냅샷(st.session_state))
+                st.session_state["_보고서_작업"].append(job_id)
         else:
             no_pdf_message = "PDF 생성 기능을 사용하려면 reportlab 라이브러리를 설치하세요: pip install reportlab"
             st.info(no_pdf_message)
+    
+    def 보고서_작업_표시(폴링):
+        # 보관 시간이 지나 지워진 작업은 목록에서 제외
+        작업_목록 = [작업_조회(job_id) for job_id in st.session_state["_보고서_작업"]]
+        작업_목록 = [job for job in 작업_목록 if job is not None]
+        st.session_state["_보고서_작업"] = [job["id"] for job in 작업_목록]
+        
+        # run_every는 전체 실행 때만 정해지므로, 작업이 모두 끝나면 전체를 다시 실행해 폴링을 멈춤
+        if 폴링 and not any(job["상태"] in ("대기", "진행중") for job in 작업_목록):
+            st.rerun()
+        
+        # 최근 요청부터 표시
+        for job in reversed(작업_목록):
+            요청시각 = datetime.fromtimestamp(job["제출시각"]).strftime('%H:%M:%S')
+            if job["상태"] in ("대기", "진행중"):
+                st.progress(job["진행"], text=f"{job['종류']} 보고서 생성 중... ({요청시각} 요청)")
+            elif job["상태"] == "완료" and job["종류"] == "엑셀":
+                st.download_button(
+                    label=f"📥 엑셀 다운로드 ({요청시각} 요청)",
+                    data=job["결과"],
+                    file_name=f"근골격계_유해요인조사_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key=f"보고서_다운로드_{job['id']}"
+                )
+            elif job["상태"] == "완료":
+                st.download_button(
+                    label=f"📥 PDF 다운로드 ({요청시각} 요청)",
+                    data=job["결과"],
+                    file_name=f"근골격계유해요인조사보고서_{datetime.now().strftime('%Y%m%d')}.pdf",
+                    mime="application/pdf",
+                    key=f"보고서_다운로드_{job['id']}"
+                )
+            elif job["종류"] == "엑셀":
+                st.error(f"엑셀 파일 생성 중 오류가 발생했습니다: {job['오류']}")
+                st.info("데이터를 입력한 후 다시 시도해주세요.")
+            else:
+                error_message = "PDF 생성 중 오류가 발생했습니다: " + job["오류"]
+                st.error(error_message)
+                install_message = "reportlab 라이브러리를 설치해주세요: pip install reportlab"
+                st.info(install_message)
+    
+    # 생성 중인 작업이 있으면 1초마다 이 영역만 다시 그림
+    생성중 = any(
+        (작업_조회(job_id) or {}).get("상태") in ("대기", "진행중")
+        for job_id in st.session_state["_보고서_작업"]
+    )
+    st.fragment(run_every=1 if 생성중 else None)(보고서_작업_표시)(생성중)
+
+# 8. 보관함 분석 탭
+if 선택_화면 == 화면_목록[7]:
+    st.title("보관함 분석")
+    
+    if 조사_목록().empty:
+        st.info("📋 사이드바의 '조사 보관함'에 조사를 저장하면 여러 사업장을 비교할 수 있습니다.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            분석_업종 = st.selectbox("업종", ["전체"] + 업종_목록(), key="_분석_업종")
+        with col2:
+            분석_공정 = st.text_input("공정명 포함 (예: 조립)", key="_분석_공정")
+        with col3:
+            분석_기준_선택 = st.selectbox("집계 기준", 분석_기준, key="_분석_기준")
+        분석_조건 = {"업종": None if 분석_업종 == "전체" else 분석_업종, "공정_포함": 분석_공정 or None}
+        
+        # 1호~11호 비율
+        st.subheader("부담작업 해당 비율 (%)")
+        비율_코드 = st.radio(
+            "대상",
+            [해당_코드, 잠재_코드],
+            format_func=lambda code: 호_옵션[code],
+            horizontal=True,
+            key="_분석_코드"
+        )
+        비율_df = 호_비율(분석_기준_선택, 비율_코드, **분석_조건)
+        if 비율_df.empty:
+            st.info("조건에 맞는 단위작업이 없습니다.")
+        else:
+            st.dataframe(비율_df, use_container_width=True)
+            st.bar_chart(비율_df[호_컬럼].T)
+        
+        # 총점 상위 작업
+        st.subheader("총점(작업부하×작업빈도) 상위 작업")
+        상위_개수 = st.number_input("표시 개수", min_value=5, max_value=200, value=20, step=5, key="_분석_상위")
+        st.dataframe(
+            총점_상위(상위_개수, ("사업장명", "작업명"), **분석_조건),
+            use_container_width=True,
+            hide_index=True
+        )
+
+# 자동저장: 이번 실행에서 바뀐 입력까지 반영되도록 마지막에 체크포인트
+자동저장()
@@ -0,0 +1,258 @@
+"""서버 자동저장 (조사별 SQLite 체크포인트)
+
+조사마다 자동저장 디렉터리에 SQLite 파일 하나를 두고, 체크포인트마다 지난번 이후 바뀐 세션 키만
+스냅샷 zip(델타)으로 추가한다. 델타가 일정 개수 쌓이면 전체 스냅샷(기준점)을 새로 쓰고 이전 기록을 지운다.
+복원은 마지막 기준점과 그 뒤의 델타만 순서대로 적용한다.
+
+지문 계산과 파일 쓰기는 백그라운드 스레드 하나에서 순서대로 처리하므로 화면 실행을 막지 않는다.
+간격 안에 들어온 변경은 남은 시간이 지난 뒤 한 번 더 저장한다.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from session_schema import 지문_갱신, 키_타입
+from snapshot import 스냅샷_저장, 스냅샷_불러오기
+
+자동저장_경로 = os.environ.get("WMSD_AUTOSAVE_DIR", "autosave")
+저장_간격 = 30  # 체크포인트 최소 간격(초)
+압축_델타수 = 20  # 델타가 이만큼 쌓이면 기준점을 새로 씀
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+_상태 = {}  # 조사 id -> {"지문", "제출시각", "델타수", "대기": 미뤄 둔 값, "타이머", "오류"}
+_상태_lock = threading.Lock()
+_정보_캐시 = {}  # 파일 경로 -> (수정 시각, 정보)
+_정보_캐시_lock = threading.Lock()
+
+_스키마 = """
+CREATE TABLE IF NOT EXISTS 체크포인트 (
+    순번 INTEGER PRIMARY KEY AUTOINCREMENT,
+    시각 REAL NOT NULL,
+    종류 TEXT NOT NULL,
+    내용 BLOB NOT NULL,
+    삭제 TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS 정보 (
+    키 TEXT PRIMARY KEY,
+    값 TEXT
+);
+"""
+
+
+def 새_조사_id():
+    return time.strftime("%Y%m%d_%H%M%S") + "_" + uuid.uuid4().hex[:6]
+
+
+def _파일(조사_id):
+    if not re.fullmatch(r"[\w-]+", 조사_id):
+        raise ValueError(f"잘못된 조사 ID입니다: {조사_id}")
+    return os.path.join(자동저장_경로, f"{조사_id}.sqlite")
+
+
+def _연결(조사_id):
+    os.makedirs(자동저장_경로, exist_ok=True)
+    conn = sqlite3.connect(_파일(조사_id))
+    conn.executescript(_스키마)
+    return conn
+
+
+def _새_상태():
+    return {"지문": None, "제출시각": 0, "델타수": 0, "대기": None, "타이머": None, "오류": ""}
+
+
+def _지문(value):
+    h = hashlib.sha1()
+    지문_갱신(h, value)
+    return h.hexdigest()
+
+
+def _기준점_쓰기(conn, values, 시각):
+    순번 = conn.execute(
+        "INSERT INTO 체크포인트 (시각, 종류, 내용) VALUES (?, 'base', ?)",
+        (시각, 스냅샷_저장(values)),
+    ).lastrowid
+    # 새 기준점 이전의 기록은 더 이상 필요 없음
+    conn.execute("DELETE FROM 체크포인트 WHERE 순번 < ?", (순번,))
+
+
+def _체크포인트_쓰기(조사_id, values):
+    """바뀐 키만 델타로 추가한다. 처음이거나 델타가 쌓였으면 기준점을 새로 쓴다."""
+    지문 = {key: _지문(value) for key, value in values.items()}
+    with _상태_lock:
+        상태 = _상태.setdefault(조사_id, _새_상태())
+        이전_지문 = 상태["지문"]
+        델타수 = 상태["델타수"]
+
+    시각 = time.time()
+    conn = _연결(조사_id)
+    try:
+        with conn:
+            if 이전_지문 is None or 델타수 + 1 >= 압축_델타수:
+                _기준점_쓰기(conn, values, 시각)
+                델타수 = 0
+            else:
+                바뀐_키 = [key for key, value in 지문.items() if 이전_지문.get(key) != value]
+                삭제_키 = [key for key in 이전_지문 if key not in 지문]
+                if not 바뀐_키 and not 삭제_키:
+                    return
+                conn.execute(
+                    "INSERT INTO 체크포인트 (시각, 종류, 내용, 삭제) VALUES (?, 'delta', ?, ?)",
+                    (시각, 스냅샷_저장({key: values[key] for key in 바뀐_키}), json.dumps(삭제_키, ensure_ascii=False)),
+                )
+                델타수 += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO 정보 (키, 값) VALUES ('사업장명', ?), ('갱신시각', ?)",
+                (str(values.get("사업장명", "")), str(시각)),
+            )
+    finally:
+        conn.close()
+
+    with _상태_lock:
+        상태["지문"] = 지문
+        상태["델타수"] = 델타수
+
+
+def _제출(조사_id, values):
+    future = _executor.submit(_체크포인트_쓰기, 조사_id, values)
+
+    def 완료(future):
+        # 실패한 저장이 조용히 묻히지 않도록 오류를 남겨 화면에 보여 줌
+        error = future.exception()
+        with _상태_lock:
+            상태 = _상태.get(조사_id)
+            if 상태 is not None:
+                상태["오류"] = "" if error is None else f"{type(error).__name__}: {error}"
+
+    future.add_done_callback(완료)
+
+
+def _대기_저장(조사_id):
+    """간격 안에 들어와 미뤄 둔 마지막 변경을 저장한다."""
+    with _상태_lock:
+        상태 = _상태.get(조사_id)
+        if 상태 is None:
+            return
+        상태["타이머"] = None
+        values = 상태["대기"]
+        if values is None:
+            return
+        상태["대기"] = None
+        상태["제출시각"] = time.time()
+    _제출(조사_id, values)
+
+
+def 체크포인트(조사_id, session_state, 간격=저장_간격, force=False):
+    """마지막 체크포인트 후 간격(초)이 지났으면 자동저장을 예약하고 True를 반환한다.
+
+    세션 스키마에 있는 키만 얕게 복사해서 넘기고, 지문 비교와 저장은 백그라운드에서 한다.
+    간격 안이면 값을 맡겨 두었다가 남은 시간이 지난 뒤 저장하고 False를 반환한다.
+    """
+    values = {}
+    for key, value in list(session_state.items()):
+        if 키_타입(key) is None:
+            continue
+        values[key] = list(value) if isinstance(value, list) else value
+
+    now = time.time()
+    with _상태_lock:
+        상태 = _상태.setdefault(조사_id, _새_상태())
+        if not force and now - 상태["제출시각"] < 간격:
+            상태["대기"] = values
+            if 상태["타이머"] is None:
+                타이머 = threading.Timer(상태["제출시각"] + 간격 - now, _대기_저장, (조사_id,))
+                타이머.daemon = True
+                상태["타이머"] = 타이머
+                타이머.start()
+            return False
+        상태["제출시각"] = now
+        상태["대기"] = None
+    _제출(조사_id, values)
+    return True
+
+
+def 자동저장_오류(조사_id):
+    """마지막 자동저장이 실패했으면 오류 메시지, 아니면 빈 문자열"""
+    with _상태_lock:
+        return _상태.get(조사_id, {}).get("오류", "")
+
+
+def 자동저장_복원(조사_id):
+    """마지막 기준점과 이후 델타를 적용한 (세션 값, 건너뛴 키 목록)을 반환한다."""
+    if not os.path.exists(_파일(조사_id)):
+        raise ValueError(f"자동저장 기록이 없습니다: {조사_id}")
+    conn = _연결(조사_id)
+    try:
+        rows = conn.execute(
+            "SELECT 내용, 삭제 FROM 체크포인트 "
+            "WHERE 순번 >= (SELECT MAX(순번) FROM 체크포인트 WHERE 종류 = 'base') ORDER BY 순번"
+        ).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        raise ValueError(f"자동저장 기록이 없습니다: {조사_id}")
+
+    restored = {}
+    무시 = []
+    for 내용, 삭제 in rows:
+        values, 건너뜀 = 스냅샷_불러오기(내용)
+        restored.update(values)
+        무시.extend(건너뜀)
+        for key in json.loads(삭제):
+            restored.pop(key, None)
+
+    # 다음 체크포인트는 복원한 상태로 기준점부터 새로 씀
+    with _상태_lock:
+        이전 = _상태.get(조사_id)
+        if 이전 is not None and 이전["타이머"] is not None:
+            이전["타이머"].cancel()
+        _상태[조사_id] = dict(_새_상태(), 제출시각=time.time())
+    return restored, 무시
+
+
+def _정보(조사_id):
+    """자동저장 파일의 정보 표. 파일이 바뀌었을 때만 다시 읽는다."""
+    path = _파일(조사_id)
+    try:
+        수정시각 = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _정보_캐시_lock:
+        cached = _정보_캐시.get(path)
+    if cached is not None and cached[0] == 수정시각:
+        return cached[1]
+
+    conn = sqlite3.connect(path)
+    try:
+        정보 = dict(conn.execute("SELECT 키, 값 FROM 정보").fetchall())
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+    with _정보_캐시_lock:
+        _정보_캐시[path] = (수정시각, 정보)
+    return 정보
+
+
+def 자동저장_목록(조사_ids):
+    """주어진 조사의 자동저장 목록 [{"id", "사업장명", "갱신시각"}], 최근 것부터
+
+    자동저장 디렉터리는 모든 사용자가 같이 쓰므로, 이 세션에서 쓴 조사 ID만 넘겨서 조회한다.
+    """
+    목록 = []
+    for 조사_id in dict.fromkeys(조사_ids):
+        정보 = _정보(조사_id)
+        if 정보 is None:
+            continue
+        목록.append({
+            "id": 조사_id,
+            "사업장명": 정보.get("사업장명", ""),
+            "갱신시각": float(정보.get("갱신시각") or 0),
+        })
+    목록.sort(key=lambda item: item["갱신시각"], reverse=True)
+    return 목록
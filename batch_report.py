@@ -0,0 +1,113 @@
+"""임시저장 스냅샷 일괄 보고서 생성 (Streamlit 없이 실행)
+
+디렉터리 안의 임시저장 파일(.zip 스냅샷 또는 이전 .json)을 프로세스 풀에서 나누어 읽고
+파일마다 엑셀/PDF 보고서를 만든다. 끝나면 파일별 소요 시간과 오류를 요약해서 보여준다.
+
+    python batch_report.py 저장파일_폴더 --출력 reports --형식 xlsx pdf --작업자 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from report_excel import 엑셀_엔진, 엑셀_보고서_생성
+from report_pdf import PDF_AVAILABLE, PDF_보고서_생성
+from snapshot import 스냅샷_불러오기
+
+스냅샷_확장자 = (".zip", ".json")
+
+
+def 보고서_생성(경로, 출력_경로, 형식=("xlsx", "pdf"), engine="cached"):
+    """스냅샷 파일 하나로 보고서를 만들어 출력_경로에 쓰고 결과 요약 dict를 반환한다."""
+    이름 = os.path.splitext(os.path.basename(경로))[0]
+    결과 = {"파일": os.path.basename(경로), "출력": [], "소요시간": {}, "오류": ""}
+    시작 = time.perf_counter()
+    try:
+        with open(경로, "rb") as f:
+            state, _ = 스냅샷_불러오기(f)
+        결과["소요시간"]["불러오기"] = time.perf_counter() - 시작
+
+        for 확장자 in 형식:
+            단계_시작 = time.perf_counter()
+            if 확장자 == "xlsx":
+                data = 엑셀_보고서_생성(state, engine=engine)
+            else:
+                data = PDF_보고서_생성(state)
+            출력_파일 = os.path.join(출력_경로, f"{이름}.{확장자}")
+            with open(출력_파일, "wb") as f:
+                f.write(data)
+            결과["출력"].append(출력_파일)
+            결과["소요시간"][확장자] = time.perf_counter() - 단계_시작
+    except Exception as e:
+        결과["오류"] = f"{type(e).__name__}: {e}"
+    결과["소요시간"]["전체"] = time.perf_counter() - 시작
+    return 결과
+
+
+def 일괄_생성(입력_경로, 출력_경로, 형식=("xlsx", "pdf"), engine="cached", max_workers=None, on_result=None):
+    """입력_경로의 모든 스냅샷으로 보고서를 만든다. on_result(결과)는 파일 하나가 끝날 때마다 호출된다."""
+    files = sorted(
+        os.path.join(입력_경로, name) for name in os.listdir(입력_경로)
+        if name.lower().endswith(스냅샷_확장자)
+    )
+    os.makedirs(출력_경로, exist_ok=True)
+    if not files:
+        return []
+
+    max_workers = max_workers or min(len(files), os.cpu_count() or 1)
+    results = []
+    if max_workers <= 1:
+        for 경로 in files:
+            results.append(보고서_생성(경로, 출력_경로, 형식, engine))
+            if on_result is not None:
+                on_result(results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(보고서_생성, 경로, 출력_경로, 형식, engine) for 경로 in files]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if on_result is not None:
+                    on_result(results[-1])
+    results.sort(key=lambda 결과: 결과["파일"])
+    return results
+
+
+def _결과_출력(결과):
+    소요 = ", ".join(f"{단계} {초:.2f}s" for 단계, 초 in 결과["소요시간"].items())
+    상태 = f"실패 - {결과['오류']}" if 결과["오류"] else "완료"
+    print(f"[{상태}] {결과['파일']} ({소요})", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임시저장 스냅샷 일괄 보고서 생성")
+    parser.add_argument("입력", help="임시저장 파일(.zip/.json)이 있는 폴더")
+    parser.add_argument("--출력", default="reports", help="보고서를 저장할 폴더")
+    parser.add_argument("--형식", nargs="+", choices=["xlsx", "pdf"], default=["xlsx", "pdf"])
+    parser.add_argument("--엔진", choices=list(엑셀_엔진), default="cached", help="엑셀 생성 방식")
+    parser.add_argument("--작업자", type=int, default=None, help="동시에 처리할 프로세스 수 (기본: CPU 수)")
+    args = parser.parse_args()
+
+    형식 = list(dict.fromkeys(args.형식))
+    if "pdf" in 형식 and not PDF_AVAILABLE:
+        print("reportlab이 설치되어 있지 않아 PDF는 건너뜁니다: pip install reportlab", file=sys.stderr)
+        형식.remove("pdf")
+    if not 형식:
+        return 1
+
+    시작 = time.perf_counter()
+    results = 일괄_생성(args.입력, args.출력, 형식, args.엔진, args.작업자, on_result=_결과_출력)
+    전체 = time.perf_counter() - 시작
+
+    실패 = [결과 for 결과 in results if 결과["오류"]]
+    print(f"\n파일 {len(results)}개 중 {len(results) - len(실패)}개 완료, {len(실패)}개 실패 ({전체:.1f}초)")
+    if results:
+        가장_느린 = max(results, key=lambda 결과: 결과["소요시간"]["전체"])
+        print(f"가장 오래 걸린 파일: {가장_느린['파일']} ({가장_느린['소요시간']['전체']:.2f}초)")
+    for 결과 in 실패:
+        print(f"  - {결과['파일']}: {결과['오류']}")
+    return 1 if 실패 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
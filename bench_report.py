@@ -0,0 +1,119 @@
+"""전체 보고서 엑셀 엔진 벤치마크
+
+가상의 대규모 조사(기본 500개 작업)로 엑셀 쓰기 엔진별 소요 시간과 최대 메모리를 비교한다.
+
+    python bench_report.py --작업수 500
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date
+
+import pandas as pd
+
+import report_excel
+from checklist import 체크리스트_컬럼, 호_옵션, 체크리스트_압축
+from scoring import 부하옵션, 빈도옵션
+
+
+def 가상_조사(작업수, 단위작업수=10):
+    """엑셀 보고서의 모든 시트가 채워지는 가상의 세션 상태"""
+    state = {
+        "사업장명": "벤치마크 사업장",
+        "소재지": "서울",
+        "업종": "제조업",
+        "예비조사": date(2024, 1, 1),
+        "본조사": date(2024, 2, 1),
+        "수행기관": "벤치마크",
+        "성명": "홍길동",
+    }
+
+    rows = []
+    for i in range(작업수):
+        for j in range(단위작업수):
+            rows.append([f"작업{i}", f"단위작업{i}_{j}"] + [호_옵션[(i + j + k) % 3] for k in range(11)])
+    state["checklist_df"] = 체크리스트_압축(pd.DataFrame(rows, columns=체크리스트_컬럼))
+
+    for i in range(작업수):
+        작업명 = f"작업{i}"
+        state[f"작업조건_data_{작업명}"] = pd.DataFrame({
+            "단위작업명": [f"단위작업{i}_{j}" for j in range(단위작업수)],
+            "부담작업(호)": ["1호, 3호(잠재)"] * 단위작업수,
+            "작업부하(A)": [부하옵션[j % len(부하옵션)] for j in range(단위작업수)],
+            "작업빈도(B)": [빈도옵션[j % len(빈도옵션)] for j in range(단위작업수)],
+            "총점": [0] * 단위작업수,
+        })
+        state[f"원인분석_data_{작업명}"] = pd.DataFrame({
+            "번호": [str(n + 1) for n in range(7)],
+            "단위작업명": [f"단위작업{i}_{n}" for n in range(7)],
+            "유해요인": ["반복동작"] * 7,
+            "부담작업": ["부담작업(1호)"] * 7,
+            "발생원인": ["부품 조립 시 반복적인 손목 꺾임"] * 7,
+            "비고": [""] * 7,
+        })
+        state[f"3단계_근로자수_{작업명}"] = "5"
+        for n in range(3):
+            state[f"사진_{n+1}_설명_{작업명}"] = f"{작업명} 사진 설명 {n+1}"
+
+    state["유해요인조사_목록"] = [f"유해요인조사_{n+1}" for n in range(30)]
+    state["정밀조사_목록"] = [f"정밀조사_{n+1}" for n in range(10)]
+    for 조사명 in state["정밀조사_목록"]:
+        state[f"정밀_원인분석_data_{조사명}"] = pd.DataFrame({
+            "작업분석 및 평가도구": ["RULA"] * 7,
+            "분석결과": ["5"] * 7,
+            "만점": ["7"] * 7,
+        })
+
+    state["기초현황_data_저장"] = pd.DataFrame({
+        "작업명": [f"작업{i}" for i in range(작업수)],
+        "응답자(명)": [10] * 작업수,
+    })
+    state["개선계획_data_저장"] = pd.DataFrame({
+        "공정명": ["조립"] * 작업수,
+        "작업명": [f"작업{i}" for i in range(작업수)],
+        "개선방안": ["작업대 높이 조절"] * 작업수,
+    })
+    return state
+
+
+def _측정(func, 메모리):
+    if 메모리:
+        tracemalloc.start()
+    시작 = time.perf_counter()
+    result = func()
+    소요 = time.perf_counter() - 시작
+    최대 = None
+    if 메모리:
+        최대 = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return 소요, 최대, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="엑셀 보고서 엔진 벤치마크")
+    parser.add_argument("--작업수", type=int, default=500)
+    parser.add_argument("--메모리", action="store_true", help="tracemalloc으로 최대 메모리 측정 (느려짐)")
+    args = parser.parse_args()
+
+    state = 가상_조사(args.작업수)
+    print(f"작업 {args.작업수}개, 시트 약 {len(report_excel.보고서_섹션(state))}개")
+    print(f"{'엔진':<28}{'시간(초)':>10}{'최대 메모리(MB)':>18}{'파일 크기(KB)':>16}")
+
+    측정_목록 = [(engine, engine) for engine in report_excel.엑셀_엔진]
+    # 캐시 엔진은 한 작업만 바뀐 재생성도 측정
+    측정_목록.append(("cached (1개 작업 수정 후)", "cached"))
+
+    for 이름, engine in 측정_목록:
+        if 이름.startswith("cached ("):
+            key = "작업조건_data_작업0"
+            state[key] = state[key].copy()
+            state[key].loc[0, "단위작업명"] = "수정된 단위작업"
+        elif engine == "cached":
+            report_excel.시트_캐시_비우기()
+        소요, 최대, 크기 = _측정(lambda: report_excel.엑셀_보고서_생성(state, engine=engine), args.메모리)
+        최대_표시 = f"{최대 / 1024 / 1024:.1f}" if 최대 is not None else "-"
+        print(f"{이름:<28}{소요:>10.2f}{최대_표시:>18}{크기 / 1024:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""근골격계 부담작업 체크리스트 데이터 모델
+
+1호~11호 값은 3개 범주의 Categorical(int8 코드)로, 작업명은 Categorical로 보관한다.
+st.data_editor에는 문자열 컬럼으로 변환해서 넘긴다.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+호_컬럼 = [f"{i}호" for i in range(1, 12)]
+체크리스트_컬럼 = ["작업명", "단위작업명"] + 호_컬럼
+
+호_옵션 = [
+    "O(해당)",
+    "△(잠재위험)",
+    "X(미해당)"
+]
+기본값 = "X(미해당)"
+
+# 코드: O(해당)=0, △(잠재위험)=1, X(미해당)=2
+호_dtype = pd.CategoricalDtype(호_옵션)
+해당_코드 = 0
+잠재_코드 = 1
+미해당_코드 = 2
+
+_해시_속성 = "체크리스트_해시"
+_인덱스_캐시 = OrderedDict()
+_인덱스_캐시_크기 = 16
+_인덱스_캐시_lock = threading.Lock()  # 보고서 작업 스레드에서도 조회함
+
+
+def 빈_체크리스트(rows=5):
+    return pd.DataFrame(
+        columns=체크리스트_컬럼,
+        data=[["", ""] + [기본값] * 11 for _ in range(rows)]
+    )
+
+
+def 무효값_마스크(df):
+    """1호~11호 중 허용되지 않은 값 위치 (행 x 호) bool 배열"""
+    호_df = df.reindex(columns=호_컬럼)
+    return ~호_df.isin(호_옵션).to_numpy()
+
+
+def 호_코드(df):
+    """1호~11호 값을 (행 x 11) int8 코드 배열로 반환한다."""
+    codes = np.full((len(df), len(호_컬럼)), 미해당_코드, dtype=np.int8)
+    for j, col in enumerate(호_컬럼):
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if series.dtype == 호_dtype:
+            col_codes = series.cat.codes.to_numpy()
+        else:
+            col_codes = 호_dtype.categories.get_indexer(series)
+        codes[:, j] = np.where(col_codes < 0, 미해당_코드, col_codes)
+    return codes
+
+
+def 호_범주화(df):
+    """1호~11호 컬럼만 Categorical로 바꾼다. 입력 데이터프레임을 직접 수정한다."""
+    codes = 호_코드(df)
+    for j, col in enumerate(호_컬럼):
+        df[col] = pd.Categorical.from_codes(codes[:, j], dtype=호_dtype)
+    return df
+
+
+def 체크리스트_압축(df):
+    """검증/정규화 후 Categorical 기반의 압축 체크리스트로 변환한다.
+
+    허용되지 않은 1호~11호 값은 X(미해당)으로 바꾼다.
+    """
+    추가_컬럼 = [col for col in df.columns if col not in 체크리스트_컬럼]
+    result = 호_범주화(df.reindex(columns=체크리스트_컬럼 + 추가_컬럼).reset_index(drop=True))
+    result["작업명"] = result["작업명"].astype("category")
+    result["단위작업명"] = result["단위작업명"].astype(object)
+    result.attrs[_해시_속성] = 체크리스트_해시(result)
+    return result
+
+
+def 체크리스트_편집용(df):
+    """st.data_editor에 넘길 문자열 컬럼 데이터프레임"""
+    result = df.copy()
+    for col in ["작업명"] + 호_컬럼:
+        if col in result.columns and isinstance(result[col].dtype, pd.CategoricalDtype):
+            result[col] = result[col].astype(object)
+    return result
+
+
+def 체크리스트_해시(df):
+    hashed = pd.util.hash_pandas_object(df.reindex(columns=체크리스트_컬럼), index=False)
+    return hashlib.sha1(hashed.to_numpy().tobytes()).hexdigest()
+
+
+def _부담작업호_요약(df):
+    """행마다 '1호, 3호(잠재)' 형태의 부담작업(호) 문자열을 만든다."""
+    codes = 호_코드(df)
+    해당_라벨 = np.array(호_컬럼, dtype=object)
+    잠재_라벨 = np.array([f"{col}(잠재)" for col in 호_컬럼], dtype=object)
+    labels = np.where(codes == 해당_코드, 해당_라벨, np.where(codes == 잠재_코드, 잠재_라벨, ""))
+    return [", ".join(label for label in row if label) or "미해당" for row in labels]
+
+
+def _인덱스_생성(df, 해시):
+    작업명 = df["작업명"]
+    작업명_목록 = pd.unique(작업명.dropna()).tolist()
+    행_위치 = df.groupby(작업명, sort=False, observed=True).indices
+
+    단위작업명 = df["단위작업명"].to_numpy(dtype=object)
+    유효 = df["단위작업명"].notna().to_numpy() & (단위작업명 != "")
+    부담작업호 = _부담작업호_요약(df)
+
+    단위작업 = {}
+    for name in 작업명_목록:
+        positions = 행_위치.get(name, np.array([], dtype=np.intp))
+        단위작업[name] = [
+            {"단위작업명": 단위작업명[pos], "부담작업(호)": 부담작업호[pos]}
+            for pos in positions if 유효[pos]
+        ]
+
+    return {
+        "해시": 해시,
+        "작업명_목록": 작업명_목록,
+        "행_위치": 행_위치,
+        "단위작업": 단위작업,
+    }
+
+
+def 작업명_인덱스(df):
+    """작업명 → 행 위치, 단위작업별 부담작업(호) 인덱스
+
+    체크리스트 내용 해시를 키로 캐시하므로 체크리스트가 바뀔 때만 새로 만든다.
+    """
+    if df.empty or "작업명" not in df.columns:
+        return {"해시": "", "작업명_목록": [], "행_위치": {}, "단위작업": {}}
+
+    해시 = df.attrs.get(_해시_속성) or 체크리스트_해시(df)
+    with _인덱스_캐시_lock:
+        인덱스 = _인덱스_캐시.get(해시)
+        if 인덱스 is not None:
+            _인덱스_캐시.move_to_end(해시)
+            return 인덱스
+
+    인덱스 = _인덱스_생성(df.reset_index(drop=True), 해시)
+    with _인덱스_캐시_lock:
+        _인덱스_캐시[해시] = 인덱스
+        while len(_인덱스_캐시) > _인덱스_캐시_크기:
+            _인덱스_캐시.popitem(last=False)
+    return 인덱스
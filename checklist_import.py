@@ -0,0 +1,165 @@
+"""체크리스트 엑셀 스트리밍 가져오기
+
+openpyxl read-only 모드로 행을 순서대로 읽고, 일정 행 수(청크)마다 검증/정규화한다.
+여러 부서의 파일은 프로세스 풀에서 동시에 읽어 하나의 체크리스트로 합친다.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from checklist import 체크리스트_컬럼, 무효값_마스크, 호_범주화, 체크리스트_압축
+
+청크_크기 = 5000
+미리보기_행수 = 100
+오류행_표시_개수 = 20
+
+
+def _청크_정규화(rows, 행번호):
+    """행 목록을 검증/정규화하고 (청크, 오류 행번호 목록, 오류 칸 수)를 반환한다."""
+    chunk = pd.DataFrame.from_records(rows, columns=체크리스트_컬럼)
+    mask = 무효값_마스크(chunk)
+    오류_행 = [행번호[i] for i in mask.any(axis=1).nonzero()[0]]
+    return 호_범주화(chunk), 오류_행, int(mask.sum())
+
+
+def _xlsx_행(file):
+    """첫 번째로 전체 행수(추정)를, 이후 데이터 행을 yield 한다."""
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None or len(header) < len(체크리스트_컬럼):
+            raise ValueError("엑셀 파일의 컬럼이 13개 이상이어야 합니다. (작업명, 단위작업명, 1호~11호)")
+        전체 = ws.max_row - 1 if ws.max_row else None
+        yield 전체
+        for row in rows:
+            yield row
+    finally:
+        wb.close()
+
+
+def _xls_행(file):
+    # .xls는 openpyxl로 읽을 수 없으므로 한 번에 읽는다
+    df = pd.read_excel(file)
+    if len(df.columns) < len(체크리스트_컬럼):
+        raise ValueError("엑셀 파일의 컬럼이 13개 이상이어야 합니다. (작업명, 단위작업명, 1호~11호)")
+    yield len(df)
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        yield row
+
+
+def 체크리스트_스트리밍(file, 파일명="", chunk_size=청크_크기):
+    """청크 단위로 검증된 체크리스트를 내보내는 generator
+
+    각 청크마다 {"청크", "처리", "전체", "오류_행", "오류_칸"} 딕셔너리를 yield 한다.
+    행번호는 엑셀 기준(헤더 = 1행)이다.
+    """
+    행_iter = _xls_행(file) if 파일명.lower().endswith(".xls") else _xlsx_행(file)
+    전체 = next(행_iter)
+
+    컬럼수 = len(체크리스트_컬럼)
+    처리 = 0
+    rows = []
+    행번호 = []
+    for 엑셀_행번호, row in enumerate(행_iter, start=2):
+        row = tuple(row[:컬럼수]) + (None,) * (컬럼수 - len(row))
+        if all(value is None for value in row):
+            continue
+        rows.append(row)
+        행번호.append(엑셀_행번호)
+        if len(rows) >= chunk_size:
+            chunk, 오류_행, 오류_칸 = _청크_정규화(rows, 행번호)
+            처리 += len(rows)
+            rows, 행번호 = [], []
+            yield {"청크": chunk, "처리": 처리, "전체": 전체, "오류_행": 오류_행, "오류_칸": 오류_칸}
+
+    if rows:
+        chunk, 오류_행, 오류_칸 = _청크_정규화(rows, 행번호)
+        처리 += len(rows)
+        yield {"청크": chunk, "처리": 처리, "전체": 전체, "오류_행": 오류_행, "오류_칸": 오류_칸}
+
+
+def 체크리스트_가져오기(file, 파일명="", chunk_size=청크_크기, on_progress=None):
+    """엑셀 체크리스트 전체를 읽어 압축 체크리스트와 검증 요약을 반환한다.
+
+    on_progress(처리, 전체, 미리보기)는 청크마다 호출된다. 미리보기는 최대 미리보기_행수 행이다.
+    """
+    chunks = []
+    미리보기 = None
+    오류_행수 = 0
+    오류_칸수 = 0
+    오류_행_예시 = []
+
+    for 진행 in 체크리스트_스트리밍(file, 파일명, chunk_size):
+        chunks.append(진행["청크"])
+        오류_행수 += len(진행["오류_행"])
+        오류_칸수 += 진행["오류_칸"]
+        if len(오류_행_예시) < 오류행_표시_개수:
+            오류_행_예시.extend(진행["오류_행"][:오류행_표시_개수 - len(오류_행_예시)])
+        if 미리보기 is None:
+            미리보기 = 진행["청크"].head(미리보기_행수)
+        if on_progress is not None:
+            on_progress(진행["처리"], 진행["전체"], 미리보기)
+
+    if not chunks:
+        raise ValueError("엑셀 파일에 데이터 행이 없습니다.")
+
+    df = 체크리스트_압축(pd.concat(chunks, ignore_index=True))
+    return {
+        "df": df,
+        "미리보기": df.head(미리보기_행수),
+        "행수": len(df),
+        "오류_행수": 오류_행수,
+        "오류_칸수": 오류_칸수,
+        "오류_행_예시": 오류_행_예시,
+    }
+
+
+def _파일_가져오기(파일명, 내용):
+    """프로세스 풀 작업 단위: 파일 하나를 읽어 결과 또는 오류를 반환한다."""
+    시작 = time.perf_counter()
+    try:
+        결과 = 체크리스트_가져오기(BytesIO(내용), 파일명)
+        결과["오류"] = ""
+    except Exception as e:
+        결과 = {"df": None, "행수": 0, "오류_행수": 0, "오류_칸수": 0, "오류_행_예시": [], "오류": str(e)}
+    결과.pop("미리보기", None)
+    결과["파일명"] = 파일명
+    결과["소요시간"] = time.perf_counter() - 시작
+    return 결과
+
+
+def 여러_체크리스트_가져오기(files, max_workers=None):
+    """여러 엑셀 파일을 병렬로 읽어 출처파일 컬럼을 붙인 하나의 체크리스트로 합친다.
+
+    files는 (파일명, bytes) 목록이다. (병합 체크리스트, 파일별 결과 목록)을 반환하며
+    읽지 못한 파일은 병합에서 빠지고 결과의 "오류"에 사유가 남는다.
+    """
+    if not files:
+        return None, []
+
+    if max_workers is None:
+        max_workers = min(len(files), os.cpu_count() or 1)
+
+    if max_workers <= 1 or len(files) == 1:
+        파일별_결과 = [_파일_가져오기(파일명, 내용) for 파일명, 내용 in files]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_파일_가져오기, 파일명, 내용) for 파일명, 내용 in files]
+            파일별_결과 = [future.result() for future in futures]
+
+    frames = []
+    for 결과 in 파일별_결과:
+        if 결과["df"] is not None:
+            frames.append(결과.pop("df").assign(출처파일=결과["파일명"]))
+        else:
+            결과.pop("df")
+
+    if not frames:
+        return None, 파일별_결과
+    return 체크리스트_압축(pd.concat(frames, ignore_index=True)), 파일별_결과
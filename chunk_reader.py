@@ -0,0 +1,75 @@
+"""CSV/엑셀 파일을 청크 단위로 읽는 reader
+
+설문 원자료(증상조사)와 자세 관측 기록(OWAS)처럼 행이 많은 파일을 한 번에 메모리에 올리지 않고
+머리글과 행 목록 청크로 나누어 읽는다. 머리글 해석과 값 정규화는 각 모듈에서 한다.
+"""
+import codecs
+
+import pandas as pd
+from openpyxl import load_workbook
+
+청크_크기 = 5000
+
+
+def _인코딩(file):
+    """CSV 앞부분으로 UTF-8/CP949를 고른다."""
+    위치 = file.tell()
+    head = file.read(65536)
+    file.seek(위치)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp949"
+
+
+def _csv_청크(file, chunk_size):
+    """첫 번째로 머리글을, 이후 행 목록(청크)을 yield 한다."""
+    reader = pd.read_csv(file, dtype=object, chunksize=chunk_size, encoding=_인코딩(file))
+    header_보냄 = False
+    for chunk in reader:
+        if not header_보냄:
+            yield list(chunk.columns)
+            header_보냄 = True
+        yield chunk.astype(object).where(chunk.notna(), None).to_numpy().tolist()
+    if not header_보냄:
+        raise ValueError("파일에 데이터가 없습니다.")
+
+
+def _xlsx_청크(file, chunk_size):
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("파일에 데이터가 없습니다.")
+        yield list(header)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        wb.close()
+
+
+def _xls_청크(file, chunk_size):
+    # .xls는 openpyxl로 읽을 수 없으므로 한 번에 읽는다
+    df = pd.read_excel(file, dtype=object)
+    yield list(df.columns)
+    values = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+    for start in range(0, len(values), chunk_size):
+        yield values[start:start + chunk_size]
+
+
+def 행_청크(file, 파일명="", chunk_size=청크_크기):
+    """CSV/엑셀 파일의 머리글(첫 번째)과 행 목록 청크(이후)를 내보내는 iterator (확장자로 형식 판단)"""
+    이름 = 파일명.lower()
+    if 이름.endswith(".csv"):
+        return _csv_청크(file, chunk_size)
+    if 이름.endswith(".xls"):
+        return _xls_청크(file, chunk_size)
+    return _xlsx_청크(file, chunk_size)
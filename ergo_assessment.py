@@ -0,0 +1,350 @@
+"""정밀조사 작업분석 평가도구 (RULA, REBA, NIOSH 들기작업 지침)
+
+작업 여러 개의 자세 각도/중량 입력을 데이터프레임 하나로 받아 열 단위 배열 연산으로 한 번에 점수를 구한다.
+RULA/REBA 점수표는 모듈을 읽을 때 numpy 배열로 만들어 두고, 부위별 점수를 인덱스로 써서 한 번에 찾는다.
+결과는 정밀조사 원인분석 표의 "작업분석 및 평가도구 / 분석결과 / 만점" 행으로 바꿔 넣을 수 있다.
+
+각도는 도(°) 단위이고 굴곡(앞으로 굽힘)은 +, 신전(뒤로 젖힘)은 -로 입력한다.
+"""
+import numpy as np
+import pandas as pd
+
+from survey_columns import 정밀_원인분석_컬럼
+
+# ---------------------------------------------------------------------------
+# 점수표 (McAtamney & Corlett 1993, Hignett & McAtamney 2000)
+# ---------------------------------------------------------------------------
+
+# RULA 표 A [상완 1-6][하완 1-3][손목 1-4][손목 비틀림 1-2]
+_RULA_A = np.array([
+    [[[1, 2], [2, 2], [2, 3], [3, 3]], [[2, 2], [2, 2], [3, 3], [3, 3]], [[2, 3], [3, 3], [3, 3], [4, 4]]],
+    [[[2, 3], [3, 3], [3, 3], [4, 4]], [[3, 3], [3, 3], [3, 4], [4, 4]], [[3, 4], [4, 4], [4, 4], [5, 5]]],
+    [[[3, 3], [4, 4], [4, 4], [5, 5]], [[3, 4], [4, 4], [4, 4], [5, 5]], [[4, 4], [4, 4], [4, 5], [5, 5]]],
+    [[[4, 4], [4, 4], [4, 5], [5, 5]], [[4, 4], [4, 4], [4, 5], [5, 5]], [[4, 4], [4, 5], [5, 5], [6, 6]]],
+    [[[5, 5], [5, 5], [5, 6], [6, 7]], [[5, 6], [6, 6], [6, 7], [7, 7]], [[6, 6], [6, 7], [7, 7], [7, 8]]],
+    [[[7, 7], [7, 7], [7, 8], [8, 9]], [[8, 8], [8, 8], [8, 9], [9, 9]], [[9, 9], [9, 9], [9, 9], [9, 9]]],
+], dtype=np.int8)
+
+# RULA 표 B [목 1-6][몸통 1-6][다리 1-2]
+_RULA_B = np.array([
+    [[1, 3], [2, 3], [3, 4], [5, 5], [6, 6], [7, 7]],
+    [[2, 3], [2, 3], [4, 5], [5, 5], [6, 7], [7, 7]],
+    [[3, 3], [3, 4], [4, 5], [5, 6], [6, 7], [7, 7]],
+    [[5, 5], [5, 6], [6, 7], [7, 7], [7, 7], [8, 8]],
+    [[7, 7], [7, 7], [7, 8], [8, 8], [8, 8], [8, 8]],
+    [[8, 8], [8, 8], [8, 8], [8, 9], [9, 9], [9, 9]],
+], dtype=np.int8)
+
+# RULA 표 C [상지 점수 1-8+][목·몸통·다리 점수 1-7+]
+_RULA_C = np.array([
+    [1, 2, 3, 3, 4, 5, 5],
+    [2, 2, 3, 4, 4, 5, 5],
+    [3, 3, 3, 4, 4, 5, 6],
+    [3, 3, 3, 4, 5, 6, 6],
+    [4, 4, 4, 5, 6, 7, 7],
+    [4, 4, 5, 6, 6, 7, 7],
+    [5, 5, 6, 6, 7, 7, 7],
+    [5, 5, 6, 7, 7, 7, 7],
+], dtype=np.int8)
+
+# REBA 표 A [몸통 1-5][목 1-3][다리 1-4]
+_REBA_A = np.array([
+    [[1, 2, 3, 4], [1, 2, 3, 4], [3, 3, 5, 6]],
+    [[2, 3, 4, 5], [3, 4, 5, 6], [4, 5, 6, 7]],
+    [[2, 4, 5, 6], [4, 5, 6, 7], [5, 6, 7, 8]],
+    [[3, 5, 6, 7], [5, 6, 7, 8], [6, 7, 8, 9]],
+    [[4, 6, 7, 8], [6, 7, 8, 9], [7, 8, 9, 9]],
+], dtype=np.int8)
+
+# REBA 표 B [상완 1-6][하완 1-2][손목 1-3]
+_REBA_B = np.array([
+    [[1, 2, 2], [1, 2, 3]],
+    [[1, 2, 3], [2, 3, 4]],
+    [[3, 4, 5], [4, 5, 5]],
+    [[4, 5, 5], [5, 6, 7]],
+    [[6, 7, 8], [7, 8, 8]],
+    [[7, 8, 8], [8, 9, 9]],
+], dtype=np.int8)
+
+# REBA 표 C [점수 A 1-12][점수 B 1-12]
+_REBA_C = np.array([
+    [1, 1, 1, 2, 3, 3, 4, 5, 6, 7, 7, 7],
+    [1, 2, 2, 3, 4, 4, 5, 6, 6, 7, 7, 8],
+    [2, 3, 3, 3, 4, 5, 6, 7, 7, 8, 8, 8],
+    [3, 4, 4, 4, 5, 6, 7, 8, 8, 9, 9, 9],
+    [4, 4, 4, 5, 6, 7, 8, 8, 9, 9, 9, 9],
+    [6, 6, 6, 7, 8, 8, 9, 9, 10, 10, 10, 10],
+    [7, 7, 7, 8, 9, 9, 9, 10, 10, 11, 11, 11],
+    [8, 8, 8, 9, 10, 10, 10, 10, 10, 11, 11, 11],
+    [9, 9, 9, 10, 10, 10, 11, 11, 11, 12, 12, 12],
+    [10, 10, 10, 11, 11, 11, 11, 12, 12, 12, 12, 12],
+    [11, 11, 11, 11, 12, 12, 12, 12, 12, 12, 12, 12],
+    [12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12],
+], dtype=np.int8)
+
+# NIOSH 빈도계수 [빈도 구간][작업시간 1시간/2시간/8시간 이하][수직높이 75cm 미만/이상]
+_NIOSH_빈도 = np.array([0.2, 0.5, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15])
+_NIOSH_FM = np.array([
+    [[1.00, 1.00], [0.95, 0.95], [0.85, 0.85]],
+    [[0.97, 0.97], [0.92, 0.92], [0.81, 0.81]],
+    [[0.94, 0.94], [0.88, 0.88], [0.75, 0.75]],
+    [[0.91, 0.91], [0.84, 0.84], [0.65, 0.65]],
+    [[0.88, 0.88], [0.79, 0.79], [0.55, 0.55]],
+    [[0.84, 0.84], [0.72, 0.72], [0.45, 0.45]],
+    [[0.80, 0.80], [0.60, 0.60], [0.35, 0.35]],
+    [[0.75, 0.75], [0.50, 0.50], [0.27, 0.27]],
+    [[0.70, 0.70], [0.42, 0.42], [0.22, 0.22]],
+    [[0.60, 0.60], [0.35, 0.35], [0.18, 0.18]],
+    [[0.52, 0.52], [0.30, 0.30], [0.00, 0.15]],
+    [[0.45, 0.45], [0.26, 0.26], [0.00, 0.13]],
+    [[0.41, 0.41], [0.00, 0.23], [0.00, 0.00]],
+    [[0.37, 0.37], [0.00, 0.21], [0.00, 0.00]],
+    [[0.00, 0.34], [0.00, 0.00], [0.00, 0.00]],
+    [[0.00, 0.31], [0.00, 0.00], [0.00, 0.00]],
+    [[0.00, 0.28], [0.00, 0.00], [0.00, 0.00]],
+    [[0.00, 0.00], [0.00, 0.00], [0.00, 0.00]],  # 15회/분 초과
+])
+# NIOSH 손잡이계수 [양호/보통/불량][수직높이 75cm 미만/이상]
+_NIOSH_CM = np.array([[1.00, 1.00], [0.95, 1.00], [0.90, 0.90]])
+NIOSH_부하상수 = 23.0  # kg
+
+# ---------------------------------------------------------------------------
+# 입력 열: (열 이름, 기본값). 기본값이 목록이면 그 보기 중에서 고르는 열
+# ---------------------------------------------------------------------------
+작업_열 = "평가 작업"
+작업시간_보기 = ["1시간 이하", "2시간 이하", "8시간 이하"]
+
+RULA_입력 = [
+    (작업_열, ""),
+    ("상완 각도", 0.0), ("어깨 들림", False), ("상완 외전", False), ("팔 지지", False),
+    ("하완 각도", 80.0), ("하완 중앙선 넘음", False),
+    ("손목 각도", 0.0), ("손목 편위", False), ("손목 비틀림 끝", False),
+    ("목 각도", 0.0), ("목 비틀림", False), ("목 옆굽힘", False),
+    ("몸통 각도", 0.0), ("몸통 비틀림", False), ("몸통 옆굽힘", False),
+    ("다리 불안정", False),
+    ("중량(kg)", 0.0), ("정적/반복", False), ("충격", False),
+]
+
+REBA_입력 = [
+    (작업_열, ""),
+    ("몸통 각도", 0.0), ("몸통 비틀림/옆굽힘", False),
+    ("목 각도", 0.0), ("목 비틀림/옆굽힘", False),
+    ("한발 지지", False), ("무릎 각도", 0.0),
+    ("중량(kg)", 0.0), ("충격", False),
+    ("상완 각도", 0.0), ("어깨 들림", False), ("상완 외전/회전", False), ("팔 지지", False),
+    ("하완 각도", 80.0),
+    ("손목 각도", 0.0), ("손목 비틀림/편위", False),
+    ("손잡이", ["양호", "보통", "불량", "부적절"]),
+    ("정적 자세", False), ("반복 동작", False), ("급격한 자세 변화", False),
+]
+
+NIOSH_입력 = [
+    (작업_열, ""),
+    ("중량(kg)", 0.0),
+    ("수평거리 H(cm)", 25.0), ("수직높이 V(cm)", 75.0), ("이동거리 D(cm)", 25.0),
+    ("비대칭각 A(°)", 0.0), ("빈도(회/분)", 1.0),
+    ("작업시간", 작업시간_보기),
+    ("손잡이", ["양호", "보통", "불량"]),
+]
+
+
+def 빈_입력(입력, 행수=1):
+    """입력 열 기본값으로 채운 입력 표"""
+    return pd.DataFrame({
+        열: [기본[0] if isinstance(기본, list) else 기본] * 행수 for 열, 기본 in 입력
+    })
+
+
+def _입력_배열(df, 입력):
+    """입력 표를 열 이름 -> numpy 배열로 바꾼다. 빈 칸은 기본값, 보기 열은 보기 순서 코드"""
+    values = {}
+    for 열, 기본 in 입력:
+        series = df[열] if 열 in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if isinstance(기본, list):
+            codes = pd.Categorical(series, categories=기본).codes
+            values[열] = np.where(codes < 0, 0, codes).astype(np.int8)
+        elif isinstance(기본, bool):
+            values[열] = series.fillna(False).astype(bool).to_numpy()
+        elif isinstance(기본, float):
+            values[열] = pd.to_numeric(series, errors="coerce").fillna(기본).to_numpy(dtype=float)
+        else:
+            values[열] = series.fillna("").astype(str).str.strip().to_numpy(dtype=object)
+    return values
+
+
+def _구간(값, 경계, 점수):
+    """값이 경계[i] 이하인 첫 구간의 점수 (마지막 경계보다 크면 마지막 점수)"""
+    return np.asarray(점수)[np.searchsorted(경계, 값, side="left")]
+
+
+def _상완_점수(각도, 어깨_들림, 외전, 지지):
+    # -20~20° 1점, 20° 넘는 신전 또는 20~45° 굴곡 2점, 45~90° 3점, 90° 초과 4점
+    점수 = np.where(각도 < -20, 2, _구간(각도, [20, 45, 90], [1, 2, 3, 4]))
+    return np.clip(점수 + 어깨_들림 + 외전 - 지지, 1, 6)
+
+
+def _하완_기본(각도):
+    # 60~100° 1점, 그 밖 2점
+    return np.where((각도 >= 60) & (각도 <= 100), 1, 2)
+
+
+def _결과_행(도구, 작업, 만점, 설명):
+    """원인분석 표에 들어갈 열 (작업 설명이 있으면 "도구 - 작업", 없으면 "도구 #입력 행 번호")
+
+    원인분석_반영은 이 이름으로 행을 찾으므로, 이름 없는 작업끼리 같은 행을 덮어쓰지 않도록 행 번호를 붙인다.
+    """
+    return {
+        "작업분석 및 평가도구": [
+            f"{도구} - {이름}" if 이름 else f"{도구} #{번호}" for 번호, 이름 in enumerate(작업, 1)
+        ],
+        "분석결과": 설명,
+        "만점": [만점] * len(작업),
+    }
+
+
+def RULA_평가(df):
+    """RULA 점수 (최종점수 1~7점, 조치수준 1~4)"""
+    v = _입력_배열(df, RULA_입력)
+    상완 = _상완_점수(v["상완 각도"], v["어깨 들림"], v["상완 외전"], v["팔 지지"])
+    하완 = np.clip(_하완_기본(v["하완 각도"]) + v["하완 중앙선 넘음"], 1, 3)
+    손목_각도 = np.abs(v["손목 각도"])
+    손목 = np.clip(np.where(손목_각도 == 0, 1, np.where(손목_각도 <= 15, 2, 3)) + v["손목 편위"], 1, 4)
+    비틀림 = 1 + v["손목 비틀림 끝"]
+
+    # 목: 0~10° 1점, 10~20° 2점, 20° 초과 3점, 신전 4점
+    목 = np.where(v["목 각도"] < 0, 4, _구간(v["목 각도"], [10, 20], [1, 2, 3]))
+    목 = np.clip(목 + v["목 비틀림"] + v["목 옆굽힘"], 1, 6)
+    # 몸통: 바로 섬 1점, 0~20° 2점 (신전 포함), 20~60° 3점, 60° 초과 4점
+    몸통_각도 = v["몸통 각도"]
+    몸통 = np.where(몸통_각도 == 0, 1, np.where(몸통_각도 < 0, 2, _구간(몸통_각도, [20, 60], [2, 3, 4])))
+    몸통 = np.clip(몸통 + v["몸통 비틀림"] + v["몸통 옆굽힘"], 1, 6)
+    다리 = 1 + v["다리 불안정"]
+
+    # 근육 사용(정적/반복 +1), 힘/부하(2kg 미만 0, 2~10kg 1 (정적/반복이면 2),
+    # 10kg 초과 간헐 2 (정적/반복이면 3), 충격 3)
+    근육 = v["정적/반복"].astype(np.int8)
+    중량 = v["중량(kg)"]
+    부하 = np.where(중량 < 2, 0, np.minimum(np.where(중량 <= 10, 1 + 근육, 2 + 근육), 3))
+    부하 = np.where(v["충격"], 3, 부하)
+
+    점수A = _RULA_A[상완 - 1, 하완 - 1, 손목 - 1, 비틀림 - 1] + 근육 + 부하
+    점수B = _RULA_B[목 - 1, 몸통 - 1, 다리 - 1] + 근육 + 부하
+    최종 = _RULA_C[np.clip(점수A, 1, 8) - 1, np.clip(점수B, 1, 7) - 1]
+    조치수준 = _구간(최종, [2, 4, 6], [1, 2, 3, 4])
+    조치 = _구간(조치수준, [1, 2, 3], ["수용 가능", "추가 조사 필요", "빠른 개선 필요", "즉시 개선 필요"])
+
+    설명 = [f"{점수}점 (조치수준 {수준}: {내용})" for 점수, 수준, 내용 in zip(최종, 조치수준, 조치)]
+    return pd.DataFrame({
+        "점수A(상지)": 점수A, "점수B(목·몸통·다리)": 점수B, "최종점수": 최종, "조치수준": 조치수준,
+        **_결과_행("RULA", v[작업_열], "7", 설명),
+    }, index=df.index)
+
+
+def REBA_평가(df):
+    """REBA 점수 (최종점수 1~15점, 위험수준 5단계)"""
+    v = _입력_배열(df, REBA_입력)
+    # 몸통: 바로 섬 1점, 굴곡/신전 20° 이하 2점, 굴곡 20~60° 또는 신전 20° 초과 3점, 굴곡 60° 초과 4점
+    몸통_각도 = v["몸통 각도"]
+    몸통 = np.where(
+        몸통_각도 == 0, 1,
+        np.where(몸통_각도 < 0, np.where(몸통_각도 >= -20, 2, 3), _구간(몸통_각도, [20, 60], [2, 3, 4])),
+    )
+    몸통 = np.clip(몸통 + v["몸통 비틀림/옆굽힘"], 1, 5)
+    # 목: 굴곡 0~20° 1점, 20° 초과 또는 신전 2점
+    목 = np.where((v["목 각도"] < 0) | (v["목 각도"] > 20), 2, 1)
+    목 = np.clip(목 + v["목 비틀림/옆굽힘"], 1, 3)
+    # 다리: 양발 지지 1점, 한발 2점, 무릎 30~60° +1, 60° 초과 +2
+    다리 = 1 + v["한발 지지"] + _구간(v["무릎 각도"], [30, 60], [0, 1, 2])
+    다리 = np.clip(다리, 1, 4)
+    중량 = v["중량(kg)"]
+    부하 = np.where(중량 < 5, 0, np.where(중량 <= 10, 1, 2)) + v["충격"]
+
+    상완 = _상완_점수(v["상완 각도"], v["어깨 들림"], v["상완 외전/회전"], v["팔 지지"])
+    하완 = _하완_기본(v["하완 각도"])
+    손목 = np.clip(np.where(np.abs(v["손목 각도"]) <= 15, 1, 2) + v["손목 비틀림/편위"], 1, 3)
+
+    점수A = _REBA_A[몸통 - 1, 목 - 1, 다리 - 1] + 부하
+    점수B = _REBA_B[상완 - 1, 하완 - 1, 손목 - 1] + v["손잡이"]
+    점수C = _REBA_C[np.clip(점수A, 1, 12) - 1, np.clip(점수B, 1, 12) - 1]
+    활동 = v["정적 자세"].astype(np.int8) + v["반복 동작"] + v["급격한 자세 변화"]
+    최종 = np.clip(점수C + 활동, 1, 15)
+    위험 = _구간(최종, [1, 3, 7, 10], ["무시 가능", "낮음", "보통", "높음", "매우 높음"])
+
+    설명 = [f"{점수}점 (위험수준: {내용})" for 점수, 내용 in zip(최종, 위험)]
+    return pd.DataFrame({
+        "점수A": 점수A, "점수B": 점수B, "점수C": 점수C, "최종점수": 최종, "위험수준": 위험,
+        **_결과_행("REBA", v[작업_열], "15", 설명),
+    }, index=df.index)
+
+
+def NIOSH_평가(df):
+    """NIOSH 들기작업 지침 (권장무게한계 RWL, 들기지수 LI = 중량 / RWL)"""
+    v = _입력_배열(df, NIOSH_입력)
+    H = np.maximum(v["수평거리 H(cm)"], 25)
+    V = v["수직높이 V(cm)"]
+    D = np.maximum(v["이동거리 D(cm)"], 25)
+    A = np.abs(v["비대칭각 A(°)"])
+    높이_구분 = (V >= 75).astype(np.int8)
+
+    HM = np.where(H > 63, 0.0, 25 / H)
+    VM = np.where((V < 0) | (V > 175), 0.0, 1 - 0.003 * np.abs(V - 75))
+    DM = np.where(D > 175, 0.0, 0.82 + 4.5 / D)
+    AM = np.where(A > 135, 0.0, 1 - 0.0032 * A)
+    # 표에 없는 빈도는 바로 위 빈도 값을 쓴다 (0.2회/분 미만은 0.2회/분)
+    빈도_구간 = np.searchsorted(_NIOSH_빈도, v["빈도(회/분)"], side="left")
+    FM = _NIOSH_FM[빈도_구간, v["작업시간"], 높이_구분]
+    CM = _NIOSH_CM[v["손잡이"], 높이_구분]
+
+    RWL = np.round(NIOSH_부하상수 * HM * VM * DM * AM * FM * CM, 2)
+    중량 = v["중량(kg)"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        LI = np.where(RWL > 0, np.round(중량 / RWL, 2), np.inf)
+    위험 = np.where(LI <= 1, "안전", np.where(LI <= 3, "위험 증가", "위험 높음"))
+
+    설명 = [
+        f"LI {li:.2f} (중량 {w:g}kg / RWL {rwl:.2f}kg): {내용}" if np.isfinite(li)
+        else f"RWL 0kg - 들기작업 불가 조건 (중량 {w:g}kg)"
+        for li, w, rwl, 내용 in zip(LI, 중량, RWL, 위험)
+    ]
+    return pd.DataFrame({
+        "HM": HM.round(3), "VM": VM.round(3), "DM": DM.round(3), "AM": AM.round(3), "FM": FM, "CM": CM,
+        "RWL(kg)": RWL, "LI": LI, "위험수준": 위험,
+        **_결과_행("NIOSH 들기작업", v[작업_열], "LI 1.0 이하", 설명),
+    }, index=df.index)
+
+
+# 이름 -> (입력 열, 평가 함수)
+평가도구 = {
+    "RULA": (RULA_입력, RULA_평가),
+    "REBA": (REBA_입력, REBA_평가),
+    "NIOSH 들기작업": (NIOSH_입력, NIOSH_평가),
+}
+
+
+def 원인분석_반영(원인분석_df, 결과):
+    """정밀조사 원인분석 표에 평가 결과 행을 넣은 새 표를 반환한다.
+
+    평가도구 이름이 같은 행이 있으면 그 행을 고치고, 없으면 평가도구가 빈 첫 행을 채우고,
+    빈 행도 없으면 표 끝에 붙인다. 같은 입력으로 다시 계산하면 표가 바뀌지 않는다.
+    """
+    if isinstance(원인분석_df, pd.DataFrame) and not 원인분석_df.empty:
+        표 = 원인분석_df.reindex(columns=정밀_원인분석_컬럼).astype(object).fillna("").reset_index(drop=True)
+    else:
+        표 = pd.DataFrame([[""] * len(정밀_원인분석_컬럼)] * 7, columns=정밀_원인분석_컬럼, dtype=object)
+
+    행들 = 결과[정밀_원인분석_컬럼].to_numpy(dtype=object)
+    도구_열 = 표["작업분석 및 평가도구"].astype(str).str.strip()
+    for 행 in 행들:
+        같은 = np.flatnonzero(도구_열.to_numpy() == 행[0])
+        빈 = np.flatnonzero(도구_열.to_numpy() == "")
+        if len(같은):
+            위치 = 같은[0]
+        elif len(빈):
+            위치 = 빈[0]
+        else:
+            위치 = len(표)
+            표.loc[위치] = ""
+            도구_열.loc[위치] = ""
+        표.loc[위치, 정밀_원인분석_컬럼] = 행
+        도구_열.loc[위치] = 행[0]
+    return 표
@@ -0,0 +1,86 @@
+"""샘플/빈 입력 양식 엑셀
+
+샘플 체크리스트와 화면별 빈 입력 양식 엑셀은 내용이 바뀌지 않으므로,
+처음 요청할 때 한 번만 만들고 이후에는 프로세스 전체가 같은 bytes를 쓴다.
+"""
+import threading
+from io import BytesIO
+
+import pandas as pd
+
+from checklist import 체크리스트_컬럼
+from survey_columns import 작업조건_컬럼, 원인분석_컬럼, 개선계획_컬럼
+
+증상조사_컬럼 = {
+    "기초현황": ["작업명", "응답자(명)", "나이", "근속년수", "남자(명)", "여자(명)", "합계"],
+    "작업기간": [
+        "작업명", "<1년", "<3년", "<5년", "≥5년", "무응답", "합계",
+        "이전<1년", "이전<3년", "이전<5년", "이전≥5년", "이전무응답", "이전합계",
+    ],
+    "육체적부담": ["작업명", "전혀 힘들지 않음", "견딜만 함", "약간 힘듦", "힘듦", "매우 힘듦", "합계"],
+    "통증호소자": ["작업명", "구분", "목", "어깨", "팔/팔꿈치", "손/손목/손가락", "허리", "다리/발", "전체"],
+}
+
+_샘플_데이터 = {
+    "작업명": ["조립작업", "조립작업", "포장작업", "포장작업", "운반작업"],
+    "단위작업명": ["부품조립", "나사체결", "제품포장", "박스적재", "대차운반"],
+    "1호": ["O(해당)", "X(미해당)", "X(미해당)", "O(해당)", "X(미해당)"],
+    "2호": ["X(미해당)", "O(해당)", "X(미해당)", "X(미해당)", "O(해당)"],
+    "3호": ["△(잠재위험)", "X(미해당)", "O(해당)", "X(미해당)", "X(미해당)"],
+    "4호": ["X(미해당)", "X(미해당)", "X(미해당)", "△(잠재위험)", "X(미해당)"],
+    "5호": ["X(미해당)", "△(잠재위험)", "X(미해당)", "X(미해당)", "O(해당)"],
+    "6호": ["X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)"],
+    "7호": ["X(미해당)", "X(미해당)", "△(잠재위험)", "X(미해당)", "X(미해당)"],
+    "8호": ["X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)"],
+    "9호": ["X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)"],
+    "10호": ["X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)", "X(미해당)"],
+    "11호": ["O(해당)", "X(미해당)", "X(미해당)", "O(해당)", "△(잠재위험)"],
+}
+
+_캐시 = {}
+_캐시_lock = threading.RLock()  # 샘플 템플릿을 만들면서 샘플 데이터를 다시 조회함
+
+
+def _캐시됨(이름, build):
+    value = _캐시.get(이름)
+    if value is None:
+        with _캐시_lock:
+            value = _캐시.get(이름)
+            if value is None:
+                value = _캐시[이름] = build()
+    return value
+
+
+def 샘플_체크리스트():
+    """샘플 체크리스트 데이터프레임 (공유 객체이므로 수정하지 말 것)"""
+    return _캐시됨("샘플_데이터", lambda: pd.DataFrame(_샘플_데이터))
+
+
+def _빈_표(columns):
+    return pd.DataFrame(columns=columns)
+
+
+# 이름 -> (표시 이름, 파일명, [(시트명, 데이터프레임)]을 만드는 함수)
+템플릿 = {
+    "체크리스트_샘플": ("체크리스트 샘플", "체크리스트_샘플.xlsx", lambda: [("체크리스트", 샘플_체크리스트())]),
+    "체크리스트": ("체크리스트", "체크리스트_양식.xlsx", lambda: [("체크리스트", _빈_표(체크리스트_컬럼))]),
+    "작업조건": ("작업조건조사", "작업조건조사_양식.xlsx", lambda: [("작업조건", _빈_표(["작업명"] + 작업조건_컬럼))]),
+    "원인분석": ("원인분석", "원인분석_양식.xlsx", lambda: [("원인분석", _빈_표(["작업명"] + 원인분석_컬럼))]),
+    "증상조사": ("증상조사", "증상조사_양식.xlsx", lambda: [
+        (시트, _빈_표(columns)) for 시트, columns in 증상조사_컬럼.items()
+    ]),
+    "개선계획": ("작업환경개선계획서", "작업환경개선계획서_양식.xlsx", lambda: [("개선계획", _빈_표(개선계획_컬럼))]),
+}
+
+
+def _엑셀(sheets):
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for 시트, df in sheets:
+            df.to_excel(writer, sheet_name=시트, index=False)
+    return output.getvalue()
+
+
+def 템플릿_파일(이름):
+    """템플릿 xlsx bytes (프로세스당 한 번만 생성)"""
+    return _캐시됨(이름, lambda: _엑셀(템플릿[이름][2]()))
@@ -0,0 +1,222 @@
+"""OWAS 작업자세 관측 기록 분석
+
+교대 시간 내내 몇 초 간격으로 기록한 자세 관측 기록(CSV/엑셀, 관측 하나가 한 행)을 청크 단위로 읽는다.
+허리/팔/다리/하중 코드 조합(4×3×7×3 = 252가지)을 미리 만든 조치수준 표에서 찾고,
+조합별 관측수와 시간만 고정 크기 배열에 더해 가므로 기록이 길어도 메모리 사용량은 청크 하나 크기로 유지된다.
+"""
+import numpy as np
+import pandas as pd
+
+from chunk_reader import 청크_크기, 행_청크
+from survey_columns import 정밀_OWAS_컬럼, 정밀_원인분석_컬럼
+
+# 부위별 자세 코드 (1부터)
+OWAS_부위 = {
+    "허리": ["똑바로 폄", "앞/뒤로 굽힘", "비틀거나 옆으로 굽힘", "굽히고 비틀음"],
+    "팔": ["양팔 어깨 아래", "한 팔 어깨 위", "양팔 어깨 위"],
+    "다리": ["앉음", "두 다리로 섬", "한 다리로 섬", "두 무릎 굽힘", "한 무릎 굽힘", "무릎 꿇음", "걸음"],
+    "하중": ["10kg 이하", "10~20kg", "20kg 초과"],
+}
+_부위_크기 = tuple(len(보기) for 보기 in OWAS_부위.values())
+
+조치수준 = [
+    "AC1 (조치 불필요)",
+    "AC2 (가까운 시일 내 개선)",
+    "AC3 (가능한 빨리 개선)",
+    "AC4 (즉시 개선)",
+]
+
+# 조치수준 표 [허리 1-4][팔 1-3][다리 1-7][하중 1-3] (Karhu 등 1977)
+_조치수준_표 = np.array([
+    [
+        [[1, 1, 1], [1, 1, 1], [1, 1, 1], [2, 2, 2], [2, 2, 2], [1, 1, 1], [1, 1, 1]],
+        [[1, 1, 1], [1, 1, 1], [1, 1, 1], [2, 2, 2], [2, 2, 2], [1, 1, 1], [1, 1, 1]],
+        [[1, 1, 1], [1, 1, 1], [1, 1, 1], [2, 2, 2], [2, 2, 3], [1, 1, 1], [1, 1, 2]],
+    ],
+    [
+        [[2, 2, 3], [2, 2, 3], [2, 2, 3], [3, 3, 3], [3, 3, 3], [2, 2, 2], [2, 3, 3]],
+        [[2, 2, 3], [2, 2, 3], [2, 3, 3], [3, 4, 4], [3, 4, 4], [3, 3, 4], [2, 3, 4]],
+        [[3, 3, 4], [2, 2, 3], [3, 3, 3], [3, 4, 4], [4, 4, 4], [4, 4, 4], [2, 3, 4]],
+    ],
+    [
+        [[1, 1, 1], [1, 1, 1], [1, 1, 2], [3, 3, 3], [4, 4, 4], [1, 1, 1], [1, 1, 1]],
+        [[2, 2, 3], [1, 1, 1], [1, 1, 2], [4, 4, 4], [4, 4, 4], [3, 3, 3], [1, 1, 1]],
+        [[2, 2, 3], [1, 1, 1], [2, 3, 3], [4, 4, 4], [4, 4, 4], [4, 4, 4], [1, 1, 1]],
+    ],
+    [
+        [[2, 3, 3], [2, 2, 3], [2, 2, 3], [4, 4, 4], [4, 4, 4], [4, 4, 4], [2, 3, 4]],
+        [[3, 3, 4], [2, 3, 4], [3, 3, 3], [4, 4, 4], [4, 4, 4], [4, 4, 4], [2, 3, 4]],
+        [[4, 4, 4], [2, 3, 4], [3, 3, 4], [4, 4, 4], [4, 4, 4], [4, 4, 4], [2, 3, 4]],
+    ],
+], dtype=np.int8)
+# 조합 번호(0~251) -> 조치수준 코드(0~3)
+_조합_조치 = _조치수준_표.reshape(-1) - 1
+조합_수 = _조합_조치.size
+
+# 표준 열 이름 -> 관측 기록에서 허용하는 머리글 (공백/밑줄/대소문자 무시)
+관측_열 = {
+    "허리": ["허리", "등", "몸통", "back"],
+    "팔": ["팔", "상지", "arms"],
+    "다리": ["다리", "하지", "legs"],
+    "하중": ["하중", "무게", "중량", "힘", "load"],
+    "코드": ["OWAS", "OWAS코드", "자세코드", "코드", "code"],
+    "시각": ["시각", "시간", "관측시각", "time", "timestamp"],
+    "지속시간": ["지속시간", "지속시간(초)", "duration"],
+}
+
+
+def _머리글(name):
+    return str(name).replace(" ", "").replace("_", "").lower() if name is not None else ""
+
+
+def _머리글_대응(header):
+    """관측 기록 머리글 -> {표준 열 이름: 열 위치}"""
+    정규화 = [_머리글(name) for name in header]
+    위치 = {}
+    for 열, 별칭 in 관측_열.items():
+        for name in 별칭:
+            if _머리글(name) in 정규화:
+                위치[열] = 정규화.index(_머리글(name))
+                break
+    if "코드" not in 위치 and not all(부위 in 위치 for 부위 in OWAS_부위):
+        raise ValueError("관측 기록에 '허리/팔/다리/하중' 열 또는 4자리 'OWAS 코드' 열이 없습니다.")
+    return 위치
+
+
+def _숫자_코드(values, 자리):
+    """값마다 자리 개수만큼 숫자를 읽어 (관측수, 자리) 코드 배열로 만든다. 읽을 수 없으면 0
+
+    코드 종류는 많아야 252가지이므로 고유값만 해석하고 위치로 펼친다.
+    """
+    위치, 고유값 = pd.factorize(pd.Series(values, dtype=object))
+    문자 = pd.Series(고유값, dtype=object).astype(str).str.replace(r"\.0$", "", regex=True)
+    숫자 = 문자.str.extract(r"^\D*" + r"(\d)\D*" * 자리 + "$").apply(pd.to_numeric, errors="coerce")
+    고유_코드 = np.vstack([숫자.fillna(0).to_numpy(dtype=np.int8), np.zeros((1, 자리), dtype=np.int8)])
+    # 결측은 factorize 위치가 -1이므로 마지막에 붙인 0(읽을 수 없음)을 가리킨다
+    return 고유_코드[위치]
+
+
+def _초(values):
+    """관측 시각을 초로 바꾼다. 숫자(초), '08:15:30', 날짜시각 모두 읽는다. 읽을 수 없으면 NaN"""
+    s = pd.Series(values, dtype=object)
+    초 = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float, copy=True)
+    문자 = np.isnan(초) & s.notna().to_numpy()
+    if 문자.any():
+        시간 = pd.to_timedelta(s[문자].astype(str), errors="coerce").dt.total_seconds().to_numpy(dtype=float, copy=True)
+        날짜 = np.isnan(시간)
+        if 날짜.any():
+            시각 = pd.to_datetime(s[문자][날짜], errors="coerce")
+            시간[날짜] = ((시각 - pd.Timestamp(0)) / pd.Timedelta(seconds=1)).to_numpy(dtype=float)
+        초[문자] = 시간
+    return 초
+
+
+def _조합_번호(rows, 위치):
+    """관측 행 목록 -> 조합 번호 배열 (잘못된 코드는 -1)"""
+    columns = list(zip(*rows))
+    if "코드" in 위치:
+        코드 = _숫자_코드(columns[위치["코드"]], len(OWAS_부위))
+    else:
+        코드 = np.column_stack([_숫자_코드(columns[위치[부위]], 1)[:, 0] for 부위 in OWAS_부위])
+    유효 = ((코드 >= 1) & (코드 <= np.array(_부위_크기))).all(axis=1)
+    번호 = np.ravel_multi_index(tuple(np.where(유효[:, None], 코드 - 1, 0).T), _부위_크기)
+    return np.where(유효, 번호, -1), columns
+
+
+def OWAS_분석(file, 파일명="", 표본_간격=None, chunk_size=청크_크기, on_progress=None):
+    """OWAS 관측 기록 파일을 분석한다.
+
+    관측 시간은 '지속시간(초)' 열, 없으면 '시각' 열의 다음 관측까지 간격으로 잡는다.
+    둘 다 없으면 관측 하나를 표본_간격(초)으로 보고, 표본_간격도 없으면 관측수 비율만 구한다.
+    on_progress(처리 행수)는 청크마다 호출된다.
+    반환: {"요약", "부위별", "원인분석", "관측수", "제외", "총시간", "지수"}
+    """
+    청크_iter = 행_청크(file, 파일명, chunk_size)
+    위치 = _머리글_대응(next(청크_iter))
+    관측 = np.zeros(조합_수, dtype=np.int64)
+    시간 = np.zeros(조합_수, dtype=float)
+    처리 = 0
+    # 시각 열: 앞 청크 마지막 관측의 (조합 번호, 시각)과 마지막 간격
+    이전 = None
+    마지막_간격 = 0.0
+
+    for rows in 청크_iter:
+        if not rows:
+            continue
+        번호, columns = _조합_번호(rows, 위치)
+        처리 += len(번호)
+        if "지속시간" in 위치:
+            지속 = _초(columns[위치["지속시간"]])
+        elif "시각" in 위치:
+            시각 = _초(columns[위치["시각"]])
+            if 이전 is not None:
+                번호 = np.append(이전[0], 번호)
+                시각 = np.append(이전[1], 시각)
+            간격 = np.diff(시각)
+            if len(간격) and np.isfinite(간격[-1]):
+                마지막_간격 = float(간격[-1])
+            이전 = (번호[-1], 시각[-1])
+            번호 = 번호[:-1]
+            지속 = 간격
+        else:
+            지속 = np.full(len(번호), float(표본_간격 or 0))
+
+        유효 = 번호 >= 0
+        지속 = np.clip(np.nan_to_num(지속[유효]), 0, None)
+        관측 += np.bincount(번호[유효], minlength=조합_수)
+        시간 += np.bincount(번호[유효], weights=지속, minlength=조합_수)
+        if on_progress is not None:
+            on_progress(처리)
+
+    if 이전 is not None and 이전[0] >= 0:
+        # 기록의 마지막 관측은 바로 앞 간격만큼 이어졌다고 본다
+        관측[이전[0]] += 1
+        시간[이전[0]] += max(마지막_간격, 0)
+    제외 = 처리 - int(관측.sum())
+    if not 관측.any():
+        raise ValueError("올바른 OWAS 코드가 있는 관측이 없습니다.")
+    return _결과(관측, 시간, 제외)
+
+
+def _결과(관측, 시간, 제외):
+    """조합별 관측수/시간 -> 조치수준 요약, 부위별 분포, 원인분석 행"""
+    시간_있음 = 시간.sum() > 0
+    가중 = 시간 if 시간_있음 else 관측.astype(float)
+    조치_관측 = np.bincount(_조합_조치, weights=관측, minlength=4).astype(np.int64)
+    조치_시간 = np.bincount(_조합_조치, weights=시간, minlength=4)
+    비율 = np.bincount(_조합_조치, weights=가중, minlength=4) / 가중.sum() * 100
+    지수 = float((비율 * np.arange(1, 5)).sum())
+
+    요약 = pd.DataFrame({
+        정밀_OWAS_컬럼[0]: 조치수준 + ["합계"],
+        정밀_OWAS_컬럼[1]: [str(값) for 값 in 조치_관측] + [str(int(관측.sum()))],
+        정밀_OWAS_컬럼[2]: [f"{값:.0f}" if 시간_있음 else "" for 값 in 조치_시간] + [f"{시간.sum():.0f}" if 시간_있음 else ""],
+        정밀_OWAS_컬럼[3]: [f"{값:.1f}" for 값 in 비율] + ["100.0"],
+    }, dtype=object)
+
+    # 부위별 자세 코드 비율: 조합 축을 부위별로 더한다
+    분포 = 가중.reshape(_부위_크기) / 가중.sum() * 100
+    부위별 = []
+    for i, (부위, 보기) in enumerate(OWAS_부위.items()):
+        합 = 분포.sum(axis=tuple(j for j in range(len(_부위_크기)) if j != i))
+        부위별 += [(부위, f"{k + 1}. {이름}", round(float(값), 1)) for k, (이름, 값) in enumerate(zip(보기, 합))]
+    부위별 = pd.DataFrame(부위별, columns=["부위", "자세", "비율(%)"])
+
+    기준 = "시간" if 시간_있음 else "관측수"
+    분석결과 = (
+        f"관측 {int(관측.sum())}회 중 AC3 이상 {비율[2:].sum():.1f}% ("
+        + ", ".join(f"AC{i + 1} {값:.1f}%" for i, 값 in enumerate(비율))
+        + f", {기준} 기준), OWAS 지수 {지수:.0f}"
+    )
+    원인분석 = pd.DataFrame(
+        [["OWAS 작업자세 분석", 분석결과, "AC4 / 지수 400"]], columns=정밀_원인분석_컬럼, dtype=object
+    )
+    return {
+        "요약": 요약,
+        "부위별": 부위별,
+        "원인분석": 원인분석,
+        "관측수": int(관측.sum()),
+        "제외": int(제외),
+        "총시간": float(시간.sum()) if 시간_있음 else None,
+        "지수": 지수,
+    }
@@ -0,0 +1,210 @@
+"""작업 사진 저장소
+
+업로드한 사진을 내용 해시(sha256)로 구분해서 서버 디렉터리에 한 번만 저장한다.
+같은 사진을 여러 작업/조사에 올려도 파일은 하나이고, 세션에는 사진 ID(해시 문자열)만 남긴다.
+
+사진 ID 디렉터리 안의 파일:
+    원본.<확장자>  업로드한 파일 그대로 (보고서용)
+    표시본.jpg    긴 변 1600px로 줄이고 회전(EXIF)을 적용한 JPEG
+    썸네일.webp   화면 격자용 긴 변 480px (WebP를 못 쓰면 썸네일.jpg)
+    인쇄_<dpi>_<가로>x<세로>.jpg  보고서 크기에 맞춘 JPEG (보고서를 만들 때 한 번만 만듦)
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+# 이미지 축소 (선택사항) - 없으면 원본만 저장하고 원본을 그대로 보여준다
+try:
+    from PIL import Image, ImageOps, features
+    PIL_AVAILABLE = True
+    WEBP_AVAILABLE = bool(features.check("webp"))
+except ImportError:
+    PIL_AVAILABLE = False
+    WEBP_AVAILABLE = False
+
+사진_경로 = os.environ.get("WMSD_PHOTO_DIR", "photos")
+표시본_크기 = 1600
+썸네일_크기 = 480
+인쇄_dpi = 150
+
+_형식_확장자 = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "BMP": "bmp"}
+
+_업로드_캐시 = OrderedDict()  # 업로드 file_id -> 사진 ID (rerun마다 다시 해시하지 않도록)
+_업로드_캐시_크기 = 256
+_인쇄_캐시 = OrderedDict()  # (사진 ID, 가로, 세로) -> (경로, 가로 인치, 세로 인치)
+_인쇄_캐시_크기 = 1024
+_lock = threading.Lock()
+
+
+_ID_형식 = re.compile(r"[0-9a-f]{32}")
+
+
+def 사진_id(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def 올바른_id(사진_id):
+    """저장소가 만든 형식의 사진 ID인지 (편집되거나 손상된 스냅샷의 값은 건너뛰도록)"""
+    return isinstance(사진_id, str) and _ID_형식.fullmatch(사진_id) is not None
+
+
+def _디렉터리(사진_id):
+    if not 올바른_id(사진_id):
+        raise ValueError(f"잘못된 사진 ID입니다: {사진_id}")
+    return os.path.join(사진_경로, 사진_id[:2], 사진_id)
+
+
+def _쓰기(path, data):
+    # 임시 파일에 쓰고 바꿔치기 - 다른 세션이 반쯤 쓴 파일을 읽지 않도록
+    # (일괄 보고서는 프로세스 풀에서도 쓰므로 프로세스 ID까지 붙임)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _축소(image, 크기, 형식, **options):
+    image = image.copy()
+    image.thumbnail((크기, 크기), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format=형식, **options)
+    return buffer.getvalue()
+
+
+def _파일(사진_id, 접두사):
+    # 형식이 맞지 않는 ID는 저장소에 없는 사진처럼 취급
+    if not 올바른_id(사진_id):
+        return None
+    디렉터리 = _디렉터리(사진_id)
+    if not os.path.isdir(디렉터리):
+        return None
+    for name in os.listdir(디렉터리):
+        if name.startswith(접두사 + ".") and not name.endswith(".tmp"):
+            return os.path.join(디렉터리, name)
+    return None
+
+
+def 사진_저장(data):
+    """사진 바이트를 저장하고 사진 ID를 반환한다. 이미 있는 사진이면 다시 만들지 않는다."""
+    data = bytes(data)
+    pid = 사진_id(data)
+    디렉터리 = _디렉터리(pid)
+    # 썸네일을 마지막에 쓰므로 썸네일이 있으면 모든 파일이 있는 것
+    if _파일(pid, "썸네일" if PIL_AVAILABLE else "원본") is not None:
+        return pid
+
+    if not PIL_AVAILABLE:
+        os.makedirs(디렉터리, exist_ok=True)
+        _쓰기(os.path.join(디렉터리, "원본.bin"), data)
+        return pid
+
+    try:
+        image = Image.open(BytesIO(data))
+        확장자 = _형식_확장자.get(image.format, "bin")
+        # JPEG은 디코딩할 때부터 1/2~1/8로 줄여 읽는다 (표시본 크기 이상은 유지)
+        비율 = 표시본_크기 / max(image.size)
+        if 비율 < 1:
+            image.draft("RGB", (round(image.width * 비율), round(image.height * 비율)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGBA")
+            배경 = Image.new("RGB", image.size, "white")
+            배경.paste(image, mask=image.getchannel("A"))
+            image = 배경
+    except Exception as e:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {e}") from e
+
+    os.makedirs(디렉터리, exist_ok=True)
+    _쓰기(os.path.join(디렉터리, f"원본.{확장자}"), data)
+    # 썸네일도 원본 대신 줄인 이미지에서 만든다
+    image.thumbnail((표시본_크기, 표시본_크기), Image.LANCZOS)
+    _쓰기(os.path.join(디렉터리, "표시본.jpg"), _축소(image, 표시본_크기, "JPEG", quality=85, optimize=True))
+    if WEBP_AVAILABLE:
+        썸네일 = _축소(image, 썸네일_크기, "WEBP", quality=75)
+        _쓰기(os.path.join(디렉터리, "썸네일.webp"), 썸네일)
+    else:
+        _쓰기(os.path.join(디렉터리, "썸네일.jpg"), _축소(image, 썸네일_크기, "JPEG", quality=80))
+    return pid
+
+
+def 업로드_저장(uploaded_file):
+    """st.file_uploader 파일을 저장하고 사진 ID를 반환한다. 같은 업로드는 한 번만 처리한다."""
+    file_id = getattr(uploaded_file, "file_id", None)
+    with _lock:
+        if file_id is not None and file_id in _업로드_캐시:
+            _업로드_캐시.move_to_end(file_id)
+            return _업로드_캐시[file_id]
+    pid = 사진_저장(uploaded_file.getvalue())
+    if file_id is not None:
+        with _lock:
+            _업로드_캐시[file_id] = pid
+            while len(_업로드_캐시) > _업로드_캐시_크기:
+                _업로드_캐시.popitem(last=False)
+    return pid
+
+
+def 원본_경로(사진_id):
+    return _파일(사진_id, "원본")
+
+
+def 표시본_경로(사진_id):
+    """보고서에 넣을 축소본 경로. 축소본이 없으면 원본"""
+    return _파일(사진_id, "표시본") or 원본_경로(사진_id)
+
+
+def 썸네일_경로(사진_id):
+    """화면에 보여줄 썸네일 경로. 썸네일이 없으면 원본"""
+    return _파일(사진_id, "썸네일") or 원본_경로(사진_id)
+
+
+def 사진_읽기(사진_id, 종류="원본"):
+    """사진 바이트. 종류는 "원본", "표시본", "썸네일". 저장소에 없으면 None"""
+    path = {"원본": 원본_경로, "표시본": 표시본_경로, "썸네일": 썸네일_경로}[종류](사진_id)
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def 인쇄용_사진(사진_id, 폭, 높이, dpi=인쇄_dpi):
+    """폭x높이(인치) 안에 비율을 유지해 들어가는 dpi 해상도 JPEG.
+
+    (경로, 가로 인치, 세로 인치)를 반환하고, 사진이 없거나 Pillow가 없으면 None.
+    크기별 결과는 사진 디렉터리에 파일로 남겨 두므로 다음 보고서부터는 원본을 다시 디코딩하지 않는다.
+    """
+    if not PIL_AVAILABLE or not 올바른_id(사진_id):
+        return None
+    상자 = (round(폭 * dpi), round(높이 * dpi))
+    key = (사진_id, 상자, dpi)
+    with _lock:
+        if key in _인쇄_캐시:
+            _인쇄_캐시.move_to_end(key)
+            return _인쇄_캐시[key]
+
+    path = os.path.join(_디렉터리(사진_id), f"인쇄_{dpi}_{상자[0]}x{상자[1]}.jpg")
+    if os.path.exists(path):
+        with Image.open(path) as image:
+            size = image.size
+    else:
+        # 원본보다 작은 표시본에서 줄이는 편이 빠르다 (긴 변 1600px이면 150dpi로 10인치 이상)
+        source = 표시본_경로(사진_id)
+        if source is None:
+            return None
+        with Image.open(source) as image:
+            image.draft("RGB", 상자)
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image.thumbnail(상자, Image.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, format="JPEG", quality=85, optimize=True, dpi=(dpi, dpi))
+            size = image.size
+        _쓰기(path, buffer.getvalue())
+
+    result = (path, size[0] / dpi, size[1] / dpi)
+    with _lock:
+        _인쇄_캐시[key] = result
+        while len(_인쇄_캐시) > _인쇄_캐시_크기:
+            _인쇄_캐시.popitem(last=False)
+    return result
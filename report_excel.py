@@ -0,0 +1,693 @@
+"""전체 보고서 엑셀 생성
+
+보고서를 시트 단위 섹션으로 나누고, 섹션마다 원본 세션 키 값의 지문(fingerprint)을 계산한다.
+렌더링한 시트 XML은 지문을 키로 캐시해 두었다가, 바뀌지 않은 시트는 그대로 재사용해 xlsx(zip)를 조립한다.
+state는 st.session_state 또는 같은 키를 가진 dict를 받는다.
+
+쓰기 엔진은 엑셀_엔진에 등록된 것 중에서 고른다. openpyxl write-only와 xlsxwriter constant_memory
+엔진은 시트를 한 장씩 만들어 바로 기록하므로 시트 수가 많아도 메모리 사용량이 일정하다.
+
+작업 사진은 행 목록에 사진_셀로 자리만 잡고, 엔진마다 그 셀 위치에 사진 저장소의 인쇄용 JPEG을 넣는다.
+"""
+import hashlib
+import re
+import threading
+import zipfile
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+from numbers import Number
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.drawing.image import Image as 엑셀_이미지
+from openpyxl.styles import Alignment, Border, Font, Side
+
+# xlsxwriter는 선택사항
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+from checklist import 작업명_인덱스
+from photo_store import 인쇄용_사진
+from scoring import 총점_적용
+from session_schema import 지문_갱신
+from survey_columns import 정밀_원인분석_컬럼, 정밀_OWAS_컬럼
+
+상황조사_항목 = ["작업설비", "작업량", "작업속도", "업무변화"]
+
+_시트_캐시 = OrderedDict()
+_시트_캐시_lock = threading.Lock()
+_시트_캐시_최대_바이트 = 64 * 1024 * 1024
+_시트_캐시_최대_개수 = 4096  # 빈 시트(b"")는 바이트로 세지 않으므로 개수로도 제한
+_시트_캐시_바이트 = 0
+
+
+# 사진 한 장의 최대 크기(인치)와 차지하는 행 수 (기본 행 높이 15pt 기준)
+사진_폭 = 4
+사진_높이 = 3
+_사진_행수 = 16
+
+# 행 목록 안에서 사진이 들어갈 셀
+사진_셀 = namedtuple("사진_셀", ["사진_id"])
+
+
+def 시트명(name):
+    return name.replace('/', '_').replace('\\', '_')[:31]
+
+
+# ---------------------------------------------------------------------------
+# 섹션 정의: (시트명, header 여부, 원본 키 목록, 빌더)
+# 빌더(state)는 헤더를 포함한 행 목록을 반환하고, 시트를 만들지 않을 때는 None을 반환한다.
+# ---------------------------------------------------------------------------
+
+def _데이터프레임_행(df):
+    return [list(df.columns)] + df.astype(object).to_numpy().tolist()
+
+
+def _비어있지_않은_df(state, key):
+    df = state.get(key)
+    if isinstance(df, pd.DataFrame) and not df.empty:
+        return df
+    return None
+
+
+def _사업장개요(state):
+    return _데이터프레임_행(pd.DataFrame({
+        "항목": ["사업장명", "소재지", "업종", "예비조사일", "본조사일", "수행기관", "성명"],
+        "내용": [
+            state.get("사업장명", ""),
+            state.get("소재지", ""),
+            state.get("업종", ""),
+            str(state.get("예비조사", "")),
+            str(state.get("본조사", "")),
+            state.get("수행기관", ""),
+            state.get("성명", "")
+        ]
+    }))
+
+
+def _체크리스트(state):
+    df = _비어있지_않은_df(state, "checklist_df")
+    return _데이터프레임_행(df) if df is not None else None
+
+
+def 상황조사_세부사항(state, 항목, 조사표명):
+    상태 = state.get(f"{항목}_상태_{조사표명}", "변화없음")
+    세부사항 = ""
+    if 상태 == "감소":
+        세부사항 = state.get(f"{항목}_감소_시작_{조사표명}", "")
+    elif 상태 == "증가":
+        세부사항 = state.get(f"{항목}_증가_시작_{조사표명}", "")
+    elif 상태 == "기타":
+        세부사항 = state.get(f"{항목}_기타_내용_{조사표명}", "")
+    return 상태, 세부사항
+
+
+def _유해요인조사_키(조사표명):
+    keys = [f"{항목}_{조사표명}" for 항목 in ["조사일시", "부서명", "조사자", "작업공정명", "작업명"]]
+    for 항목 in 상황조사_항목:
+        keys += [
+            f"{항목}_상태_{조사표명}",
+            f"{항목}_감소_시작_{조사표명}",
+            f"{항목}_증가_시작_{조사표명}",
+            f"{항목}_기타_내용_{조사표명}",
+        ]
+    return keys
+
+
+def _유해요인조사(조사표명):
+    def build(state):
+        rows = [
+            ["조사개요"],
+            ["조사일시", state.get(f"조사일시_{조사표명}", "")],
+            ["부서명", state.get(f"부서명_{조사표명}", "")],
+            ["조사자", state.get(f"조사자_{조사표명}", "")],
+            ["작업공정명", state.get(f"작업공정명_{조사표명}", "")],
+            ["작업명", state.get(f"작업명_{조사표명}", "")],
+            [],  # 빈 행
+            ["작업장 상황조사"],
+            ["항목", "상태", "세부사항"],
+        ]
+        for 항목 in 상황조사_항목:
+            상태, 세부사항 = 상황조사_세부사항(state, 항목, 조사표명)
+            rows.append([항목, 상태, 세부사항])
+        return rows
+    return build
+
+
+def _작업조건(작업명):
+    def build(state):
+        df = _비어있지_않은_df(state, f"작업조건_data_{작업명}")
+        return _데이터프레임_행(총점_적용(df)) if df is not None else None
+    return build
+
+
+def 작업_사진_목록(state, 작업명):
+    """작업에 올린 사진 [(제목, 사진 ID, 설명)]"""
+    사진_목록 = []
+    for i in range(state.get(f"사진개수_{작업명}", 3)):
+        사진_id = state.get(f"사진_{i+1}_id_{작업명}")
+        if 사진_id:
+            사진_목록.append((f"사진 {i+1}", 사진_id, state.get(f"사진_{i+1}_설명_{작업명}", "")))
+    return 사진_목록
+
+
+def 정밀조사_사진_목록(state, 조사명):
+    return [(f"사진 {i+1}", 사진_id, "") for i, 사진_id in enumerate(state.get(f"정밀_사진_id_{조사명}", []) or [])]
+
+
+def _사진_행(사진_목록):
+    """사진마다 빈 행, 제목/설명 행, 사진 자리를 차례로 둔다."""
+    rows = []
+    for 제목, 사진_id, 설명 in 사진_목록:
+        rows.append([])
+        rows.append([제목, 설명])
+        rows.append([사진_셀(사진_id)])
+        rows.extend([] for _ in range(_사진_행수 - 1))
+    return rows
+
+
+def _유해요인평가_키(state, 작업명):
+    사진개수 = state.get(f"사진개수_{작업명}", 3)
+    return [f"3단계_작업명_{작업명}", f"3단계_근로자수_{작업명}", f"사진개수_{작업명}"] + [
+        f"사진_{i+1}_설명_{작업명}" for i in range(사진개수)
+    ] + [f"사진_{i+1}_id_{작업명}" for i in range(사진개수)]
+
+
+def _유해요인평가(작업명):
+    def build(state):
+        평가_작업명 = state.get(f"3단계_작업명_{작업명}", 작업명)
+        평가_근로자수 = state.get(f"3단계_근로자수_{작업명}", "")
+        사진_목록 = 작업_사진_목록(state, 작업명)
+        if not (평가_작업명 or 평가_근로자수 or 사진_목록):
+            return None
+
+        평가_data = {
+            "작업명": [평가_작업명],
+            "근로자수": [평가_근로자수]
+        }
+        # 사진 설명 추가
+        for i in range(state.get(f"사진개수_{작업명}", 3)):
+            평가_data[f"사진{i+1}_설명"] = [state.get(f"사진_{i+1}_설명_{작업명}", "")]
+        return _데이터프레임_행(pd.DataFrame(평가_data)) + _사진_행(사진_목록)
+    return build
+
+
+def _데이터프레임_시트(key):
+    def build(state):
+        df = _비어있지_않은_df(state, key)
+        return _데이터프레임_행(df) if df is not None else None
+    return build
+
+
+def _정밀조사(조사명):
+    def build(state):
+        rows = [
+            ["작업공정명", state.get(f"정밀_작업공정명_{조사명}", "")],
+            ["작업명", state.get(f"정밀_작업명_{조사명}", "")],
+            [],  # 빈 행
+            ["작업별로 관련된 유해요인에 대한 원인분석"],
+            list(정밀_원인분석_컬럼),
+        ]
+        원인분석_df = state.get(f"정밀_원인분석_data_{조사명}")
+        if isinstance(원인분석_df, pd.DataFrame) and not 원인분석_df.empty:
+            values = 원인분석_df.reindex(columns=정밀_원인분석_컬럼).fillna("").to_numpy(dtype=object)
+            rows += [list(row) for row in values if any(row)]
+        owas_df = _비어있지_않은_df(state, f"정밀_OWAS_data_{조사명}")
+        사진_목록 = 정밀조사_사진_목록(state, 조사명)
+        # 헤더 이후에 데이터나 OWAS 결과, 사진이 있는 경우만
+        if len(rows) <= 5 and owas_df is None and not 사진_목록:
+            return None
+        if owas_df is not None:
+            rows += [[], ["OWAS 작업자세 분석"]] + _데이터프레임_행(owas_df.reindex(columns=정밀_OWAS_컬럼).fillna(""))
+        return rows + _사진_행(사진_목록)
+    return build
+
+
+def _개선계획(state):
+    df = _비어있지_않은_df(state, "개선계획_data_저장")
+    if df is None:
+        return None
+    # 빈 행 제거 (모든 컬럼이 빈 행 제외)
+    df_clean = df[df.astype(str).ne('').any(axis=1)]
+    return _데이터프레임_행(df_clean) if not df_clean.empty else None
+
+
+def 보고서_섹션(state):
+    """보고서에 들어갈 섹션 목록을 시트 순서대로 반환한다."""
+    sections = [
+        ("사업장개요", True, ["사업장명", "소재지", "업종", "예비조사", "본조사", "수행기관", "성명"], _사업장개요),
+        ("체크리스트", True, ["checklist_df"], _체크리스트),
+    ]
+
+    for 조사표명 in state.get("유해요인조사_목록", []) or []:
+        sections.append((시트명(조사표명), False, _유해요인조사_키(조사표명), _유해요인조사(조사표명)))
+
+    checklist_df = state.get("checklist_df")
+    작업명_목록 = 작업명_인덱스(checklist_df)["작업명_목록"] if isinstance(checklist_df, pd.DataFrame) else []
+    for 작업명 in 작업명_목록:
+        sections.append((시트명(f'작업조건_{작업명}'), True, [f"작업조건_data_{작업명}"], _작업조건(작업명)))
+        sections.append((시트명(f'유해요인평가_{작업명}'), True, _유해요인평가_키(state, 작업명), _유해요인평가(작업명)))
+        sections.append((시트명(f'원인분석_{작업명}'), True, [f"원인분석_data_{작업명}"], _데이터프레임_시트(f"원인분석_data_{작업명}")))
+
+    for 조사명 in state.get("정밀조사_목록", []) or []:
+        keys = [
+            f"정밀_작업공정명_{조사명}", f"정밀_작업명_{조사명}", f"정밀_원인분석_data_{조사명}",
+            f"정밀_OWAS_data_{조사명}", f"정밀_사진_id_{조사명}",
+        ]
+        sections.append((시트명(조사명), False, keys, _정밀조사(조사명)))
+
+    for name, key in [
+        ("증상조사_기초현황", "기초현황_data_저장"),
+        ("증상조사_작업기간", "작업기간_data_저장"),
+        ("증상조사_육체적부담", "육체적부담_data_저장"),
+        ("증상조사_통증호소자", "통증호소자_data_저장"),
+    ]:
+        sections.append((name, True, [key], _데이터프레임_시트(key)))
+
+    sections.append(("작업환경개선계획서", True, ["개선계획_data_저장"], _개선계획))
+    return sections
+
+
+# ---------------------------------------------------------------------------
+# 지문 계산
+# ---------------------------------------------------------------------------
+
+
+def 섹션_지문(state, 시트, header, keys):
+    h = hashlib.sha1()
+    h.update(repr((시트, header)).encode())
+    for key in keys:
+        h.update(key.encode())
+        지문_갱신(h, state.get(key))
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# 시트 XML 렌더링 및 xlsx 조립
+# ---------------------------------------------------------------------------
+
+_잘못된_문자 = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_시트명_금지문자 = re.compile(r"[\[\]:*?/\\]")
+_컬럼_문자 = []
+
+
+def _컬럼명(idx):
+    while len(_컬럼_문자) <= idx:
+        n = len(_컬럼_문자) + 1
+        letters = ""
+        while n:
+            n, rem = divmod(n - 1, 26)
+            letters = chr(65 + rem) + letters
+        _컬럼_문자.append(letters)
+    return _컬럼_문자[idx]
+
+
+def _셀_xml(ref, value, style):
+    if value is None or isinstance(value, 사진_셀):
+        return ""
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"{style}><v>{int(value)}</v></c>'
+    if isinstance(value, Number):
+        if value != value or value in (float("inf"), float("-inf")):  # NaN/inf
+            return ""
+        return f'<c r="{ref}"{style}><v>{value}</v></c>'
+    text = _잘못된_문자.sub("", str(value))
+    if not text:
+        # openpyxl과 같이 빈 문자열은 셀을 만들지 않는다
+        return ""
+    text = escape(text)
+    return f'<c r="{ref}" t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def 시트_사진(rows):
+    """행 목록의 사진 위치 [(행, 열, 사진 ID)] (0부터 시작)"""
+    return [
+        (r, c, value.사진_id)
+        for r, row in enumerate(rows) for c, value in enumerate(row)
+        if isinstance(value, 사진_셀)
+    ]
+
+
+_시트_끝 = b"</worksheet>"
+
+
+def 시트_xml(rows, header):
+    """행 목록을 공유 문자열 없이 독립적인 worksheet XML로 렌더링한다."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheetData>'
+    ]
+    for r, row in enumerate(rows, start=1):
+        style = ' s="1"' if header and r == 1 else ""
+        cells = "".join(_셀_xml(f"{_컬럼명(c)}{r}", value, style) for c, value in enumerate(row))
+        parts.append(f'<row r="{r}">{cells}</row>')
+    parts.append("</sheetData></worksheet>")
+    return "".join(parts).encode("utf-8")
+
+
+_CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Default Extension="jpg" ContentType="image/jpeg"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+# 0: 기본, 1: pandas 헤더와 같은 굵은 글씨 + 가는 테두리 + 가운데 정렬
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="top"/></xf></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+_EMU_인치 = 914400
+
+
+def _drawing_xml(사진_위치):
+    """[(행, 열, rId, 가로 인치, 세로 인치)] 사진을 셀 기준으로 배치하는 drawing XML"""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<xdr:wsDr xmlns:xdr="http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing" '
+        'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    ]
+    for n, (r, c, rid, 폭, 높이) in enumerate(사진_위치, start=1):
+        cx, cy = round(폭 * _EMU_인치), round(높이 * _EMU_인치)
+        parts.append(
+            f'<xdr:oneCellAnchor><xdr:from><xdr:col>{c}</xdr:col><xdr:colOff>0</xdr:colOff>'
+            f'<xdr:row>{r}</xdr:row><xdr:rowOff>0</xdr:rowOff></xdr:from><xdr:ext cx="{cx}" cy="{cy}"/>'
+            f'<xdr:pic><xdr:nvPicPr><xdr:cNvPr id="{n + 1}" name="Picture {n}"/>'
+            '<xdr:cNvPicPr><a:picLocks noChangeAspect="1"/></xdr:cNvPicPr></xdr:nvPicPr>'
+            f'<xdr:blipFill><a:blip r:embed="{rid}"/><a:stretch><a:fillRect/></a:stretch></xdr:blipFill>'
+            f'<xdr:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+            '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></xdr:spPr></xdr:pic>'
+            '<xdr:clientData/></xdr:oneCellAnchor>'
+        )
+    parts.append("</xdr:wsDr>")
+    return "".join(parts)
+
+
+def _관계_xml(관계):
+    """[(rId, Type 끝부분, Target)] relationships XML"""
+    items = "".join(
+        f'<Relationship Id="{rid}" '
+        f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/{종류}" Target="{target}"/>'
+        for rid, 종류, target in 관계
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{items}</Relationships>'
+    )
+
+
+def _고유_시트명(name, 사용중):
+    # 엑셀에서 허용하지 않는 문자는 _로 바꾸고, 중복된 시트명 뒤에는 숫자를 붙인다
+    name = _시트명_금지문자.sub("_", name) or "Sheet"
+    candidate = name
+    n = 1
+    while candidate.lower() in 사용중:
+        suffix = str(n)
+        candidate = name[:31 - len(suffix)] + suffix
+        n += 1
+    사용중.add(candidate.lower())
+    return candidate
+
+
+def _사진_배치(sheets):
+    """시트별 사진 위치를 인쇄용 JPEG으로 바꾼다. 같은 사진 파일은 media 이름 하나를 같이 쓴다.
+
+    반환: (시트별 (drawing 배치, drawing 관계), {사진 경로: media 파일명})
+    저장소에 없는 사진은 건너뛴다.
+    """
+    media = {}
+    drawings = []
+    for sheet in sheets:
+        배치 = []
+        관계 = []
+        for r, c, 사진_id in (sheet[2] if len(sheet) > 2 else ()):
+            사진 = 인쇄용_사진(사진_id, 사진_폭, 사진_높이)
+            if 사진 is None:
+                continue
+            path, 폭, 높이 = 사진
+            if path not in media:
+                media[path] = f"image{len(media) + 1}.jpg"
+            rid = f"rId{len(관계) + 1}"
+            관계.append((rid, "image", f"../media/{media[path]}"))
+            배치.append((r, c, rid, 폭, 높이))
+        drawings.append((배치, 관계))
+    return drawings, media
+
+
+def xlsx_조립(sheets):
+    """[(시트명, 시트 XML bytes[, 사진 위치])] 목록으로 xlsx 파일 bytes를 만든다.
+
+    사진 위치는 시트_사진()의 결과이고, 사진은 저장소의 인쇄용 JPEG을 압축하지 않고 그대로 넣는다.
+    """
+    사용중 = set()
+    names = [_고유_시트명(sheet[0], 사용중) for sheet in sheets]
+    drawings, media = _사진_배치(sheets)
+
+    content_types = [_CONTENT_TYPES_HEAD]
+    workbook = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+    ]
+    workbook_rels = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    ]
+    for i, name in enumerate(names, start=1):
+        content_types.append(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        )
+        if drawings[i - 1][0]:
+            content_types.append(
+                f'<Override PartName="/xl/drawings/drawing{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.drawing+xml"/>'
+            )
+        quoted = escape(name, {'"': "&quot;"})
+        workbook.append(f'<sheet name="{quoted}" sheetId="{i}" r:id="rId{i}"/>')
+        workbook_rels.append(
+            f'<Relationship Id="rId{i}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>'
+        )
+    content_types.append("</Types>")
+    workbook.append("</sheets></workbook>")
+    workbook_rels.append(
+        f'<Relationship Id="rId{len(names) + 1}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/></Relationships>'
+    )
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", "".join(content_types))
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", "".join(workbook))
+        zf.writestr("xl/_rels/workbook.xml.rels", "".join(workbook_rels))
+        zf.writestr("xl/styles.xml", _STYLES)
+        for i, (sheet, (배치, 관계)) in enumerate(zip(sheets, drawings), start=1):
+            xml = sheet[1]
+            if 배치:
+                # 캐시된 시트 XML 끝에 drawing 참조만 붙인다
+                xml = xml[:-len(_시트_끝)] + b'<drawing r:id="rId1"/>' + _시트_끝
+                zf.writestr(f"xl/worksheets/_rels/sheet{i}.xml.rels", _관계_xml([("rId1", "drawing", f"../drawings/drawing{i}.xml")]))
+                zf.writestr(f"xl/drawings/drawing{i}.xml", _drawing_xml(배치))
+                zf.writestr(f"xl/drawings/_rels/drawing{i}.xml.rels", _관계_xml(관계))
+            zf.writestr(f"xl/worksheets/sheet{i}.xml", xml)
+        for path, name in media.items():
+            zf.write(path, f"xl/media/{name}", compress_type=zipfile.ZIP_STORED)
+    return output.getvalue()
+
+
+def _캐시_조회(지문):
+    """캐시된 (시트 XML, 사진 위치) 또는 None"""
+    with _시트_캐시_lock:
+        cached = _시트_캐시.get(지문)
+        if cached is not None:
+            _시트_캐시.move_to_end(지문)
+        return cached
+
+
+def _캐시_저장(지문, xml, 사진=()):
+    global _시트_캐시_바이트
+    with _시트_캐시_lock:
+        if 지문 in _시트_캐시:
+            return
+        _시트_캐시[지문] = (xml, 사진)
+        _시트_캐시_바이트 += len(xml)
+        while len(_시트_캐시) > 1 and (
+            _시트_캐시_바이트 > _시트_캐시_최대_바이트 or len(_시트_캐시) > _시트_캐시_최대_개수
+        ):
+            _, (removed, _) = _시트_캐시.popitem(last=False)
+            _시트_캐시_바이트 -= len(removed)
+
+
+def 시트_캐시_비우기():
+    global _시트_캐시_바이트
+    with _시트_캐시_lock:
+        _시트_캐시.clear()
+        _시트_캐시_바이트 = 0
+
+
+def _캐시_쓰기(state, sections):
+    """지문이 같은 시트는 캐시된 XML을 재사용해 조립한다."""
+    sheets = []
+    for 시트, header, keys, build in sections:
+        지문 = 섹션_지문(state, 시트, header, keys)
+        cached = _캐시_조회(지문)
+        if cached is None:
+            rows = build(state)
+            # 시트를 만들지 않는 섹션은 빈 bytes로 캐시
+            cached = (시트_xml(rows, header), 시트_사진(rows)) if rows is not None else (b"", ())
+            _캐시_저장(지문, *cached)
+        xml, 사진 = cached
+        if xml:
+            sheets.append((시트, xml, 사진))
+    return xlsx_조립(sheets)
+
+
+def _셀값(value):
+    """openpyxl/xlsxwriter에 넘길 수 있는 값으로 바꾼다. 빈 값은 None"""
+    if value is None or isinstance(value, 사진_셀):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (bool, int)):
+        return value
+    if isinstance(value, float):
+        return value if value == value and value not in (float("inf"), float("-inf")) else None
+    text = _잘못된_문자.sub("", str(value))
+    return text or None
+
+
+def _openpyxl_쓰기(state, sections):
+    """openpyxl write-only 모드: 행을 임시 파일로 바로 흘려 보낸다."""
+    wb = Workbook(write_only=True)
+    header_font = Font(bold=True)
+    thin = Side(style="thin")
+    header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_alignment = Alignment(horizontal="center", vertical="top")
+
+    사용중 = set()
+    for 시트, header, _, build in sections:
+        rows = build(state)
+        if rows is None:
+            continue
+        ws = wb.create_sheet(_고유_시트명(시트, 사용중))
+        for r, row in enumerate(rows):
+            values = [_셀값(value) for value in row]
+            if header and r == 0:
+                cells = []
+                for value in values:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.font = header_font
+                    cell.border = header_border
+                    cell.alignment = header_alignment
+                    cells.append(cell)
+                values = cells
+            ws.append(values)
+        for r, c, 사진_id in 시트_사진(rows):
+            사진 = 인쇄용_사진(사진_id, 사진_폭, 사진_높이)
+            if 사진 is not None:
+                path, 폭, 높이 = 사진
+                image = 엑셀_이미지(path)
+                image.width, image.height = 폭 * 96, 높이 * 96
+                ws.add_image(image, f"{_컬럼명(c)}{r + 1}")
+
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def _xlsxwriter_쓰기(state, sections):
+    """xlsxwriter constant_memory 모드: 시트 데이터를 행 단위로 임시 파일에 기록한다."""
+    output = BytesIO()
+    wb = xlsxwriter.Workbook(output, {"constant_memory": True})
+    header_format = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+
+    사용중 = set()
+    for 시트, header, _, build in sections:
+        rows = build(state)
+        if rows is None:
+            continue
+        ws = wb.add_worksheet(_고유_시트명(시트, 사용중))
+        for r, row in enumerate(rows):
+            values = [_셀값(value) for value in row]
+            if header and r == 0:
+                ws.write_row(r, 0, values, header_format)
+            else:
+                ws.write_row(r, 0, values)
+        for r, c, 사진_id in 시트_사진(rows):
+            사진 = 인쇄용_사진(사진_id, 사진_폭, 사진_높이)
+            if 사진 is not None:
+                # 인쇄용 JPEG에 dpi가 기록되어 있어 크기 조정 없이 같은 인치로 들어간다
+                ws.insert_image(r, c, 사진[0])
+
+    wb.close()
+    return output.getvalue()
+
+
+# 엔진 이름 → (표시 이름, 쓰기 함수)
+엑셀_엔진 = {
+    "cached": ("기본 (시트 캐시)", _캐시_쓰기),
+    "openpyxl": ("openpyxl write-only", _openpyxl_쓰기),
+}
+if XLSXWRITER_AVAILABLE:
+    엑셀_엔진["xlsxwriter"] = ("xlsxwriter constant_memory", _xlsxwriter_쓰기)
+
+
+def _진행_보고(sections, on_progress):
+    total = len(sections)
+    for i, section in enumerate(sections):
+        yield section
+        on_progress((i + 1) / total)
+
+
+def 엑셀_보고서_생성(state, engine="cached", on_progress=None):
+    """전체 보고서 xlsx bytes를 만든다.
+
+    on_progress(0~1)는 섹션 하나를 처리할 때마다 호출된다.
+    """
+    if engine not in 엑셀_엔진:
+        raise ValueError(f"지원하지 않는 엑셀 엔진입니다: {engine}")
+    sections = 보고서_섹션(state)
+    if on_progress is not None:
+        sections = _진행_보고(sections, on_progress)
+    return 엑셀_엔진[engine][1](state, sections)
@@ -0,0 +1,81 @@
+"""보고서 백그라운드 생성 작업 큐
+
+보고서 생성은 프로세스 공용 스레드 풀에서 실행하고, 화면에서는 작업 id로 진행 상황을 조회한다.
+작업을 제출할 때 세션 데이터의 스냅샷을 떠서 넘기므로 생성 중에 입력을 바꿔도 결과가 섞이지 않는다.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+최대_작업자 = 2
+보관_시간 = 30 * 60  # 끝난 작업 결과를 보관하는 시간(초)
+
+_executor = ThreadPoolExecutor(max_workers=최대_작업자, thread_name_prefix="report")
+_작업 = {}
+_작업_lock = threading.Lock()
+
+
+def 세션_스냅샷(session_state):
+    """세션 상태를 dict로 복사한다. 데이터프레임은 값까지 복사한다."""
+    snapshot = {}
+    for key, value in list(session_state.items()):
+        if isinstance(value, pd.DataFrame):
+            value = value.copy()
+        elif isinstance(value, list):
+            value = list(value)
+        snapshot[key] = value
+    return snapshot
+
+
+def _정리():
+    기준 = time.time() - 보관_시간
+    with _작업_lock:
+        for job_id in [job_id for job_id, job in _작업.items() if job["완료시각"] and job["완료시각"] < 기준]:
+            del _작업[job_id]
+
+
+def _갱신(job_id, **values):
+    with _작업_lock:
+        if job_id in _작업:
+            _작업[job_id].update(values)
+
+
+def _실행(job_id, build, state, kwargs):
+    _갱신(job_id, 상태="진행중")
+    try:
+        result = build(state, on_progress=lambda 진행: _갱신(job_id, 진행=진행), **kwargs)
+        _갱신(job_id, 상태="완료", 진행=1.0, 결과=result, 완료시각=time.time())
+    except Exception as e:
+        _갱신(job_id, 상태="실패", 오류=str(e), 완료시각=time.time())
+
+
+def 작업_제출(종류, build, state, **kwargs):
+    """build(state, on_progress=..., **kwargs)를 백그라운드에서 실행하고 작업 id를 반환한다.
+
+    state는 세션_스냅샷()으로 떠 둔 dict를 넘긴다.
+    """
+    _정리()
+    job_id = uuid.uuid4().hex
+    with _작업_lock:
+        _작업[job_id] = {
+            "id": job_id,
+            "종류": 종류,
+            "상태": "대기",
+            "진행": 0.0,
+            "결과": None,
+            "오류": "",
+            "제출시각": time.time(),
+            "완료시각": None,
+        }
+    _executor.submit(_실행, job_id, build, state, kwargs)
+    return job_id
+
+
+def 작업_조회(job_id):
+    """작업 상태 dict의 사본. 보관 시간이 지나 지워진 작업은 None"""
+    with _작업_lock:
+        job = _작업.get(job_id)
+        return dict(job) if job is not None else None
@@ -0,0 +1,513 @@
+"""PDF 보고서 생성
+
+한글 폰트 등록, ParagraphStyle, 공용 TableStyle은 프로세스당 한 번만 만들어 재사용한다.
+state는 st.session_state 또는 같은 키를 가진 dict를 받는다.
+"""
+import os
+import threading
+from datetime import datetime
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from checklist import 작업명_인덱스
+from photo_store import 인쇄용_사진
+from report_excel import 상황조사_항목, 상황조사_세부사항, 작업_사진_목록, 정밀조사_사진_목록
+from scoring import 총점_적용
+
+# PDF 관련 imports (선택사항)
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.enums import TA_CENTER
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+# 한글 폰트 설정 - 나눔고딕 우선
+font_paths = [
+    "C:/Windows/Fonts/NanumGothic.ttf",
+    "C:/Windows/Fonts/NanumBarunGothic.ttf",
+    "C:/Windows/Fonts/malgun.ttf",
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",  # Linux
+    "/System/Library/Fonts/Supplemental/NanumGothic.ttf"  # Mac
+]
+
+_리소스 = None
+_리소스_lock = threading.Lock()
+
+
+def _폰트_등록():
+    for font_path in font_paths:
+        if os.path.exists(font_path):
+            if "NanumGothic" in font_path:
+                font_name = 'NanumGothic'
+            elif "NanumBarunGothic" in font_path:
+                font_name = 'NanumBarunGothic'
+            else:
+                font_name = 'Malgun'
+            pdfmetrics.registerFont(TTFont(font_name, font_path))
+            return font_name
+    return 'Helvetica'
+
+
+def _스타일(font_name):
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=28,
+            textColor=colors.HexColor('#1f4788'),
+            alignment=TA_CENTER,
+            fontName=font_name,
+            spaceAfter=30
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=18,
+            textColor=colors.HexColor('#2e5090'),
+            fontName=font_name,
+            spaceAfter=12
+        ),
+        "subheading": ParagraphStyle(
+            'CustomSubHeading',
+            parent=styles['Heading3'],
+            fontSize=14,
+            textColor=colors.HexColor('#3a5fa0'),
+            fontName=font_name,
+            spaceAfter=10
+        ),
+        "normal": ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=12,
+            fontName=font_name,
+            leading=14
+        ),
+    }
+
+
+def _표_스타일(font_name):
+    header = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ]
+    return {
+        # 항목/내용 2열 표 (사업장 개요)
+        "개요": TableStyle(header + [
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (0, 1), (0, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        # 헤더 없는 항목/내용 표 (조사개요)
+        "항목": TableStyle([
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 0), (-1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ]),
+        # 작은 목록 표 (상황조사)
+        "목록": TableStyle(header + [
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 0), (-1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ]),
+        # 데이터 표 (체크리스트, 작업조건, 기초현황)
+        "데이터": TableStyle(header + [
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ]),
+        # 사진과 설명 (작업 사진)
+        "사진": TableStyle([
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+        ]),
+        # 열이 많은 데이터 표 (개선계획)
+        "데이터_작게": TableStyle(header + [
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+    }
+
+
+def _셀_스타일(font_name):
+    """긴 표에서 줄바꿈이 필요한 셀의 (본문, 헤더) ParagraphStyle - 한글은 글자 단위로 줄바꿈"""
+    result = {}
+    for 스타일명, (글자_크기, _) in _표_치수.items():
+        본문 = ParagraphStyle(
+            f"셀_{스타일명}", fontName=font_name, fontSize=글자_크기, leading=글자_크기 * 1.2,
+            alignment=TA_CENTER, wordWrap="CJK",
+        )
+        헤더 = ParagraphStyle(f"셀_헤더_{스타일명}", parent=본문, textColor=colors.whitesmoke)
+        result[스타일명] = (본문, 헤더)
+    return result
+
+
+def pdf_리소스():
+    """폰트 이름, ParagraphStyle, 공용 TableStyle을 담은 dict (프로세스당 한 번만 생성)"""
+    global _리소스
+    if _리소스 is None:
+        with _리소스_lock:
+            if _리소스 is None:
+                font_name = _폰트_등록()
+                _리소스 = {
+                    "font_name": font_name,
+                    "styles": _스타일(font_name),
+                    "table_styles": _표_스타일(font_name),
+                    "cell_styles": _셀_스타일(font_name),
+                }
+    return _리소스
+
+
+# 표 스타일별 (글자 크기, BOTTOMPADDING) - 행 높이 계산용
+_표_치수 = {
+    "데이터": (10, 8),
+    "데이터_작게": (9, 6),
+}
+_기본_위쪽_여백 = 3  # reportlab 기본 TOPPADDING
+_기본_옆_여백 = 6  # reportlab 기본 LEFTPADDING, RIGHTPADDING
+_열_너비_표본_행수 = 200
+
+
+def _열_너비(df, 가용_너비):
+    """앞부분 표본의 글자 수 비율로 열 너비를 정한다."""
+    표본 = df.head(_열_너비_표본_행수).astype(str)
+    길이 = np.array([
+        max(len(str(col)), int(표본[col].str.len().max()) if len(표본) else 0)
+        for col in df.columns
+    ], dtype=float)
+    길이 = np.clip(길이, 2, 30)
+    return (길이 / 길이.sum() * 가용_너비).tolist()
+
+
+def _줄_수(text, font_name, 글자_크기, 너비):
+    """글자 단위(CJK) 줄바꿈으로 text가 너비 안에서 차지하는 줄 수"""
+    줄_수 = 0
+    for line in text.split("\n"):
+        줄_수 += 1
+        if stringWidth(line, font_name, 글자_크기) <= 너비:
+            continue
+        현재 = 0
+        for 글자 in line:
+            글자_폭 = stringWidth(글자, font_name, 글자_크기)
+            if 현재 and 현재 + 글자_폭 > 너비:
+                줄_수 += 1
+                현재 = 0
+            현재 += 글자_폭
+    return 줄_수
+
+
+def 남은_높이(flowables, 가용_너비, 가용_높이):
+    """페이지 첫머리에 놓인 flowable들(제목 등) 다음에 남는 프레임 높이"""
+    사용 = 0
+    for flowable in flowables:
+        _, 높이 = flowable.wrap(가용_너비, 가용_높이)
+        사용 += 높이 + flowable.getSpaceBefore() + flowable.getSpaceAfter()
+    return max(가용_높이 - 사용, 0)
+
+
+def 긴_표(df, 스타일명, 가용_너비, 가용_높이, col_widths=None, 첫_높이=None):
+    """데이터프레임을 한 페이지 분량씩 나눈 Table 목록으로 만든다.
+
+    각 Table에는 헤더 행이 반복된다. 열 너비보다 긴 셀만 Paragraph로 감싸 줄바꿈하고,
+    행 높이는 셀별 줄 수로 미리 계산해 한 페이지에 들어가는 만큼씩 나눈다.
+    첫_높이는 첫 Table이 놓일 자리(제목 아래)에 남은 높이다. 없으면 가용_높이
+    """
+    글자_크기, 아래_여백 = _표_치수[스타일명]
+    줄_높이 = 글자_크기 * 1.2
+    리소스 = pdf_리소스()
+    font_name = 리소스["font_name"]
+    본문_스타일, 헤더_스타일 = 리소스["cell_styles"][스타일명]
+
+    if col_widths is None or len(col_widths) != len(df.columns):
+        col_widths = _열_너비(df, 가용_너비)
+    글자_너비 = [너비 - 2 * _기본_옆_여백 for 너비 in col_widths]
+
+    # 같은 값이 많으므로 (값, 열) 별로 한 번만 너비를 잰다
+    줄_수_캐시 = {}
+
+    def 셀(value, j, 스타일):
+        text = "" if value is None or (isinstance(value, float) and value != value) else str(value)
+        줄_수 = 줄_수_캐시.get((text, j))
+        if 줄_수 is None:
+            줄_수 = 줄_수_캐시[(text, j)] = _줄_수(text, font_name, 글자_크기, 글자_너비[j])
+        if 줄_수 > 1:
+            return Paragraph(escape(text).replace("\n", "<br/>"), 스타일), 줄_수
+        return text, 줄_수
+
+    def 행(values, 스타일):
+        cells = [셀(value, j, 스타일) for j, value in enumerate(values)]
+        높이 = max((줄_수 for _, 줄_수 in cells), default=1) * 줄_높이 + _기본_위쪽_여백 + 아래_여백
+        return [내용 for 내용, _ in cells], 높이
+
+    table_style = 리소스["table_styles"][스타일명]
+    header, 헤더_높이 = 행([str(col) for col in df.columns], 헤더_스타일)
+
+    tables = []
+    chunk = []
+    남은 = 첫_높이 if 첫_높이 is not None else 가용_높이
+    남은 -= 헤더_높이
+
+    def 표_추가():
+        table = Table([header] + chunk, colWidths=col_widths, repeatRows=1)
+        table.setStyle(table_style)
+        tables.append(table)
+
+    for values in df.to_numpy(dtype=object).tolist():
+        cells, 높이 = 행(values, 본문_스타일)
+        if chunk and 높이 > 남은:
+            표_추가()
+            chunk = []
+            남은 = 가용_높이 - 헤더_높이
+        chunk.append(cells)
+        남은 -= 높이
+    if chunk:
+        표_추가()
+    return tables
+
+
+# 사진 칸 최대 크기(인치)
+사진_폭 = 3.2
+사진_높이 = 2.4
+
+
+def 사진_표(사진_목록, 가용_너비):
+    """[(제목, 사진 ID, 설명)]을 사진 | 제목+설명 2열 Table 목록으로 만든다.
+
+    사진은 저장소의 인쇄용 JPEG 파일을 그대로 넣으므로 원본은 다시 디코딩하지 않는다.
+    """
+    리소스 = pdf_리소스()
+    normal_style = 리소스["styles"]["normal"]
+    table_style = 리소스["table_styles"]["사진"]
+    col_widths = [(사진_폭 + 0.2) * inch, 가용_너비 - (사진_폭 + 0.2) * inch]
+
+    tables = []
+    for 제목, 사진_id, 설명 in 사진_목록:
+        사진 = 인쇄용_사진(사진_id, 사진_폭, 사진_높이)
+        if 사진 is None:
+            continue
+        path, 폭, 높이 = 사진
+        내용 = f"<b>{escape(제목)}</b>"
+        if 설명:
+            내용 += "<br/>" + escape(str(설명)).replace("\n", "<br/>")
+        table = Table([[Image(path, 폭 * inch, 높이 * inch), Paragraph(내용, normal_style)]], colWidths=col_widths)
+        table.setStyle(table_style)
+        tables.append(table)
+        tables.append(Spacer(1, 0.15*inch))
+    return tables
+
+
+def PDF_보고서_생성(state, on_progress=None):
+    """전체 보고서 PDF bytes를 만든다.
+
+    on_progress(0~1)는 내용 구성을 마친 뒤와 페이지 배치 중에 호출된다.
+    """
+    리소스 = pdf_리소스()
+    styles = 리소스["styles"]
+    table_styles = 리소스["table_styles"]
+    title_style = styles["title"]
+    heading_style = styles["heading"]
+    subheading_style = styles["subheading"]
+    normal_style = styles["normal"]
+
+    pdf_buffer = BytesIO()
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    story = []
+
+    # 제목 페이지
+    story.append(Spacer(1, 1.5*inch))
+    story.append(Paragraph("근골격계 유해요인조사 보고서", title_style))
+    story.append(Spacer(1, 0.5*inch))
+
+    # 사업장 정보
+    if state.get("사업장명"):
+        사업장정보 = f"""
+        <para align="center" fontSize="14">
+        <b>사업장명:</b> {state.get("사업장명", "")}<br/>
+        <b>조사일:</b> {datetime.now().strftime('%Y년 %m월 %d일')}
+        </para>
+        """
+        story.append(Paragraph(사업장정보, normal_style))
+
+    story.append(PageBreak())
+
+    # 1. 사업장 개요
+    story.append(Paragraph("1. 사업장 개요", heading_style))
+
+    사업장_data = [
+        ["항목", "내용"],
+        ["사업장명", state.get("사업장명", "")],
+        ["소재지", state.get("소재지", "")],
+        ["업종", state.get("업종", "")],
+        ["예비조사일", str(state.get("예비조사", ""))],
+        ["본조사일", str(state.get("본조사", ""))],
+        ["수행기관", state.get("수행기관", "")],
+        ["담당자", state.get("성명", "")]
+    ]
+
+    t = Table(사업장_data, colWidths=[2*inch, 4*inch])
+    t.setStyle(table_styles["개요"])
+    story.append(t)
+    story.append(Spacer(1, 0.5*inch))
+
+    # 2. 근골격계 부담작업 체크리스트
+    checklist_df = state.get("checklist_df")
+    if isinstance(checklist_df, pd.DataFrame) and not checklist_df.empty:
+        story.append(PageBreak())
+        시작 = len(story)
+        story.append(Paragraph("2. 근골격계 부담작업 체크리스트", heading_style))
+
+        story.extend(긴_표(
+            checklist_df, "데이터", doc.width, doc.height,
+            첫_높이=남은_높이(story[시작:], doc.width, doc.height)
+        ))
+
+    # 3. 유해요인조사표
+    for 조사표명 in state.get("유해요인조사_목록", []) or []:
+        story.append(PageBreak())
+        story.append(Paragraph(f"3. {조사표명}", heading_style))
+
+        # 조사개요
+        story.append(Paragraph("가. 조사개요", subheading_style))
+        조사개요_data = [
+            ["조사일시", state.get(f"조사일시_{조사표명}", "")],
+            ["부서명", state.get(f"부서명_{조사표명}", "")],
+            ["조사자", state.get(f"조사자_{조사표명}", "")],
+            ["작업공정명", state.get(f"작업공정명_{조사표명}", "")],
+            ["작업명", state.get(f"작업명_{조사표명}", "")]
+        ]
+
+        조사개요_table = Table(조사개요_data, colWidths=[2*inch, 4*inch])
+        조사개요_table.setStyle(table_styles["항목"])
+        story.append(조사개요_table)
+        story.append(Spacer(1, 0.3*inch))
+
+        # 작업장 상황조사
+        story.append(Paragraph("나. 작업장 상황조사", subheading_style))
+        상황조사_data = [["항목", "상태", "세부사항"]]
+        for 항목 in 상황조사_항목:
+            상태, 세부사항 = 상황조사_세부사항(state, 항목, 조사표명)
+            상황조사_data.append([항목, 상태, 세부사항])
+
+        상황조사_table = Table(상황조사_data, colWidths=[1.5*inch, 2*inch, 2.5*inch])
+        상황조사_table.setStyle(table_styles["목록"])
+        story.append(상황조사_table)
+
+    # 4. 작업조건조사
+    작업명_목록_pdf = 작업명_인덱스(checklist_df)["작업명_목록"] if isinstance(checklist_df, pd.DataFrame) else []
+    for 작업명 in 작업명_목록_pdf:
+        작업_df = state.get(f"작업조건_data_{작업명}")
+        작업_사진 = 사진_표(작업_사진_목록(state, 작업명), doc.width)
+        작업조건_있음 = isinstance(작업_df, pd.DataFrame) and not 작업_df.empty
+        if 작업조건_있음 or 작업_사진:
+            story.append(PageBreak())
+            시작 = len(story)
+            story.append(Paragraph(f"4. 작업조건조사 - {작업명}", heading_style))
+
+        if 작업조건_있음:
+            story.extend(긴_표(
+                총점_적용(작업_df), "데이터", doc.width, doc.height,
+                첫_높이=남은_높이(story[시작:], doc.width, doc.height)
+            ))
+
+        if 작업_사진:
+            story.append(Spacer(1, 0.3*inch))
+            story.append(Paragraph("작업 사진", subheading_style))
+            story.extend(작업_사진)
+
+    # 정밀조사 (OWAS 분석 결과나 사진이 있는 조사만)
+    for 조사명 in state.get("정밀조사_목록", []) or []:
+        정밀_사진 = 사진_표(정밀조사_사진_목록(state, 조사명), doc.width)
+        owas_df = state.get(f"정밀_OWAS_data_{조사명}")
+        owas_있음 = isinstance(owas_df, pd.DataFrame) and not owas_df.empty
+        if not 정밀_사진 and not owas_있음:
+            continue
+        story.append(PageBreak())
+        시작 = len(story)
+        story.append(Paragraph(f"5. 정밀조사 - {조사명}", heading_style))
+        정밀_개요 = Table([
+            ["작업공정명", state.get(f"정밀_작업공정명_{조사명}", "")],
+            ["작업명", state.get(f"정밀_작업명_{조사명}", "")],
+        ], colWidths=[2*inch, 4*inch])
+        정밀_개요.setStyle(table_styles["항목"])
+        story.append(정밀_개요)
+        story.append(Spacer(1, 0.3*inch))
+        if owas_있음:
+            story.append(Paragraph("OWAS 작업자세 분석", subheading_style))
+            story.extend(긴_표(
+                owas_df, "데이터", doc.width, doc.height,
+                첫_높이=남은_높이(story[시작:], doc.width, doc.height)
+            ))
+            story.append(Spacer(1, 0.3*inch))
+        story.extend(정밀_사진)
+
+    # 5. 증상조사 분석
+    기초현황_df = state.get("기초현황_data_저장")
+    if isinstance(기초현황_df, pd.DataFrame) and not 기초현황_df.empty:
+        story.append(PageBreak())
+        시작 = len(story)
+        story.append(Paragraph("6. 근골격계 자기증상 분석", heading_style))
+
+        story.append(Paragraph("6.1 기초현황", subheading_style))
+        story.extend(긴_표(
+            기초현황_df, "데이터", doc.width, doc.height,
+            첫_높이=남은_높이(story[시작:], doc.width, doc.height)
+        ))
+        story.append(Spacer(1, 0.3*inch))
+
+    # 6. 작업환경개선계획서
+    개선계획_df = state.get("개선계획_data_저장")
+    if isinstance(개선계획_df, pd.DataFrame) and not 개선계획_df.empty:
+        개선계획_df_clean = 개선계획_df[개선계획_df.astype(str).ne('').any(axis=1)]
+        if not 개선계획_df_clean.empty:
+            story.append(PageBreak())
+            시작 = len(story)
+            story.append(Paragraph("7. 작업환경개선계획서", heading_style))
+
+            # 컬럼 너비 조정
+            col_widths = [0.8*inch, 0.8*inch, 1*inch, 1.2*inch, 1*inch, 1.2*inch, 0.8*inch, 0.8*inch, 0.8*inch]
+
+            story.extend(긴_표(
+                개선계획_df_clean, "데이터_작게", doc.width, doc.height, col_widths=col_widths,
+                첫_높이=남은_높이(story[시작:], doc.width, doc.height)
+            ))
+
+    # PDF 생성 (내용 구성 20%, 페이지 배치 80%로 진행률 보고)
+    if on_progress is not None:
+        on_progress(0.2)
+        전체_개수 = {"값": len(story)}
+
+        def 배치_진행(typ, value):
+            if typ == "SIZE_EST":
+                전체_개수["값"] = max(value, 1)
+            elif typ == "PROGRESS":
+                on_progress(0.2 + 0.8 * min(value / 전체_개수["값"], 1.0))
+
+        doc.setProgressCallBack(배치_진행)
+    doc.build(story)
+    return pdf_buffer.getvalue()
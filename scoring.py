@@ -0,0 +1,56 @@
+"""작업조건조사 총점(작업부하 × 작업빈도) 계산"""
+import numpy as np
+import pandas as pd
+
+# 선택지 순서가 곧 점수 (빈 값 = 0)
+부하옵션 = [
+    "",
+    "매우쉬움(1)",
+    "쉬움(2)",
+    "약간 힘듦(3)",
+    "힘듦(4)",
+    "매우 힘듦(5)"
+]
+빈도옵션 = [
+    "",
+    "3개월마다(1)",
+    "가끔(2)",
+    "자주(3)",
+    "계속(4)",
+    "초과근무(5)"
+]
+
+부하_dtype = pd.CategoricalDtype(부하옵션)
+빈도_dtype = pd.CategoricalDtype(빈도옵션)
+
+
+def 라벨_코드(values, dtype):
+    """'힘듦(4)' 형태의 라벨을 정수 점수(int8)로 변환한다."""
+    series = pd.Series(values, copy=False)
+    if series.dtype == dtype:
+        codes = series.cat.codes.to_numpy(dtype=np.int8, copy=True)
+    else:
+        codes = dtype.categories.get_indexer(series).astype(np.int8)
+
+    # 선택지에 없는 라벨은 괄호 안 숫자로 보정 (이전 저장파일 호환)
+    unknown = codes < 0
+    if unknown.any():
+        extracted = series[unknown].astype(str).str.extract(r"\((\d+)\)", expand=False)
+        codes[unknown] = pd.to_numeric(extracted, errors="coerce").fillna(0).to_numpy(dtype=np.int8)
+    return codes
+
+
+def 총점_계산(df):
+    """데이터프레임 전체의 총점을 한 번에 계산한다."""
+    if df.empty or "작업부하(A)" not in df.columns or "작업빈도(B)" not in df.columns:
+        return pd.Series(0, index=df.index, dtype=np.int16)
+    부하값 = 라벨_코드(df["작업부하(A)"], 부하_dtype).astype(np.int16)
+    빈도값 = 라벨_코드(df["작업빈도(B)"], 빈도_dtype).astype(np.int16)
+    return pd.Series(부하값 * 빈도값, index=df.index)
+
+
+def 총점_적용(df):
+    """총점 컬럼을 채운 사본을 반환한다."""
+    result = df.copy()
+    result["총점"] = 총점_계산(result)
+    return result
@@ -0,0 +1,165 @@
+"""임시저장 대상 세션 키 스키마
+
+저장/복원하는 세션 키와 값의 타입을 한 곳에 선언한다.
+고정 키는 dict로 바로 찾고, 작업명/조사명이 붙는 키는 정규식 하나로 한 번에 판별한다.
+스키마에 없는 키(위젯 내부 상태, 버튼, 파일 업로더 등)는 저장하지도 복원하지도 않는다.
+
+지문_갱신()은 세션 값의 내용 지문을 계산한다. (보고서 시트 캐시와 자동저장이 같이 씀)
+
+값 타입: "문자열", "정수", "날짜", "목록", 또는 ("표", 열별 dtype, 나머지 열 dtype)
+표의 열 dtype은 "문자열", "정수", "범주" 또는 pd.CategoricalDtype이다.
+"""
+import pickle
+import re
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from checklist import 호_컬럼, 호_dtype
+
+_작은_표_행수 = 1000  # 지문 계산 때 값 목록을 pickle로 해시하는 표 크기
+
+
+def _표(열_dtype=None, 기본="문자열"):
+    return ("표", 열_dtype or {}, 기본)
+
+
+체크리스트_표 = _표({"작업명": "범주", "단위작업명": "문자열", **{col: 호_dtype for col in 호_컬럼}})
+작업조건_표 = _표({"총점": "정수"})
+문자열_표 = _표()
+
+고정_키 = {
+    # 사업장개요
+    "사업장명": "문자열",
+    "소재지": "문자열",
+    "업종": "문자열",
+    "예비조사": "날짜",
+    "본조사": "날짜",
+    "수행기관": "문자열",
+    "성명": "문자열",
+    # 체크리스트
+    "checklist_df": 체크리스트_표,
+    "체크리스트_업로드_방식": "문자열",
+    # 조사표/작업 목록
+    "유해요인조사_목록": "목록",
+    "정밀조사_목록": "목록",
+    "작업명_선택": "문자열",
+    # 증상조사
+    "기초현황_data_저장": 문자열_표,
+    "작업기간_data_저장": 문자열_표,
+    "육체적부담_data_저장": 문자열_표,
+    "통증호소자_작업명_목록": "목록",
+    "통증호소자_data_저장": 문자열_표,
+    "새작업명_통증": "문자열",
+    # 개선계획서, 보고서
+    "개선계획_data_저장": 문자열_표,
+    "엑셀_엔진_선택": "문자열",
+}
+
+# (키 패턴, 타입) - 패턴 뒤에는 작업명 또는 조사표명이 붙는다
+패턴_키 = [
+    # 유해요인조사표
+    (r"(조사일시|부서명|조사자|작업공정명|작업명)_.+", "문자열"),
+    (r"(작업설비|작업량|작업속도|업무변화)_상태_.+", "문자열"),
+    (r"(작업설비|작업량|작업속도|업무변화)_(감소_시작|증가_시작|기타_내용)_.+", "문자열"),
+    # 작업조건조사
+    (r"(1단계_작업공정|1단계_작업내용|3단계_작업명|3단계_근로자수)_.+", "문자열"),
+    (r"작업조건_data_(?!editor_).+", 작업조건_표),
+    (r"원인분석_data_(?!editor_).+", 문자열_표),
+    (r"사진개수_.+", "정수"),
+    (r"사진_\d+_설명_.+", "문자열"),
+    (r"사진_\d+_id_.+", "문자열"),
+    # 정밀조사
+    (r"(정밀_작업공정명|정밀_작업명)_.+", "문자열"),
+    (r"정밀_원인분석_data_.+", 문자열_표),
+    (r"정밀_OWAS_data_.+", 문자열_표),
+    (r"정밀_사진_id_.+", "목록"),
+]
+
+_패턴 = re.compile("|".join(f"(?P<p{i}>{pattern})" for i, (pattern, _) in enumerate(패턴_키)))
+
+
+def 키_타입(key):
+    """세션 키의 스키마 타입. 스키마에 없는 키는 None"""
+    타입 = 고정_키.get(key)
+    if 타입 is not None:
+        return 타입
+    m = _패턴.fullmatch(key)
+    if m is None:
+        return None
+    return 패턴_키[int(m.lastgroup[1:])][1]
+
+
+def _결측(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def _문자열_열(values):
+    """편집기와 같은 문자열(object) 값 목록, 결측은 None"""
+    return [value if type(value) is str else (None if _결측(value) else str(value)) for value in values]
+
+
+def _열_복원(values, dtype):
+    """문자열이 아닌 열 값 목록(또는 Series)을 선언된 dtype의 배열로 만든다."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        if isinstance(values, pd.Series) and values.dtype == dtype:
+            return values.array
+        return pd.Categorical.from_codes(dtype.categories.get_indexer(pd.Index(values, dtype=object)), dtype=dtype)
+    if dtype == "범주":
+        return pd.Categorical(values)
+    if dtype == "정수":
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").fillna(0).astype("int64").to_numpy()
+    raise ValueError(f"알 수 없는 열 dtype: {dtype}")
+
+
+def 표_복원(타입, columns, data):
+    """열 이름 목록과 열별 값 목록으로 선언된 dtype의 데이터프레임을 만든다.
+
+    문자열 열은 object 2차원 배열 하나에 모아 한 번에 만들고, 나머지 열만 따로 변환한다.
+    """
+    _, 열_dtype, 기본 = 타입
+    행수 = len(data[0]) if len(data) else 0
+    block = np.empty((행수, len(columns)), dtype=object)
+    변환_열 = {}
+    for j, (col, values) in enumerate(zip(columns, data)):
+        dtype = 열_dtype.get(col, 기본)
+        if isinstance(dtype, str) and dtype == "문자열":
+            block[:, j] = _문자열_열(values)
+        else:
+            변환_열[col] = _열_복원(values, dtype)
+    df = pd.DataFrame(block, columns=columns, dtype=object)
+    for col, values in 변환_열.items():
+        df[col] = values
+    return df
+
+
+def 값_복원(타입, value):
+    """저장된 스칼라/목록 값을 선언된 타입으로 되돌린다."""
+    if 타입 == "문자열":
+        return "" if value is None else str(value)
+    if 타입 == "정수":
+        return int(value)
+    if 타입 == "날짜":
+        if isinstance(value, (date, datetime)):
+            return value if not isinstance(value, datetime) else value.date()
+        return date.fromisoformat(str(value)[:10])
+    if 타입 == "목록":
+        return [str(item) for item in value]
+    raise ValueError(f"알 수 없는 스키마 타입: {타입}")
+
+
+def 지문_갱신(h, value):
+    """세션 값 하나의 내용을 해시 객체 h에 넣는다. (보고서 시트 캐시, 자동저장 델타 비교용)"""
+    if isinstance(value, pd.DataFrame):
+        h.update(repr(list(value.columns)).encode())
+        try:
+            # 작은 표는 값 목록을 pickle 하는 편이 hash_pandas_object의 고정 비용보다 빠르다
+            if len(value) <= _작은_표_행수:
+                h.update(pickle.dumps(value.to_numpy(dtype=object).tolist(), protocol=pickle.HIGHEST_PROTOCOL))
+            else:
+                h.update(pd.util.hash_pandas_object(value, index=False, categorize=False).to_numpy().tobytes())
+        except (TypeError, pickle.PicklingError):
+            h.update(repr(value.to_dict("list")).encode())
+    else:
+        h.update(repr(value).encode())
@@ -0,0 +1,139 @@
+"""임시저장 스냅샷 형식
+
+하나의 zip 안에 manifest.json과 데이터프레임 파일을 담는다.
+데이터프레임은 열(column) 단위로 저장한다. 행이 많은 표(체크리스트 등)는 표마다 Parquet 파일로,
+작은 표와 Parquet로 바꿀 수 없는 표(여러 타입이 섞인 열 등)는 frames.json 하나에 열 배열로 모아 저장한다.
+나머지 값(문자열, 숫자, 날짜 등)은 manifest의 "값"에 들어간다.
+이전 버전의 JSON 임시저장 파일도 그대로 불러올 수 있다.
+저장/복원 대상 키와 타입은 session_schema에 선언되어 있다.
+"""
+import json
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+
+from session_schema import 키_타입, 표_복원, 값_복원
+
+형식_이름 = "wmsd-snapshot"
+형식_버전 = 1
+매니페스트_파일 = "manifest.json"
+작은_표_파일 = "frames.json"
+# 이보다 행이 많은 표만 Parquet로 저장 (작은 표는 Parquet 파일마다 붙는 메타데이터가 더 큼)
+parquet_최소_행수 = 1000
+
+
+def 저장_값(value):
+    """manifest에 넣을 수 있는 값으로 변환한다. 저장하지 않는 값은 None"""
+    if isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    if hasattr(value, 'isoformat'):  # datetime 객체
+        return value.isoformat()
+    return None
+
+
+def _열_단위(df):
+    return {"columns": [str(col) for col in df.columns], "data": df.to_numpy(dtype=object).T.tolist()}
+
+
+def _parquet_쓰기(zf, 경로, df):
+    """Parquet로 쓸 수 있으면 zip에 쓰고 True"""
+    buffer = BytesIO()
+    try:
+        df.to_parquet(buffer, engine="pyarrow", compression="zstd")
+    except Exception:
+        # 여러 타입이 섞인 열 등
+        return False
+    # Parquet는 이미 압축되어 있으므로 zip에서는 다시 압축하지 않음
+    zf.writestr(경로, buffer.getvalue(), compress_type=zipfile.ZIP_STORED)
+    return True
+
+
+def 스냅샷_저장(session_state):
+    """세션 상태 중 세션 스키마에 있는 키만 스냅샷 zip(bytes)으로 저장한다."""
+    값 = {}
+    프레임 = {}
+    작은_표 = {}
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for key, value in list(session_state.items()):
+            if 키_타입(key) is None:
+                continue
+            if isinstance(value, pd.DataFrame):
+                경로 = f"frames/{len(프레임)}.parquet"
+                if len(value) > parquet_최소_행수 and _parquet_쓰기(zf, 경로, value):
+                    프레임[key] = {"형식": "parquet", "파일": 경로}
+                else:
+                    프레임[key] = {"형식": "json"}
+                    작은_표[key] = _열_단위(value)
+            else:
+                value = 저장_값(value)
+                if value is not None:
+                    값[key] = value
+
+        zf.writestr(작은_표_파일, json.dumps(작은_표, ensure_ascii=False, default=str))
+        manifest = {"형식": 형식_이름, "버전": 형식_버전, "값": 값, "프레임": 프레임}
+        zf.writestr(매니페스트_파일, json.dumps(manifest, ensure_ascii=False, default=str))
+    return buffer.getvalue()
+
+
+def _복원(restored, 무시, key, value=None, columns=None, data=None):
+    """스키마에 맞는 값이면 타입을 맞춰 restored에 넣고, 아니면 무시 목록에 넣는다."""
+    타입 = 키_타입(key)
+    표 = columns is not None
+    if 타입 is None or isinstance(타입, tuple) != 표:
+        무시.append(key)
+        return
+    try:
+        restored[key] = 표_복원(타입, columns, data) if 표 else 값_복원(타입, value)
+    except (TypeError, ValueError):
+        무시.append(key)
+
+
+def _json_불러오기(raw):
+    """이전 버전의 JSON 임시저장 파일 (데이터프레임은 행 단위 dict 목록)"""
+    restored = {}
+    무시 = []
+    for key, value in json.loads(raw).items():
+        if isinstance(키_타입(key), tuple) and isinstance(value, list):
+            # 행 단위 레코드를 열 단위로 바꿔서 복원
+            columns = list(dict.fromkeys(col for record in value for col in record))
+            data = [[record.get(col) for record in value] for col in columns]
+            _복원(restored, 무시, key, columns=columns, data=data)
+        else:
+            _복원(restored, 무시, key, value)
+    return restored, 무시
+
+
+def 스냅샷_불러오기(file):
+    """스냅샷 zip 또는 이전 JSON 임시저장 파일을 읽어 세션 스키마에 맞게 복원한다.
+
+    (복원한 {키: 값}, 스키마에 없거나 타입이 맞지 않아 건너뛴 키 목록)을 반환한다.
+    """
+    raw = file.read() if hasattr(file, "read") else file
+    if not zipfile.is_zipfile(BytesIO(raw)):
+        return _json_불러오기(raw)
+
+    with zipfile.ZipFile(BytesIO(raw)) as zf:
+        manifest = json.loads(zf.read(매니페스트_파일))
+        if manifest.get("형식") != 형식_이름:
+            raise ValueError("근골격계 조사 임시저장 파일이 아닙니다.")
+        if manifest.get("버전", 0) > 형식_버전:
+            raise ValueError("더 새로운 버전에서 저장한 파일입니다. 프로그램을 업데이트해주세요.")
+
+        restored = {}
+        무시 = []
+        for key, value in manifest["값"].items():
+            _복원(restored, 무시, key, value)
+
+        작은_표 = json.loads(zf.read(작은_표_파일))
+        for key, 정보 in manifest["프레임"].items():
+            if 키_타입(key) is None:
+                # 스키마에 없는 표는 읽지 않음
+                무시.append(key)
+            elif 정보["형식"] == "parquet":
+                df = pd.read_parquet(BytesIO(zf.read(정보["파일"])), engine="pyarrow")
+                _복원(restored, 무시, key, columns=list(df.columns), data=[df[col] for col in df.columns])
+            else:
+                _복원(restored, 무시, key, columns=작은_표[key]["columns"], data=작은_표[key]["data"])
+    return restored, 무시
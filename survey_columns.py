@@ -0,0 +1,16 @@
+"""조사 표 열 정의
+
+화면 편집기, 보고서, 조사 보관함, 분석 모듈이 같이 쓰는 표 열 목록을 한 곳에 둔다.
+"""
+
+작업조건_컬럼 = ["단위작업명", "부담작업(호)", "작업부하(A)", "작업빈도(B)", "총점"]
+원인분석_컬럼 = ["번호", "단위작업명", "유해요인", "부담작업", "발생원인", "비고"]
+개선계획_컬럼 = [
+    "공정명", "작업명", "단위작업명", "문제점(유해요인의 원인)", "근로자의견",
+    "개선방안", "추진일정", "개선비용", "개선우선순위",
+]
+
+# 정밀조사 원인분석 표 (평가도구 결과가 들어가는 표)
+정밀_원인분석_컬럼 = ["작업분석 및 평가도구", "분석결과", "만점"]
+# 정밀조사 OWAS 조치수준별 분포 표
+정밀_OWAS_컬럼 = ["조치수준", "관측수", "시간(초)", "비율(%)"]
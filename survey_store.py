@@ -0,0 +1,343 @@
+"""여러 사업장 조사를 보관하는 SQLite 저장소
+
+조사 하나의 세션 데이터를 정규화된 표(체크리스트, 작업조건, 원인분석, 정밀 원인분석/OWAS, 증상조사, 개선계획)에
+나누어 저장한다. 목록 화면은 조사 표의 개요만 읽고, 조사 하나를 열 때만 그 조사의 행을 읽는다.
+증상조사 표는 열 구성이 표마다 달라 (표, 행, 열, 값) 형태로 저장한다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from checklist import 호_컬럼, 호_옵션, 호_코드
+from session_schema import 키_타입, 표_복원, 값_복원
+from snapshot import 저장_값
+from survey_columns import 작업조건_컬럼, 원인분석_컬럼, 개선계획_컬럼, 정밀_원인분석_컬럼, 정밀_OWAS_컬럼
+
+DB_경로 = os.environ.get("WMSD_DB_PATH", "surveys.sqlite")
+
+개요_컬럼 = ["사업장명", "소재지", "업종", "예비조사", "본조사", "수행기관", "성명"]
+증상조사_표 = {
+    "기초현황": "기초현황_data_저장",
+    "작업기간": "작업기간_data_저장",
+    "육체적부담": "육체적부담_data_저장",
+    "통증호소자": "통증호소자_data_저장",
+}
+
+# 작업명/조사명별로 나뉘는 표: (테이블, 구분 열, 세션 키 접두사, 열 목록)
+_구분_표 = [
+    ("작업조건", "작업명", "작업조건_data_", 작업조건_컬럼),
+    ("원인분석", "작업명", "원인분석_data_", 원인분석_컬럼),
+    ("정밀_원인분석", "조사명", "정밀_원인분석_data_", 정밀_원인분석_컬럼),
+    ("정밀_OWAS", "조사명", "정밀_OWAS_data_", 정밀_OWAS_컬럼),
+]
+
+
+def _열(columns, types=None):
+    types = types or {}
+    return ", ".join(f'"{col}" {types.get(col, "TEXT")}' for col in columns)
+
+
+_스키마 = f"""
+CREATE TABLE IF NOT EXISTS 조사 (
+    조사_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    {_열(개요_컬럼)},
+    저장시각 REAL NOT NULL,
+    값 TEXT NOT NULL DEFAULT '{{}}'
+);
+CREATE INDEX IF NOT EXISTS 조사_사업장명 ON 조사 (사업장명);
+
+CREATE TABLE IF NOT EXISTS 체크리스트 (
+    조사_id INTEGER NOT NULL REFERENCES 조사 ON DELETE CASCADE,
+    행 INTEGER NOT NULL,
+    작업명 TEXT, 단위작업명 TEXT,
+    {_열(호_컬럼, {col: "INTEGER" for col in 호_컬럼})},
+    출처파일 TEXT
+);
+CREATE INDEX IF NOT EXISTS 체크리스트_조사 ON 체크리스트 (조사_id);
+CREATE INDEX IF NOT EXISTS 체크리스트_작업명 ON 체크리스트 (작업명);
+
+CREATE TABLE IF NOT EXISTS 작업조건 (
+    조사_id INTEGER NOT NULL REFERENCES 조사 ON DELETE CASCADE,
+    작업명 TEXT NOT NULL, 행 INTEGER NOT NULL,
+    {_열(작업조건_컬럼, {"총점": "INTEGER"})}
+);
+CREATE INDEX IF NOT EXISTS 작업조건_조사 ON 작업조건 (조사_id);
+CREATE INDEX IF NOT EXISTS 작업조건_작업명 ON 작업조건 (작업명);
+
+CREATE TABLE IF NOT EXISTS 원인분석 (
+    조사_id INTEGER NOT NULL REFERENCES 조사 ON DELETE CASCADE,
+    작업명 TEXT NOT NULL, 행 INTEGER NOT NULL,
+    {_열(원인분석_컬럼)}
+);
+CREATE INDEX IF NOT EXISTS 원인분석_조사 ON 원인분석 (조사_id);
+CREATE INDEX IF NOT EXISTS 원인분석_작업명 ON 원인분석 (작업명);
+
+CREATE TABLE IF NOT EXISTS 정밀_원인분석 (
+    조사_id INTEGER NOT NULL REFERENCES 조사 ON DELETE CASCADE,
+    조사명 TEXT NOT NULL, 행 INTEGER NOT NULL,
+    {_열(정밀_원인분석_컬럼)}
+);
+CREATE INDEX IF NOT EXISTS 정밀_원인분석_조사 ON 정밀_원인분석 (조사_id);
+
+CREATE TABLE IF NOT EXISTS 정밀_OWAS (
+    조사_id INTEGER NOT NULL REFERENCES 조사 ON DELETE CASCADE,
+    조사명 TEXT NOT NULL, 행 INTEGER NOT NULL,
+    {_열(정밀_OWAS_컬럼)}
+);
+CREATE INDEX IF NOT EXISTS 정밀_OWAS_조사 ON 정밀_OWAS (조사_id);
+
+CREATE TABLE IF NOT EXISTS 증상조사 (
+    조사_id INTEGER NOT NULL REFERENCES 조사 ON DELETE CASCADE,
+    표 TEXT NOT NULL, 행 INTEGER NOT NULL, 열 INTEGER NOT NULL,
+    열이름 TEXT NOT NULL, 값 TEXT
+);
+CREATE INDEX IF NOT EXISTS 증상조사_조사 ON 증상조사 (조사_id, 표);
+
+CREATE TABLE IF NOT EXISTS 개선계획 (
+    조사_id INTEGER NOT NULL REFERENCES 조사 ON DELETE CASCADE,
+    행 INTEGER NOT NULL,
+    {_열(개선계획_컬럼)}
+);
+CREATE INDEX IF NOT EXISTS 개선계획_조사 ON 개선계획 (조사_id);
+CREATE INDEX IF NOT EXISTS 개선계획_작업명 ON 개선계획 (작업명);
+"""
+
+
+_스키마_적용 = set()  # 이 프로세스에서 스키마를 만든 DB 경로 (조사_목록()은 rerun마다 불리므로 한 번만 실행)
+_스키마_lock = threading.Lock()
+
+
+def 연결(path=None):
+    path = path or DB_경로
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    with _스키마_lock:
+        if path not in _스키마_적용:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(_스키마)
+            _스키마_적용.add(path)
+    return conn
+
+
+def _이름(columns):
+    return ", ".join(f'"{col}"' for col in columns)
+
+
+def _텍스트(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def _행_목록(df, columns, 정수_열=()):
+    """데이터프레임을 columns 순서의 튜플 목록으로 바꾼다. 없는 열은 None"""
+    values = df.reindex(columns=columns).to_numpy(dtype=object)
+    정수_위치 = [j for j, col in enumerate(columns) if col in 정수_열]
+    rows = []
+    for row in values:
+        row = [_텍스트(value) for value in row]
+        for j in 정수_위치:
+            number = pd.to_numeric(row[j], errors="coerce")
+            row[j] = None if pd.isna(number) else int(number)
+        rows.append(row)
+    return rows
+
+
+def _insert(conn, table, columns, rows):
+    conn.executemany(f"INSERT INTO {table} ({_이름(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+
+
+def 조사_저장(state, 조사_id=None, path=None):
+    """세션 상태를 조사 하나로 저장하고 조사_id를 반환한다. 조사_id를 주면 그 조사를 덮어쓴다."""
+    개요 = [_텍스트(저장_값(state.get(col))) for col in 개요_컬럼]
+    값 = {}
+    for key, value in list(state.items()):
+        타입 = 키_타입(key)
+        if 타입 is None or isinstance(타입, tuple) or key in 개요_컬럼:
+            continue
+        value = 저장_값(value)
+        if value is not None:
+            값[key] = value
+
+    conn = 연결(path)
+    try:
+        with conn:
+            if 조사_id is None:
+                조사_id = conn.execute(
+                    f"INSERT INTO 조사 ({_이름(개요_컬럼)}, 저장시각, 값) "
+                    f"VALUES ({', '.join('?' * (len(개요_컬럼) + 2))})",
+                    개요 + [time.time(), json.dumps(값, ensure_ascii=False)],
+                ).lastrowid
+            else:
+                updated = conn.execute(
+                    f"UPDATE 조사 SET {', '.join(f'{col} = ?' for col in 개요_컬럼)}, 저장시각 = ?, 값 = ? "
+                    "WHERE 조사_id = ?",
+                    개요 + [time.time(), json.dumps(값, ensure_ascii=False), 조사_id],
+                ).rowcount
+                if not updated:
+                    raise ValueError(f"조사를 찾을 수 없습니다: {조사_id}")
+                for table in ["체크리스트", "작업조건", "원인분석", "정밀_원인분석", "정밀_OWAS", "증상조사", "개선계획"]:
+                    conn.execute(f"DELETE FROM {table} WHERE 조사_id = ?", (조사_id,))
+
+            _표_저장(conn, 조사_id, state)
+    finally:
+        conn.close()
+    return 조사_id
+
+
+def _표_저장(conn, 조사_id, state):
+    checklist_df = state.get("checklist_df")
+    if isinstance(checklist_df, pd.DataFrame) and not checklist_df.empty:
+        # 1호~11호는 0=O(해당), 1=△(잠재위험), 2=X(미해당) 코드로 저장
+        codes = 호_코드(checklist_df).tolist()
+        이름 = _행_목록(checklist_df, ["작업명", "단위작업명", "출처파일"])
+        _insert(
+            conn, "체크리스트", ["조사_id", "행", "작업명", "단위작업명"] + 호_컬럼 + ["출처파일"],
+            [[조사_id, i, 작업명, 단위작업명] + code + [출처] for i, ((작업명, 단위작업명, 출처), code) in enumerate(zip(이름, codes))],
+        )
+
+    for key, value in list(state.items()):
+        if not isinstance(value, pd.DataFrame) or not isinstance(키_타입(key), tuple):
+            continue
+        for table, 구분_열, 접두사, columns in _구분_표:
+            if key.startswith(접두사):
+                구분 = key[len(접두사):]
+                rows = _행_목록(value, columns, 정수_열=("총점",))
+                _insert(conn, table, ["조사_id", 구분_열, "행"] + columns, [[조사_id, 구분, i] + row for i, row in enumerate(rows)])
+                break
+
+    for 표, key in 증상조사_표.items():
+        df = state.get(key)
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            columns = [str(col) for col in df.columns]
+            rows = _행_목록(df, list(df.columns))
+            _insert(
+                conn, "증상조사", ["조사_id", "표", "행", "열", "열이름", "값"],
+                [[조사_id, 표, i, j, columns[j], value] for i, row in enumerate(rows) for j, value in enumerate(row)],
+            )
+
+    df = state.get("개선계획_data_저장")
+    if isinstance(df, pd.DataFrame) and not df.empty:
+        _insert(conn, "개선계획", ["조사_id", "행"] + 개선계획_컬럼,
+                [[조사_id, i] + row for i, row in enumerate(_행_목록(df, 개선계획_컬럼))])
+
+
+def 조사_목록(사업장명=None, path=None):
+    """저장된 조사 개요 (행 데이터는 읽지 않음). 최근 저장한 것부터"""
+    sql = f"SELECT 조사_id, {', '.join(개요_컬럼)}, 저장시각 FROM 조사"
+    params = []
+    if 사업장명:
+        sql += " WHERE 사업장명 = ?"
+        params.append(사업장명)
+    conn = 연결(path)
+    try:
+        df = pd.read_sql_query(sql + " ORDER BY 저장시각 DESC", conn, params=params)
+    finally:
+        conn.close()
+    df["저장시각"] = pd.to_datetime(df["저장시각"], unit="s")
+    return df
+
+
+def 조사_표(table, 조사_id=None, 작업명=None, path=None):
+    """저장소의 표 하나를 조회한다. 조사_id/작업명으로 거를 수 있다. (여러 조사 비교/집계용)"""
+    if table not in {"체크리스트", "작업조건", "원인분석", "정밀_원인분석", "정밀_OWAS", "증상조사", "개선계획"}:
+        raise ValueError(f"알 수 없는 표입니다: {table}")
+    조건 = []
+    params = []
+    if 조사_id is not None:
+        조건.append("조사_id = ?")
+        params.append(조사_id)
+    if 작업명 is not None:
+        조건.append("작업명 = ?")
+        params.append(작업명)
+    sql = f"SELECT * FROM {table}"
+    if 조건:
+        sql += " WHERE " + " AND ".join(조건)
+    conn = 연결(path)
+    try:
+        return pd.read_sql_query(sql + " ORDER BY rowid", conn, params=params)
+    finally:
+        conn.close()
+
+
+def 조사_불러오기(조사_id, path=None):
+    """조사 하나를 세션 상태 {키: 값}으로 읽는다. 값 타입은 세션 스키마를 따른다."""
+    conn = 연결(path)
+    try:
+        row = conn.execute(
+            f"SELECT {', '.join(개요_컬럼)}, 값 FROM 조사 WHERE 조사_id = ?", (조사_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"조사를 찾을 수 없습니다: {조사_id}")
+
+        restored = {}
+        for key, value in list(zip(개요_컬럼, row[:-1])) + list(json.loads(row[-1]).items()):
+            타입 = 키_타입(key)
+            if value is not None and 타입 is not None and not isinstance(타입, tuple):
+                restored[key] = 값_복원(타입, value)
+
+        rows = conn.execute(
+            f"SELECT 작업명, 단위작업명, {_이름(호_컬럼)}, 출처파일 "
+            "FROM 체크리스트 WHERE 조사_id = ? ORDER BY 행", (조사_id,)
+        ).fetchall()
+        if rows:
+            columns = ["작업명", "단위작업명"] + 호_컬럼 + ["출처파일"]
+            data = [list(col) for col in zip(*rows)]
+            for j in range(2, 2 + len(호_컬럼)):
+                data[j] = [호_옵션[code] for code in data[j]]
+            if all(value is None for value in data[-1]):
+                columns, data = columns[:-1], data[:-1]
+            restored["checklist_df"] = 표_복원(키_타입("checklist_df"), columns, data)
+
+        for table, 구분_열, 접두사, columns in _구분_표:
+            rows = conn.execute(
+                f"SELECT {구분_열}, {_이름(columns)} "
+                f"FROM {table} WHERE 조사_id = ? ORDER BY {구분_열}, 행", (조사_id,)
+            ).fetchall()
+            그룹 = {}
+            for row in rows:
+                그룹.setdefault(row[0], []).append(row[1:])
+            for 구분, 그룹_rows in 그룹.items():
+                key = 접두사 + 구분
+                restored[key] = 표_복원(키_타입(key), columns, [list(col) for col in zip(*그룹_rows)])
+
+        for 표, key in 증상조사_표.items():
+            cells = conn.execute(
+                "SELECT 행, 열, 열이름, 값 FROM 증상조사 WHERE 조사_id = ? AND 표 = ? ORDER BY 행, 열", (조사_id, 표)
+            ).fetchall()
+            if not cells:
+                continue
+            columns = {}
+            for _, j, 열이름, _ in cells:
+                columns[j] = 열이름
+            행수 = max(i for i, _, _, _ in cells) + 1
+            data = {j: [None] * 행수 for j in columns}
+            for i, j, _, value in cells:
+                data[j][i] = value
+            restored[key] = 표_복원(키_타입(key), [columns[j] for j in sorted(columns)], [data[j] for j in sorted(columns)])
+
+        rows = conn.execute(
+            f"SELECT {_이름(개선계획_컬럼)} "
+            "FROM 개선계획 WHERE 조사_id = ? ORDER BY 행", (조사_id,)
+        ).fetchall()
+        if rows:
+            restored["개선계획_data_저장"] = 표_복원(
+                키_타입("개선계획_data_저장"), 개선계획_컬럼, [list(col) for col in zip(*rows)]
+            )
+    finally:
+        conn.close()
+    return restored
+
+
+def 조사_삭제(조사_id, path=None):
+    conn = 연결(path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM 조사 WHERE 조사_id = ?", (조사_id,))
+    finally:
+        conn.close()
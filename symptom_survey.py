@@ -0,0 +1,279 @@
+"""근골격계 증상조사 설문 원자료 집계
+
+근로자 한 명이 한 행인 설문 원자료(CSV/엑셀)를 청크 단위로 읽어 숫자/코드 열로 정규화하고,
+청크마다 작업명별 합계(응답자 수, 나이/근속년수 합, 성별, 작업기간 구간, 육체적 부담정도)를
+group-by로 구한 뒤 마지막에 한 번 더 더해서 기초현황/작업기간/육체적부담 표를 만든다.
+부위별 통증 응답(기간/빈도/정도)이 있으면 근로자 전체를 배열 연산으로 한 번에 분류해 통증호소자 표도 만든다.
+결과 표는 증상조사 화면 편집기와 같은 문자열 표다.
+"""
+import numpy as np
+import pandas as pd
+
+from chunk_reader import 청크_크기, 행_청크
+from excel_templates import 증상조사_컬럼
+
+전체_행 = "전체"  # 표 마지막 합계 행의 작업명 (표를 만들 때만 붙임)
+_전체_작업명 = "전체(작업명)"  # 원자료 작업명이 "전체"이면 합계 행과 구분되도록 바꾸는 이름
+
+# 표준 열 이름 -> 원자료에서 허용하는 머리글 (공백은 무시하고 비교)
+원자료_열 = {
+    "작업명": ["작업명", "작업", "담당작업"],
+    "나이": ["나이", "연령", "만나이"],
+    "성별": ["성별"],
+    "근속년수": ["근속년수", "근속연수", "근속기간"],
+    "현재작업기간": ["현재작업기간", "작업기간"],
+    "이전작업기간": ["이전작업기간"],
+    "육체적부담": ["육체적부담", "육체적부담정도", "부담정도"],
+}
+_숫자_열 = ["나이", "근속년수", "현재작업기간", "이전작업기간"]
+_기간_형식 = (
+    r"^\s*(?:(?P<년>\d+(?:\.\d+)?)\s*(?P<단위>년|세|살)?)?"
+    r"\s*(?:(?P<월>\d+(?:\.\d+)?)\s*개월)?\s*$"
+)
+
+부담_단계 = 증상조사_컬럼["육체적부담"][1:6]
+
+# 부위별 통증 응답 보기 (순서가 코드 0, 1, 2, ...)
+통증_부위 = 증상조사_컬럼["통증호소자"][2:8]
+통증_보기 = {
+    "기간": ["1일 미만", "1일-1주일 미만", "1주일-1달 미만", "1달-6개월 미만", "6개월 이상"],
+    "빈도": ["6개월에 1번", "2-3달에 1번", "1달에 1번", "1주일에 1번", "매일"],
+    "정도": ["약한 통증", "중간 통증", "심한 통증", "매우 심한 통증"],
+}
+통증_구분 = ["정상", "관리대상자", "통증호소자"]
+_부위_별칭 = {
+    "목": ["목"],
+    "어깨": ["어깨"],
+    "팔/팔꿈치": ["팔/팔꿈치", "팔꿈치", "팔"],
+    "손/손목/손가락": ["손/손목/손가락", "손목", "손"],
+    "허리": ["허리"],
+    "다리/발": ["다리/발", "다리", "발"],
+}
+_항목_별칭 = {"기간": ["기간", "지속기간"], "빈도": ["빈도"], "정도": ["정도", "통증정도"]}
+# 부위별 통증 열 (원자료 머리글 예: "목_기간", "팔/팔꿈치 빈도", "허리통증정도")
+통증_열 = {
+    f"{부위}_{항목}": [a + b for a in _부위_별칭[부위] for b in _항목_별칭[항목]]
+    for 부위 in 통증_부위 for 항목 in 통증_보기
+}
+
+# 관리대상자: 지속기간 1주일 이상 또는 빈도 1달에 1번 이상이면서 통증 정도가 중간 통증 이상
+# 통증호소자: 같은 기간/빈도 조건이면서 통증 정도가 심한 통증 이상
+통증_기준 = {"기간": 2, "빈도": 2, "관리대상자": 1, "통증호소자": 2}
+
+# (열 이름 접미사, 하한 이상, 상한 미만) - 단위는 년
+기간_구간 = [("<1년", -np.inf, 1), ("<3년", 1, 3), ("<5년", 3, 5), ("≥5년", 5, np.inf)]
+
+
+def _머리글(name):
+    return str(name).replace(" ", "").replace("_", "") if name is not None else ""
+
+
+def _머리글_대응(header):
+    """원자료 머리글 -> {표준 열 이름: 열 위치}"""
+    정규화 = [_머리글(name) for name in header]
+    위치 = {}
+    for 열, 별칭 in {**원자료_열, **통증_열}.items():
+        for name in 별칭:
+            if _머리글(name) in 정규화:
+                위치[열] = 정규화.index(_머리글(name))
+                break
+    if "작업명" not in 위치:
+        raise ValueError("원자료에 '작업명' 열이 없습니다.")
+    return 위치
+
+
+def _숫자(values):
+    """'35세', '3.5년', '3년 6개월', '6개월' 같은 값을 세/년 단위 숫자로 읽는다.
+
+    개월은 12로 나눠 더한다. 형식이 맞지 않거나 0~100 밖이면(예: '2019.03') NaN
+    """
+    s = pd.Series(values, dtype=object)
+    숫자 = pd.to_numeric(s, errors="coerce")
+    문자 = 숫자.isna() & s.notna()
+    if 문자.any():
+        부분 = s[문자].astype(str).str.extract(_기간_형식)
+        년 = pd.to_numeric(부분["년"], errors="coerce")
+        월 = pd.to_numeric(부분["월"], errors="coerce")
+        # 숫자 둘을 단위 없이 붙여 쓴 값('3 6개월')이나 빈 문자열은 읽지 않음
+        읽음 = (년.notna() | 월.notna()) & ~(년.notna() & 월.notna() & 부분["단위"].isna())
+        숫자[문자] = (년.fillna(0) + 월.fillna(0) / 12).where(읽음)
+    숫자 = 숫자.where((숫자 >= 0) & (숫자 <= 100))
+    return 숫자.to_numpy(dtype=float)
+
+
+def _성별_코드(values):
+    """남=0, 여=1, 알 수 없음=-1"""
+    s = pd.Series(values, dtype=object).astype(str).str.strip().str.upper()
+    return np.select(
+        [s.str.startswith(("남", "M", "1")).to_numpy(), s.str.startswith(("여", "F", "2")).to_numpy()],
+        [0, 1], -1,
+    ).astype(np.int8)
+
+
+def _보기_정규화(values):
+    return pd.Series(values, dtype=object).astype(str).str.replace(r"[\s\-~]", "", regex=True)
+
+
+def _보기_코드(values, 보기):
+    """보기 문구 또는 1부터 시작하는 번호를 0부터 시작하는 코드로 바꾼다. 무응답=-1
+
+    응답 값의 종류는 몇 개뿐이므로 고유값만 해석하고 위치 코드로 펼친다.
+    """
+    위치, 고유값 = pd.factorize(pd.Series(values, dtype=object))
+    숫자 = pd.to_numeric(pd.Series(고유값, dtype=object), errors="coerce").to_numpy()
+    코드 = pd.Index(_보기_정규화(보기)).get_indexer(_보기_정규화(고유값))
+    숫자_코드 = np.where(np.isin(숫자, np.arange(1, len(보기) + 1)), np.nan_to_num(숫자, nan=0) - 1, -1)
+    고유_코드 = np.append(np.where(코드 >= 0, 코드, 숫자_코드), -1).astype(np.int8)
+    # 결측은 factorize 위치가 -1이므로 마지막에 붙인 -1(무응답)을 가리킨다
+    return 고유_코드[위치]
+
+
+def 통증_분류(기간, 빈도, 정도):
+    """부위별 통증 코드 배열(같은 모양)을 0=정상, 1=관리대상자, 2=통증호소자 배열로 분류한다.
+
+    통증호소자는 관리대상자 조건도 만족하므로, 한 부위는 가장 높은 구분 하나로만 센다.
+    """
+    증상 = (기간 >= 통증_기준["기간"]) | (빈도 >= 통증_기준["빈도"])
+    관리 = 증상 & (정도 >= 통증_기준["관리대상자"])
+    호소 = 증상 & (정도 >= 통증_기준["통증호소자"])
+    return 관리.astype(np.int8) + 호소.astype(np.int8)
+
+
+def _청크_정규화(rows, 위치):
+    """원자료 행 목록 -> 표준 열 데이터프레임 (작업명이 빈 행은 제외)"""
+    columns = list(zip(*rows)) if rows else []
+
+    def 열(name):
+        return columns[위치[name]] if name in 위치 and 위치[name] < len(columns) else [None] * len(rows)
+
+    작업명 = pd.Series(열("작업명"), dtype=object)
+    유효 = 작업명.notna() & (작업명.astype(str).str.strip() != "")
+    작업명 = 작업명.astype(str).str.strip()
+    df = pd.DataFrame({"작업명": 작업명.mask(작업명 == 전체_행, _전체_작업명)})
+    for name in _숫자_열:
+        df[name] = _숫자(열(name))
+    df["성별"] = _성별_코드(열("성별"))
+    df["육체적부담"] = _보기_코드(열("육체적부담"), 부담_단계)
+    if any(f"{부위}_정도" in 위치 for 부위 in 통증_부위):
+        코드 = {
+            항목: np.column_stack([_보기_코드(열(f"{부위}_{항목}"), 보기) for 부위 in 통증_부위])
+            for 항목, 보기 in 통증_보기.items()
+        }
+        분류 = 통증_분류(코드["기간"], 코드["빈도"], 코드["정도"])
+        for j, 부위 in enumerate(통증_부위):
+            df[f"통증_{부위}"] = 분류[:, j]
+        df["통증_전체"] = 분류.max(axis=1)
+    return df[유효.to_numpy()]
+
+
+def 원자료_스트리밍(file, 파일명="", chunk_size=청크_크기):
+    """정규화한 원자료 청크를 내보내는 generator (열: 작업명, 나이, 근속년수, 현재/이전작업기간, 성별, 육체적부담)"""
+    청크_iter = 행_청크(file, 파일명, chunk_size)
+    위치 = _머리글_대응(next(청크_iter))
+    for rows in 청크_iter:
+        yield _청크_정규화(rows, 위치)
+
+
+def _부분_합계(df):
+    """청크 하나의 작업명별 합계 (열마다 더하기만 하면 되는 값)"""
+    값 = {
+        "응답자": np.ones(len(df), dtype=np.int64),
+        "나이_합": np.nan_to_num(df["나이"].to_numpy()),
+        "나이_수": df["나이"].notna().to_numpy(),
+        "근속_합": np.nan_to_num(df["근속년수"].to_numpy()),
+        "근속_수": df["근속년수"].notna().to_numpy(),
+        "남": (df["성별"] == 0).to_numpy(),
+        "여": (df["성별"] == 1).to_numpy(),
+    }
+    for 접두사, 열 in [("", "현재작업기간"), ("이전", "이전작업기간")]:
+        기간 = df[열].to_numpy()
+        for 이름, 하한, 상한 in 기간_구간:
+            값[접두사 + 이름] = (기간 >= 하한) & (기간 < 상한)
+        값[접두사 + "무응답"] = np.isnan(기간)
+    부담 = df["육체적부담"].to_numpy()
+    for i, 단계 in enumerate(부담_단계):
+        값[단계] = 부담 == i
+    if "통증_전체" in df:
+        for 부위 in 통증_부위 + ["전체"]:
+            분류 = df[f"통증_{부위}"].to_numpy()
+            for i, 구분 in enumerate(통증_구분):
+                값[f"통증_{부위}_{구분}"] = 분류 == i
+    return pd.DataFrame(값).groupby(df["작업명"].to_numpy(), sort=False).sum()
+
+
+def _평균(합, 수):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        평균 = 합 / 수
+    return [f"{값:.1f}" if 값 == 값 else "" for 값 in 평균]
+
+
+def _문자열_표(columns, data):
+    return pd.DataFrame({col: [str(value) for value in values] for col, values in zip(columns, data)}, dtype=object)
+
+
+def _표_만들기(합계):
+    """작업명별 합계 -> (기초현황, 작업기간, 육체적부담) 문자열 표 (마지막 행은 전체)
+
+    합계 행은 작업명 index에 넣지 않고 열 배열 끝에만 붙인다.
+    """
+    전체 = 합계.sum()
+    작업명 = [str(name) for name in 합계.index] + [전체_행]
+    열 = {}
+    for name in 합계.columns:
+        values = np.append(합계[name].to_numpy(), 전체[name])
+        열[name] = values if name.endswith("_합") else values.astype(np.int64)
+
+    기초현황 = _문자열_표(증상조사_컬럼["기초현황"], [
+        작업명, 열["응답자"], _평균(열["나이_합"], 열["나이_수"]), _평균(열["근속_합"], 열["근속_수"]),
+        열["남"], 열["여"], 열["남"] + 열["여"],
+    ])
+
+    현재 = [열[이름] for 이름, _, _ in 기간_구간] + [열["무응답"]]
+    이전 = [열["이전" + 이름] for 이름, _, _ in 기간_구간] + [열["이전무응답"]]
+    작업기간 = _문자열_표(증상조사_컬럼["작업기간"], [작업명] + 현재 + [sum(현재)] + 이전 + [sum(이전)])
+
+    부담 = [열[단계] for 단계 in 부담_단계]
+    육체적부담 = _문자열_표(증상조사_컬럼["육체적부담"], [작업명] + 부담 + [sum(부담)])
+
+    통증호소자 = None
+    if "통증_전체_정상" in 열:
+        # 작업명마다 정상/관리대상자/통증호소자 3행, 작업명은 첫 행에만 (화면 표와 같은 모양)
+        행수 = len(작업명) * len(통증_구분)
+        data = [
+            [name if i == 0 else "" for name in 작업명 for i in range(len(통증_구분))],
+            통증_구분 * len(작업명),
+        ]
+        for 부위 in 통증_부위 + ["전체"]:
+            data.append(np.column_stack([열[f"통증_{부위}_{구분}"] for 구분 in 통증_구분]).reshape(행수))
+        통증호소자 = _문자열_표(증상조사_컬럼["통증호소자"], data)
+    return 기초현황, 작업기간, 육체적부담, 통증호소자
+
+
+def 증상조사_집계(file, 파일명="", chunk_size=청크_크기, on_progress=None):
+    """설문 원자료 파일로 증상조사 표를 만든다.
+
+    on_progress(처리 행수)는 청크마다 호출된다.
+    반환: {"기초현황", "작업기간", "육체적부담", "통증호소자", "응답자수", "작업명_목록"}
+    통증 응답 열이 없으면 "통증호소자"는 None이다.
+    """
+    부분 = []
+    처리 = 0
+    for chunk in 원자료_스트리밍(file, 파일명, chunk_size):
+        처리 += len(chunk)
+        if len(chunk):
+            부분.append(_부분_합계(chunk))
+        if on_progress is not None:
+            on_progress(처리)
+    if not 부분:
+        raise ValueError("작업명이 있는 응답이 없습니다.")
+
+    합계 = pd.concat(부분).groupby(level=0, sort=False).sum()
+    기초현황, 작업기간, 육체적부담, 통증호소자 = _표_만들기(합계)
+    return {
+        "기초현황": 기초현황,
+        "작업기간": 작업기간,
+        "육체적부담": 육체적부담,
+        "통증호소자": 통증호소자,
+        "응답자수": int(합계["응답자"].sum()),
+        "작업명_목록": [str(name) for name in 합계.index],
+    }